@@ -7,6 +7,14 @@ ColorPy is a Python package to convert physical descriptions of light:
     It provides a nice set of attractive plots that you can make of such
     spectra, and some other color related functions as well.
 
+The tables used by the modules are built on first use, not on import.
+
+Functions:
+
+warmup () -
+    Build all of the tables now, rather than on first use.
+    Useful for servers that want a predictable latency for the first request.
+
 License:
 
 Copyright (C) 2008 Mark Kness
@@ -29,4 +37,18 @@ You should have received a copy of the GNU Lesser General Public License
 along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
-# This file only needs to exist to indicate that this is a package.
+# This file mostly exists to indicate that this is a package.
+
+def warmup ():
+    '''Build all of the tables now, rather than on first use.
+    Useful for servers that want a predictable latency for the first request.
+    This does not change any settings already made with the init() functions.'''
+    import colormodels
+    import ciexyz
+    import illuminants
+    colormodels._ensure_init()
+    ciexyz._ensure_init()
+    illuminants._ensure_init()
+    # integration weights for the default wavelengths, and the angstrom locus table
+    ciexyz.get_xyz_weights (ciexyz.empty_spectrum() [:,0])
+    ciexyz.xyz_from_wavelength_angstroms (5550)
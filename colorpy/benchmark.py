@@ -0,0 +1,258 @@
+'''
+benchmark.py - Timing comparisons for some of the ColorPy calculations.
+
+Description:
+
+Times the faster paths in ColorPy against the simpler ways of doing the same work,
+and prints the results.  Nothing here is needed to use ColorPy.
+
+Functions:
+
+benchmark_import () -
+    Time the import of ciexyz in a fresh interpreter, and compare the loading of the
+    1931 CIE XYZ table from the binary .npy file with parsing it as a Python list literal.
+
+benchmark_spectral_sampling () -
+    For several choices of ciexyz.init_spectral_sampling(), time the color of a blackbody,
+    and report the maximum xyz error against the full 1 nm sampling.
+
+benchmark_blackbody (num_T = 30000, num_lookups = 1000000) -
+    Time the colors of blackbodies at num_T temperatures, one at a time and all at once,
+    and at num_lookups temperatures, all at once and from the Planckian locus table.
+
+benchmark_correlated_color_temperature (num_colors = 20000) -
+    Time the correlated color temperatures of num_colors colors, one at a time and all at once.
+
+benchmark_display_transform (num_pixels = 1000000) -
+    Time the conversion of an image of xyz colors into 8-bit irgb colors,
+    with irgb_from_xyz() and with a colormodels.DisplayTransform.
+
+benchmark_lut (num_pixels = 1000000) -
+    Time the conversion of images of xyz and Lab colors into 8-bit irgb colors, exactly and with
+    the lookup tables of lut.display_lut(), for several table sizes and both interpolations,
+    and report the interpolation errors.
+
+benchmark_color_difference (num_pairs = 10000, num_colors = 2000) -
+    Time Delta E 2000 for pairs of Lab colors, one pair at a time and all at once with colordiff,
+    and time all the pairs of num_colors Lab colors with colordiff.delta_e_matrix().
+
+benchmark_color_index (num_colors = 200000, palette_sizes = [24, 240, 2400]) -
+    Time finding the nearest palette color to each of num_colors Lab colors, comparing each
+    with every palette color, and with a colordiff.ColorIndex, by Delta E 1976 and 2000.
+
+benchmark () -
+    Run all the benchmarks.
+
+License:
+
+Copyright (C) 2008 Mark Kness
+
+Author - Mark Kness - mkness@alumni.utexas.net
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import math, os, subprocess, sys, timeit
+import numpy
+
+import ciexyz
+import colordiff
+import colormodels
+import lut
+import blackbody
+import illuminants
+
+def best_time (func, number, repeat=5):
+    '''Get the best time, over several repeats, for a single call of func (seconds).'''
+    times = timeit.repeat (func, number=number, repeat=repeat)
+    return min (times) / float (number)
+
+def print_comparison (name, t_old, t_new):
+    '''Print the two times (in milliseconds) and the speedup.'''
+    print ('%-40s  before: %9.3f ms    after: %9.3f ms    speedup: %7.1fx' % (
+        name, 1000.0 * t_old, 1000.0 * t_new, t_old / t_new))
+
+def benchmark_import ():
+    '''Time the import of ciexyz, and the loading of the 1931 CIE XYZ table.'''
+    # Import in a fresh interpreter, as a short lived worker process would.
+    here = os.path.dirname (os.path.abspath (__file__))
+    code = 'import time; t0 = time.time(); import ciexyz; print (time.time() - t0)'
+    import_times = []
+    for i in range (5):
+        output = subprocess.check_output ([sys.executable, '-c', code], cwd=here)
+        import_times.append (float (output))
+    print ('%-40s  %9.3f ms' % ('import ciexyz (fresh interpreter)', 1000.0 * min (import_times)))
+    # Previously, the table was a Python list literal in ciexyz.py, that init() copied row by row.
+    table = numpy.load (ciexyz._CIEXYZ_1931_TABLE_FILE)
+    literal_source = '_CIEXYZ_1931_table = %s\n' % (repr (table.tolist()))
+    def load_literal ():
+        namespace = {}
+        exec (compile (literal_source, '<table>', 'exec'), namespace)
+        rows = namespace ['_CIEXYZ_1931_table']
+        xyz_colors = numpy.empty ((len (rows), 3))
+        for i in range (0, len (rows)):
+            (wl,x,y,z) = rows [i]
+            xyz_colors [i] = numpy.array ([x, y, z])
+        return xyz_colors
+    def load_npy ():
+        rows = numpy.load (ciexyz._CIEXYZ_1931_TABLE_FILE, mmap_mode='r')
+        xyz_colors = numpy.empty ((len (rows), 3))
+        xyz_colors [:] = rows [:,1:4]
+        return xyz_colors
+    assert numpy.array_equal (load_literal(), load_npy())
+    print_comparison ('load CIE XYZ table', best_time (load_literal, 5), best_time (load_npy, 50))
+
+# Spectral samplings to compare against the default (360 - 830 nm every 1 nm).
+SPECTRAL_SAMPLINGS = [
+    (360, 830, 1.0),
+    (360, 830, 5.0),
+    (380, 780, 5.0),
+    (360, 830, 10.0),
+    (400, 700, 10.0),
+]
+
+def benchmark_spectral_sampling (T_list = numpy.logspace (3.0, 4.5, 31)):
+    '''Time the color of a blackbody, and get the maximum xyz error, for each spectral sampling.
+    The errors are for the blackbodies in T_list and Illuminant D65, each scaled to Y = 1.0.'''
+    def get_colors ():
+        colors = [blackbody.blackbody_color (T) for T in T_list]
+        colors.append (ciexyz.xyz_from_spectrum (illuminants.get_illuminant_D65()))
+        return numpy.array ([xyz / xyz [1] for xyz in colors])
+    try:
+        ciexyz.init_spectral_sampling()
+        exact = get_colors()
+        for (start_nm, end_nm, delta_nm) in SPECTRAL_SAMPLINGS:
+            ciexyz.init_spectral_sampling (start_nm, end_nm, delta_nm)
+            num_wl = len (ciexyz.empty_spectrum())
+            t = best_time (lambda: blackbody.blackbody_color (5778.0), 20)
+            error = numpy.max (numpy.abs (get_colors() - exact))
+            print ('%-40s  %4d samples    blackbody_color: %7.3f ms    max xyz error: %.2e' % (
+                'sampling %g - %g nm every %g nm' % (start_nm, end_nm, delta_nm), num_wl, 1000.0 * t, error))
+    finally:
+        ciexyz.init_spectral_sampling()
+
+def benchmark_blackbody (num_T = 30000, num_lookups = 1000000):
+    '''Time the colors of many blackbodies, one at a time, all at once, and from the Planckian locus table.'''
+    T_list = numpy.linspace (1200.0, 16000.0, num_T)
+    def one_at_a_time ():
+        return numpy.array ([blackbody.blackbody_color (T) for T in T_list])
+    assert numpy.allclose (one_at_a_time(), blackbody.blackbody_color (T_list), rtol=1.0e-12, atol=0.0)
+    print_comparison ('blackbody colors, %d temperatures' % (num_T),
+        best_time (one_at_a_time, 1, 3),
+        best_time (lambda: blackbody.blackbody_color (T_list), 1, 3))
+    T_list = numpy.exp (numpy.random.uniform (math.log (1000.0), math.log (40000.0), num_lookups))
+    blackbody.get_planckian_locus()
+    print_comparison ('blackbody colors from locus table, %d temperatures' % (num_lookups),
+        best_time (lambda: blackbody.blackbody_color (T_list), 1, 1),
+        best_time (lambda: blackbody.blackbody_color_lookup (T_list), 1, 3))
+
+def benchmark_correlated_color_temperature (num_colors = 20000):
+    '''Time the correlated color temperatures of many colors, one at a time and all at once.'''
+    random = numpy.random.RandomState (0)
+    xyz = blackbody.blackbody_color (numpy.exp (random.uniform (math.log (1000.0), math.log (40000.0), num_colors)))
+    xyz *= random.uniform (0.95, 1.05, (num_colors, 3))
+    def one_at_a_time ():
+        return numpy.array ([blackbody.correlated_color_temperature (color) for color in xyz]).T
+    assert numpy.allclose (one_at_a_time(), blackbody.correlated_color_temperature (xyz), rtol=1.0e-12, atol=1.0e-15, equal_nan=True)
+    print_comparison ('correlated color temperature, %d colors' % (num_colors),
+        best_time (one_at_a_time, 1, 3),
+        best_time (lambda: blackbody.correlated_color_temperature (xyz), 1, 3))
+
+def benchmark_display_transform (num_pixels = 1000000):
+    '''Time the conversion of an image of xyz colors into 8-bit irgb colors.'''
+    xyzs = numpy.random.uniform (0.0, 1.0, (num_pixels, 3))
+    buffer = numpy.empty ((num_pixels, 3), numpy.uint8)
+    transform = colormodels.DisplayTransform()
+    assert numpy.array_equal (colormodels.irgb_from_xyz (xyzs), transform (xyzs, out=buffer))
+    print_comparison ('xyz to irgb, %d pixels' % (num_pixels),
+        best_time (lambda: colormodels.irgb_from_xyz (xyzs), 1),
+        best_time (lambda: transform (xyzs, out=buffer), 1))
+
+def benchmark_lut (num_pixels = 1000000):
+    '''Time the lookup tables for xyz and Lab colors, against the exact conversions.'''
+    exact_functions = {
+        'xyz' : colormodels.irgb_from_xyz,
+        'lab' : lambda lab: colormodels.irgb_from_xyz (colormodels.xyz_from_lab (lab)),
+    }
+    methods = [(lut.INTERP_TRILINEAR, 'trilinear'), (lut.INTERP_TETRAHEDRAL, 'tetrahedral')]
+    for space in ['xyz', 'lab']:
+        (domain_min, domain_max) = lut._DISPLAY_DOMAINS [space]
+        colors = numpy.random.uniform (domain_min, domain_max, (num_pixels, 3))
+        t_exact = best_time (lambda: exact_functions [space] (colors), 1, 3)
+        exact = exact_functions [space] (colors)
+        for size in [17, 33, 65]:
+            table = lut.display_lut (space, size)
+            for (method, name) in methods:
+                t_lut = best_time (lambda: table.irgb (colors, method), 1, 3)
+                (max_error, rms_error, worst_color) = lut.lut_error (table, lut.display_function (space), method=method)
+                code_errors = numpy.max (numpy.abs (table.irgb (colors, method).astype (int) - exact), axis=-1)
+                print_comparison ('%s lut %d, %s' % (space, size, name), t_exact, t_lut)
+                print ('%-40s  max error: %.2e    rms error: %.2e    colors off by > 1 code: %.2f%%' % (
+                    '', max_error, rms_error, 100.0 * numpy.mean (code_errors > 1)))
+
+def benchmark_color_difference (num_pairs = 10000, num_colors = 2000):
+    '''Time Delta E 2000 for single pairs of colors, for arrays of pairs, and for all pairs.'''
+    lab_min = (0.0, -100.0, -100.0)
+    lab_max = (100.0, 100.0, 100.0)
+    labs1 = numpy.random.uniform (lab_min, lab_max, (num_pairs, 3))
+    labs2 = numpy.random.uniform (lab_min, lab_max, (num_pairs, 3))
+    def one_at_a_time ():
+        return numpy.array ([colordiff.delta_e_2000 (labs1 [i], labs2 [i]) for i in range (0, num_pairs)])
+    assert numpy.allclose (one_at_a_time(), colordiff.delta_e_2000 (labs1, labs2))
+    print_comparison ('Delta E 2000, %d pairs' % (num_pairs),
+        best_time (one_at_a_time, 1, 3),
+        best_time (lambda: colordiff.delta_e_2000 (labs1, labs2), 10))
+    colors = numpy.random.uniform (lab_min, lab_max, (num_colors, 3))
+    t = best_time (lambda: colordiff.delta_e_matrix (colors), 1, 3)
+    print ('%-40s  %9.3f ms' % ('Delta E 2000 matrix, %d x %d' % (num_colors, num_colors), 1000.0 * t))
+
+def benchmark_color_index (num_colors = 200000, palette_sizes = [24, 240, 2400]):
+    '''Time the nearest palette colors, by full comparison and with a colordiff.ColorIndex.'''
+    lab_min = (0.0, -100.0, -100.0)
+    lab_max = (100.0, 100.0, 100.0)
+    labs = numpy.random.uniform (lab_min, lab_max, (num_colors, 3))
+    for palette_size in palette_sizes:
+        palette = numpy.random.uniform (lab_min, lab_max, (palette_size, 3))
+        def full_comparison ():
+            nearest = numpy.empty (num_colors, dtype=int)
+            rows = max (1, colordiff.DEFAULT_MAX_PAIRS // palette_size)
+            for start in range (0, num_colors, rows):
+                differences = colordiff.delta_e_76 (labs [start:start+rows, numpy.newaxis, :], palette)
+                nearest [start:start+rows] = numpy.argmin (differences, axis=1)
+            return nearest
+        index = colordiff.ColorIndex (palette)
+        (indices, distances) = index.query (labs)
+        assert numpy.allclose (distances [:, 0], colordiff.delta_e_76 (labs, palette [full_comparison()]))
+        t_full = best_time (full_comparison, 1, 1)
+        print_comparison ('nearest of %d colors, Delta E 1976' % (palette_size), t_full, best_time (lambda: index.query (labs), 1, 3))
+        print ('%-40s  %9.3f ms' % ('nearest of %d colors, Delta E 2000' % (palette_size),
+            1000.0 * best_time (lambda: index.query (labs, metric=colordiff.DELTA_E_2000), 1, 3)))
+
+def benchmark ():
+    '''Run all the benchmarks.'''
+    benchmark_import()
+    benchmark_spectral_sampling()
+    benchmark_blackbody()
+    benchmark_correlated_color_temperature()
+    benchmark_display_transform()
+    benchmark_lut()
+    benchmark_color_difference()
+    benchmark_color_index()
+
+
+if __name__ == '__main__':
+    benchmark()
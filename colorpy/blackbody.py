@@ -5,6 +5,9 @@ Description:
 
 Calculate the spectrum of a thermal blackbody at an arbitrary temperature.
 
+The colors of many blackbodies can also be found quickly from a precomputed table of
+the Planckian locus, the colors of blackbodies over a range of temperatures, see PlanckianLocus.
+
 Constants:
 
 PLANCK_CONSTANT   - Planck's constant, in J-sec
@@ -12,6 +15,11 @@ SPEED_OF_LIGHT    - Speed of light, in m/sec
 BOLTZMAN_CONSTANT - Boltzman's constant, in J/K
 SUN_TEMPERATURE   - Surface temperature of the Sun, in K
 
+LOCUS_T_MIN = 500.0
+LOCUS_T_MAX = 100000.0
+DEFAULT_LOCUS_SIZE = 1024
+    Default temperature range (K) and number of temperatures of the Planckian locus table.
+
 Functions:
 
 blackbody_specific_intensity (wl_nm, T_K) -
@@ -20,12 +28,62 @@ blackbody_specific_intensity (wl_nm, T_K) -
         T_K   = temperature [K]
     This is the energy radiated per second per unit wavelength per unit solid angle.
     Reference - Shu, eq. 4.6, p. 78.
+    wl_nm and T_K may also be arrays, which are broadcast against each other, so for example
+    wavelengths of shape (W,) and temperatures of shape (T, 1) give intensities of shape (T, W).
 
 blackbody_spectrum (T_K) -
     Get the spectrum of a blackbody, as a numpy array.
 
+blackbody_spectra (T_list) -
+    Get the spectra of blackbodies at each of the temperatures, as a 2D array of shape (T, W),
+    with the intensities (as in blackbody_spectrum()) at the W wavelengths of ciexyz.empty_spectrum().
+
 blackbody_color (T_K) -
     Given a temperature (K), return the xyz color of a thermal blackbody.
+    T_K may also be a 1D array of temperatures, and the result is then an array of shape (T, 3),
+    with all the colors from a single matrix product of the spectra.
+
+class PlanckianLocus (T_min = LOCUS_T_MIN, T_max = LOCUS_T_MAX, size = DEFAULT_LOCUS_SIZE) -
+    A table of blackbody colors, at size temperatures evenly spaced in log T from T_min to T_max.
+    For each temperature, the table holds the color per unit luminance, X/Y and Z/Y, and the
+    luminance, as log (Y), along with their exact derivatives with respect to log (T).
+    Colors are looked up by cubic Hermite interpolation in log (T), with the slopes limited
+    as by Fritsch and Carlson, so that the interpolation is monotone where the table values are.
+    With the default table, the colors differ from blackbody_color() by less than 1.0e-9 of
+    their luminance Y.  The attributes are:
+    T_min, T_max - the temperature range of the table.
+    log_T        - array of shape (size,), the log of the table temperatures.
+    values       - array of shape (size, 3), the values X/Y, log (Y), Z/Y at each temperature.
+    slopes       - array of shape (size, 3), their derivatives with respect to log (T).
+
+On these class objects, the following functions are available:
+
+color (T_K) -
+    Get the xyz color of a blackbody, for a temperature, or an array of temperatures
+    of any shape, when the result has shape (..., 3).  Temperatures outside of the table range
+    are calculated exactly, with blackbody_color().
+
+correlated_color_temperature (xyz) -
+    Get the correlated color temperature (CCT) and Duv of an xyz color, or an array of colors
+    of shape (..., 3).  The result is a tuple (T_K, Duv), of floats or of arrays of shape (...).
+    The CCT is the temperature of the nearest point of the locus in the CIE 1960 uv diagram,
+    and Duv is the signed distance to it, positive above the locus (towards green) and
+    negative below it (towards purple).  The nearest point is found by bisection over the
+    table temperatures, and then by a few secant steps on the interpolated locus.
+    For colors within 0.05 of the locus, the CCT is within 1.0e-7 of the exact value.
+    The CCT is only meaningful for colors near the locus, typically with |Duv| < 0.05.
+    Colors whose nearest point is beyond the ends of the table, and black, give nan for both.
+
+get_planckian_locus () -
+    Get the default PlanckianLocus table, which is built on the first call.
+
+blackbody_color_lookup (T_K) -
+    Get the xyz color of a blackbody, as blackbody_color(), but from the default PlanckianLocus table.
+    This is much faster for many temperatures.  T_K may be an array of any shape.
+
+correlated_color_temperature (xyz) -
+    Get the correlated color temperature (K) and Duv of an xyz color, or an array of colors,
+    from the default PlanckianLocus table.
 
 Plots:
 
@@ -46,6 +104,15 @@ University Science Books, Mill Valley, California. 1982. ISBN 0-935702-05-9.
 Charles Kittel and Herbert Kroemer, Thermal Physics, 2nd edition,
 W. H. Freeman, New York, 1980. ISBN 0-7167-1088-9.
 
+Wyszecki and Stiles, Color Science: Concepts and Methods, Quantitative Data and Formulae,
+2nd edition, John Wiley, 1982. Wiley Classics Library Edition 2000. ISBN 0-471-39918-3.
+
+Yoshi Ohno, Practical Use and Calculation of CCT and Duv,
+LEUKOS, Vol. 10, No. 1, pp. 47-55, 2014.
+
+F. N. Fritsch and R. E. Carlson, Monotone Piecewise Cubic Interpolation,
+SIAM Journal on Numerical Analysis, Vol. 17, No. 2, pp. 238-246, 1980.
+
 License:
 
 Copyright (C) 2008 Mark Kness
@@ -68,6 +135,7 @@ You should have received a copy of the GNU Lesser General Public License
 along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 import math
+import threading
 import numpy
 import pylab
 
@@ -81,65 +149,314 @@ SPEED_OF_LIGHT    = 2.997925e+08    # m/sec
 BOLTZMAN_CONSTANT = 1.3802e-23      # J/K
 SUN_TEMPERATURE   = 5778.0          # K
 
+# Default Planckian locus table
+LOCUS_T_MIN = 500.0
+LOCUS_T_MAX = 100000.0
+DEFAULT_LOCUS_SIZE = 1024
+
+# Constants of the Planck function
+_PLANCK_A = (PLANCK_CONSTANT * SPEED_OF_LIGHT) / (BOLTZMAN_CONSTANT)
+_PLANCK_B = (2.0 * PLANCK_CONSTANT * SPEED_OF_LIGHT * SPEED_OF_LIGHT)
+
+# Very large exponents (small inv_exponent) result in nearly zero intensity.
+# Avoid the numeric troubles in this case and return zero intensity.
+_MIN_INV_EXPONENT = 1.0 / 500.0
+
 def blackbody_specific_intensity (wl_nm, T_K):
     '''Get the monochromatic specific intensity for a blackbody -
         wl_nm = wavelength [nm]
         T_K   = temperature [K]
     This is the energy radiated per second per unit wavelength per unit solid angle.
-    Reference - Shu, eq. 4.6, p. 78.'''
-    # precalculations that could be made global
-    a = (PLANCK_CONSTANT * SPEED_OF_LIGHT) / (BOLTZMAN_CONSTANT)
-    b = (2.0 * PLANCK_CONSTANT * SPEED_OF_LIGHT * SPEED_OF_LIGHT)
+    Reference - Shu, eq. 4.6, p. 78.
+    wl_nm and T_K may also be arrays, and the result is then an array of their broadcast shape.'''
+    if numpy.ndim (wl_nm) > 0 or numpy.ndim (T_K) > 0:
+        return _blackbody_specific_intensity_array (wl_nm, T_K)
     wl_m = wl_nm * 1.0e-9
-    inv_exponent = (wl_m * T_K) / a
-    # Very large exponents (small inv_exponent) result in nearly zero intensity.
-    # Avoid the numeric troubles in this case and return zero intensity.
-    if inv_exponent < 1.0 / 500.0:
+    inv_exponent = (wl_m * T_K) / _PLANCK_A
+    if inv_exponent < _MIN_INV_EXPONENT:
         return 0.0
     exponent = 1.0 / inv_exponent
-    specific_intensity = b / (math.pow (wl_m, 5) * (math.exp (exponent) - 1.0))
+    specific_intensity = _PLANCK_B / (math.pow (wl_m, 5) * (math.exp (exponent) - 1.0))
+    return specific_intensity
+
+def _blackbody_specific_intensity_array (wl_nm, T_K):
+    '''Get the specific intensities for the broadcast arrays of wavelengths and temperatures.'''
+    wl_m = numpy.asarray (wl_nm, dtype=float) * 1.0e-9
+    T_K = numpy.asarray (T_K, dtype=float)
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        # the factors of the wavelength, and of the temperature, are each only computed once
+        exponent = (_PLANCK_A / wl_m) * (1.0 / T_K)
+        scale = _PLANCK_B / wl_m ** 5
+        # as in the single value test inv_exponent < _MIN_INV_EXPONENT, this includes
+        # non-positive exponents, from zero or negative temperatures, and NaN passes through
+        cutoff = (exponent <= 0.0) | (exponent > 1.0 / _MIN_INV_EXPONENT)
+        numpy.minimum (exponent, 1.0 / _MIN_INV_EXPONENT, out=exponent)
+        numpy.expm1 (exponent, out=exponent)
+        specific_intensity = numpy.divide (scale, exponent, out=exponent)
+    specific_intensity [cutoff] = 0.0
     return specific_intensity
 
 def blackbody_spectrum (T_K):
     '''Get the spectrum of a blackbody, as a numpy array.'''
     spectrum = ciexyz.empty_spectrum()
-    num_wl = spectrum.shape[0]
-    for i in range (0, num_wl):
-        # Intensity per unit wavelength.
-        specific_intensity = blackbody_specific_intensity (spectrum [i][0], T_K)
-        # Scale by size of wavelength interval.
-        spectrum [i][1] = specific_intensity * ciexyz.delta_wl_nm * 1.0e-9
+    # Intensity per unit wavelength, scaled by size of wavelength interval.
+    spectrum [:,1] = blackbody_specific_intensity (spectrum [:,0], T_K) * (ciexyz.delta_wl_nm * 1.0e-9)
     return spectrum
 
+def blackbody_spectra (T_list):
+    '''Get the spectra of blackbodies at each of the temperatures, as a 2D array of shape (T, W),
+    with the intensities (as in blackbody_spectrum()) at the W wavelengths of ciexyz.empty_spectrum().'''
+    T_list = numpy.asarray (T_list, dtype=float)
+    if T_list.ndim != 1:
+        raise ValueError ('Expecting a 1D array of temperatures, got shape %s' % (str (T_list.shape)))
+    wavelengths = ciexyz.empty_spectrum() [:,0]
+    spectra = blackbody_specific_intensity (wavelengths, T_list [:, numpy.newaxis])
+    spectra *= (ciexyz.delta_wl_nm * 1.0e-9)
+    return spectra
+
 def blackbody_color (T_K):
-    '''Given a temperature (K), return the xyz color of a thermal blackbody.'''
+    '''Given a temperature (K), return the xyz color of a thermal blackbody.
+    T_K may also be a 1D array of temperatures, and the result is then an array of colors of shape (T, 3).'''
+    if numpy.ndim (T_K) > 0:
+        wavelengths = ciexyz.empty_spectrum() [:,0]
+        return ciexyz.xyz_from_spectra (wavelengths, blackbody_spectra (T_K))
     spectrum = blackbody_spectrum (T_K)
     xyz = ciexyz.xyz_from_spectrum (spectrum)
     return xyz
 
+#
+# Planckian locus table, for fast lookups of blackbody colors.
+#
+
+# Temperatures are looked up in chunks of this many, to keep the temporary arrays small.
+_LOCUS_CHUNK_SIZE = 65536
+
+# Number of secant steps to the nearest point of the locus, for the correlated color temperature.
+_CCT_ITERATIONS = 3
+
+def _uv_from_ratios (X_Y, Z_Y, dX_Y, dZ_Y):
+    '''Get the CIE 1960 uv chromaticity, and its derivatives, from the ratios X/Y and Z/Y and their derivatives.'''
+    w_denom = X_Y + 15.0 + 3.0 * Z_Y
+    dw_denom = dX_Y + 3.0 * dZ_Y
+    u = 4.0 * X_Y / w_denom
+    v = 6.0 / w_denom
+    du = 4.0 * (dX_Y - X_Y * dw_denom / w_denom) / w_denom
+    dv = -v * dw_denom / w_denom
+    return (u, v, du, dv)
+
+class PlanckianLocus (object):
+    '''A table of blackbody colors, at temperatures evenly spaced in log T, for fast lookups.'''
+    __slots__ = ('T_min', 'T_max', 'log_T', 'values', 'slopes', '_step', '_node_uv')
+
+    def __init__ (self, T_min = LOCUS_T_MIN, T_max = LOCUS_T_MAX, size = DEFAULT_LOCUS_SIZE):
+        if size < 2 or not (0.0 < T_min < T_max):
+            raise ValueError ('Invalid Planckian locus table, %s temperatures from %s K to %s K' % (
+                str (size), str (T_min), str (T_max)))
+        self.T_min = float (T_min)
+        self.T_max = float (T_max)
+        self.log_T = numpy.linspace (math.log (self.T_min), math.log (self.T_max), size)
+        self._step = self.log_T [1] - self.log_T [0]
+        T_list = numpy.exp (self.log_T)
+        # the derivative of the specific intensity with respect to log (T) is intensity * x / (1 - exp (-x)),
+        # with x the exponent of the Planck function
+        wavelengths = ciexyz.empty_spectrum() [:,0]
+        spectra = blackbody_spectra (T_list)
+        exponents = (_PLANCK_A / (wavelengths * 1.0e-9)) / T_list [:, numpy.newaxis]
+        derivatives = spectra * exponents / -numpy.expm1 (-exponents)
+        (X, Y, Z) = ciexyz.xyz_from_spectra (wavelengths, spectra).T
+        (dX, dY, dZ) = ciexyz.xyz_from_spectra (wavelengths, derivatives).T
+        if not numpy.all (Y > 0.0):
+            raise ValueError ('Blackbody luminance underflows in the Planckian locus table from %s K to %s K' % (
+                str (T_min), str (T_max)))
+        self.values = numpy.column_stack ([X / Y, numpy.log (Y), Z / Y])
+        self.slopes = numpy.column_stack ([(dX - X / Y * dY) / Y, dY / Y, (dZ - Z / Y * dY) / Y])
+        self._limit_slopes()
+        self.values.flags.writeable = False
+        self.slopes.flags.writeable = False
+        # the uv chromaticity at each table temperature, and its derivatives with respect to log (T)
+        self._node_uv = _uv_from_ratios (self.values [:,0], self.values [:,2], self.slopes [:,0], self.slopes [:,2])
+
+    def _limit_slopes (self):
+        '''Limit the slopes, in each interval where the values and both of the slopes increase
+        (or decrease), so that the interpolation is monotone there.  [Fritsch and Carlson, p. 242]'''
+        secants = numpy.diff (self.values, axis=0) / self._step
+        with numpy.errstate (divide='ignore', invalid='ignore'):
+            alpha = self.slopes [:-1] / secants
+            beta = self.slopes [1:] / secants
+        radius = numpy.hypot (alpha, beta)
+        limited = (alpha >= 0.0) & (beta >= 0.0) & (radius > 3.0)
+        scale = numpy.ones_like (secants)
+        scale [limited] = 3.0 / radius [limited]
+        # a slope between two limited intervals takes the smaller of their scales
+        point_scale = numpy.ones_like (self.slopes)
+        point_scale [:-1] = scale
+        numpy.minimum (point_scale [1:], scale, out=point_scale [1:])
+        self.slopes *= point_scale
+
+    def color (self, T_K):
+        '''Get the xyz color of a blackbody, for a temperature or an array of temperatures.
+        Temperatures outside of the table range are calculated exactly with blackbody_color().'''
+        if numpy.ndim (T_K) == 0:
+            if not (self.T_min <= T_K <= self.T_max):
+                return blackbody_color (T_K)
+            return self._interpolate (numpy.array ([T_K], dtype=float)) [0]
+        T_K = numpy.asarray (T_K, dtype=float)
+        T_1d = T_K.reshape (-1)
+        xyz = numpy.empty ((len (T_1d), 3))
+        inside = (T_1d >= self.T_min) & (T_1d <= self.T_max)
+        if numpy.all (inside):
+            for start in range (0, len (T_1d), _LOCUS_CHUNK_SIZE):
+                stop = start + _LOCUS_CHUNK_SIZE
+                xyz [start:stop] = self._interpolate (T_1d [start:stop])
+        else:
+            xyz [inside] = self.color (T_1d [inside])
+            outside = ~inside
+            xyz [outside] = blackbody_color (T_1d [outside])
+        return xyz.reshape (T_K.shape + (3,))
+
+    def _interpolate (self, T_K):
+        '''Interpolate the table at a 1D array of temperatures, all within the table range.'''
+        position = numpy.log (T_K)
+        position -= self.log_T [0]
+        position /= self._step
+        index = position.astype (numpy.intp)
+        numpy.minimum (index, len (self.log_T) - 2, out=index)
+        t = position - index
+        # cubic Hermite basis functions, with the slopes scaled to the interval
+        t2 = t * t
+        t3 = t2 * t
+        h01 = 3.0 * t2 - 2.0 * t3
+        h00 = 1.0 - h01
+        h10 = (t3 - 2.0 * t2 + t) * self._step
+        h11 = (t3 - t2) * self._step
+        (v0, v1) = (self.values [index], self.values [index + 1])
+        (m0, m1) = (self.slopes [index], self.slopes [index + 1])
+        result = h00 [:, numpy.newaxis] * v0
+        result += h01 [:, numpy.newaxis] * v1
+        result += h10 [:, numpy.newaxis] * m0
+        result += h11 [:, numpy.newaxis] * m1
+        # back to X, Y, Z from X/Y, log (Y), Z/Y
+        Y = numpy.exp (result [:,1])
+        result [:,1] = 1.0
+        result *= Y [:, numpy.newaxis]
+        return result
+
+    def correlated_color_temperature (self, xyz):
+        '''Get the correlated color temperature (K) and Duv of an xyz color, or an array of colors of shape (..., 3).'''
+        xyz = numpy.asarray (xyz, dtype=float)
+        if xyz.shape [-1:] != (3,):
+            raise ValueError ('Expecting colors of shape (..., 3), got shape %s' % (str (xyz.shape)))
+        xyz_2d = xyz.reshape (-1, 3)
+        T_K = numpy.empty (len (xyz_2d))
+        Duv = numpy.empty (len (xyz_2d))
+        for start in range (0, len (xyz_2d), _LOCUS_CHUNK_SIZE):
+            stop = start + _LOCUS_CHUNK_SIZE
+            (T_K [start:stop], Duv [start:stop]) = self._nearest_temperature (xyz_2d [start:stop])
+        if xyz.ndim == 1:
+            return (float (T_K [0]), float (Duv [0]))
+        return (T_K.reshape (xyz.shape [:-1]), Duv.reshape (xyz.shape [:-1]))
+
+    def _nearest_temperature (self, xyz):
+        '''Find the temperatures, and the signed distances Duv, of the nearest points of the locus
+        to a 2D array of colors in the CIE 1960 uv diagram.'''
+        (u, v) = colormodels.uv_primes (xyz)
+        v *= (2.0 / 3.0)
+        (node_u, node_v, node_du, node_dv) = self._node_uv
+        def along (i):
+            '''Component of the offset of the colors from the table points, along the locus.'''
+            return (u - node_u [i]) * node_du [i] + (v - node_v [i]) * node_dv [i]
+        last = len (self.log_T) - 1
+        # the nearest point is between the first and last table points, for colors that are ahead
+        # of the first point along the locus, and behind the last.  black has no temperature.
+        valid = (along (0) >= 0.0) & (along (last) <= 0.0) & ((u != 0.0) | (v != 0.0))
+        # bisect for the interval where the colors go from ahead of the table points to behind them
+        lo = numpy.zeros (len (u), dtype=numpy.intp)
+        hi = numpy.full (len (u), last, dtype=numpy.intp)
+        for i in range (0, int (math.ceil (math.log (last, 2)))):
+            middle = (lo + hi) // 2
+            ahead = along (middle) >= 0.0
+            lo = numpy.where (ahead, middle, lo)
+            hi = numpy.where (ahead, hi, middle)
+        index = numpy.minimum (lo, last - 1)
+        # find where the offset along the locus is zero, by the secant method in the interval,
+        # starting from the offsets at its ends
+        (t_0, t_1) = (numpy.zeros (len (u)), numpy.ones (len (u)))
+        (along_0, along_1) = (along (index), along (index + 1))
+        for i in range (0, _CCT_ITERATIONS):
+            with numpy.errstate (divide='ignore', invalid='ignore'):
+                t = t_1 - along_1 * (t_1 - t_0) / (along_1 - along_0)
+            # colors on the locus at a table point, or already found, can give 0/0
+            t [~numpy.isfinite (t)] = t_1 [~numpy.isfinite (t)]
+            numpy.clip (t, 0.0, 1.0, out=t)
+            (locus_u, locus_v, du, dv) = self._interpolate_uv (index, t)
+            (t_0, along_0) = (t_1, along_1)
+            (t_1, along_1) = (t, ((u - locus_u) * du + (v - locus_v) * dv) / self._step)
+        T_K = numpy.exp (self.log_T [index] + t * self._step)
+        # positive Duv is above the locus, where v is larger
+        Duv = ((u - locus_u) * dv - (v - locus_v) * du) / numpy.hypot (du, dv)
+        T_K [~valid] = numpy.nan
+        Duv [~valid] = numpy.nan
+        return (T_K, Duv)
+
+    def _interpolate_uv (self, index, t):
+        '''Interpolate the uv chromaticity of the locus, and its derivatives with respect to t,
+        at the fractions t of the way across the table intervals that start at index.'''
+        t2 = t * t
+        t3 = t2 * t
+        h01 = 3.0 * t2 - 2.0 * t3
+        h00 = 1.0 - h01
+        h10 = (t3 - 2.0 * t2 + t) * self._step
+        h11 = (t3 - t2) * self._step
+        d01 = 6.0 * (t - t2)
+        d10 = (3.0 * t2 - 4.0 * t + 1.0) * self._step
+        d11 = (3.0 * t2 - 2.0 * t) * self._step
+        ratios = []
+        for column in (0, 2):
+            (v0, v1) = (self.values [index, column], self.values [index + 1, column])
+            (m0, m1) = (self.slopes [index, column], self.slopes [index + 1, column])
+            ratios.append (h00 * v0 + h01 * v1 + h10 * m0 + h11 * m1)
+            ratios.append (d01 * (v1 - v0) + d10 * m0 + d11 * m1)
+        (X_Y, dX_Y, Z_Y, dZ_Y) = ratios
+        return _uv_from_ratios (X_Y, Z_Y, dX_Y, dZ_Y)
+
+    def __repr__ (self):
+        return 'PlanckianLocus (%d temperatures from %g K to %g K)' % (len (self.log_T), self.T_min, self.T_max)
+
+_default_locus = None
+_locus_lock = threading.Lock()
+
+def get_planckian_locus ():
+    '''Get the default PlanckianLocus table, which is built on the first call.'''
+    global _default_locus
+    if _default_locus is None:
+        with _locus_lock:
+            if _default_locus is None:
+                _default_locus = PlanckianLocus()
+    return _default_locus
+
+def blackbody_color_lookup (T_K):
+    '''Get the xyz color of a blackbody, as blackbody_color(), but from the default PlanckianLocus table.
+    T_K may be a temperature, or an array of temperatures of any shape.'''
+    return get_planckian_locus().color (T_K)
+
+def correlated_color_temperature (xyz):
+    '''Get the correlated color temperature (K) and Duv of an xyz color, or an array of colors of shape (..., 3),
+    from the default PlanckianLocus table.  The result is a tuple (T_K, Duv), of floats or of arrays of shape (...).'''
+    return get_planckian_locus().correlated_color_temperature (xyz)
+
 #
 # Figures
 #
 
 def blackbody_patch_plot (T_list, title, filename):
     '''Draw a patch plot of blackbody colors for the given temperature range.'''
-    xyz_colors = []
-    color_names = []
-    for Ti in T_list:
-        xyz = blackbody_color (Ti)
-        xyz_colors.append (xyz)
-        name = '%g K' % (Ti)
-        color_names.append (name)
+    xyz_colors = blackbody_color (numpy.asarray (T_list, dtype=float))
+    color_names = ['%g K' % (Ti) for Ti in T_list]
     plots.xyz_patch_plot (xyz_colors, color_names, title, filename)
 
 def blackbody_color_vs_temperature_plot (T_list, title, filename):
     '''Draw a color vs temperature plot for the given temperature range.'''
-    num_T = len (T_list)
-    rgb_list = numpy.empty ((num_T, 3))
-    for i in range (0, num_T):
-        T_i = T_list [i]
-        xyz = blackbody_color (T_i)
-        rgb_list [i] = colormodels.rgb_from_xyz (xyz)
+    rgb_list = colormodels.rgb_from_xyz (blackbody_color (numpy.asarray (T_list, dtype=float)))
     # Note that b and g become negative for low T.
     # MatPlotLib skips those on the semilog plot.
     plots.color_vs_param_plot (
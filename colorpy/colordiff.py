@@ -0,0 +1,456 @@
+'''
+colordiff.py - Color differences (Delta E) between Lab colors.
+
+Description:
+
+The CIE color difference formulas, which measure how different two colors look,
+from their Lab coordinates (see colormodels.lab_from_xyz()).
+
+Delta E 1976 - The distance between the colors in Lab space.  Simple, but Lab is not
+    quite perceptually uniform, so the same difference looks larger for neutral colors
+    than for saturated ones.
+
+Delta E 1994 - Weights the lightness, chroma and hue differences, to correct for
+    saturated colors.  It is not symmetric, the first color is the reference.
+
+Delta E 2000 - Further corrections for blue colors, and for neutral colors and lightness.
+    This is the current CIE recommendation.
+
+All of the functions take Lab colors as arrays of shape (..., 3), and the two arrays are
+broadcast against each other, so that a single color can be compared with many, an (N, 3)
+array with another (N, 3) array (pairwise), or an (N, M, 3) array with another, and so on.
+The result is an array of the differences, with the broadcast shape without the last axis.
+The colors are compared in chunks of at most max_pairs pairs, so that apart from the result,
+the temporary arrays stay small, however many colors there are.
+
+Constants:
+
+DEFAULT_MAX_PAIRS = 65536
+    The default number of pairs of colors compared at once.
+
+CIE94_GRAPHIC_ARTS = (1.0, 0.045, 0.015)
+CIE94_TEXTILES     = (2.0, 0.048, 0.014)
+    The Delta E 1994 weights (kL, K1, K2) for graphic arts and for textiles.
+
+DELTA_E_76   = 0
+DELTA_E_2000 = 1
+    The color difference metrics of ColorIndex.query().
+
+DEFAULT_CANDIDATES = 8
+    The default number of nearest colors by Delta E 1976, that are re-ranked by Delta E 2000.
+
+Functions:
+
+delta_e_76 (lab1, lab2, max_pairs = DEFAULT_MAX_PAIRS) -
+    Get the CIE 1976 color difference, the Lab distance between the colors.
+
+delta_e_94 (lab1, lab2, textiles = False, max_pairs = DEFAULT_MAX_PAIRS) -
+    Get the CIE 1994 color difference, with lab1 as the reference colors.
+    The weights are those for graphic arts, or for textiles if textiles is True.
+
+delta_e_2000 (lab1, lab2, kL = 1.0, kC = 1.0, kH = 1.0, max_pairs = DEFAULT_MAX_PAIRS) -
+    Get the CIEDE2000 color difference.  kL, kC and kH are the parametric weights,
+    for the viewing conditions, which are all 1.0 for the reference conditions.
+
+delta_e_matrix (labs1, labs2 = None, delta_e = delta_e_2000, max_pairs = DEFAULT_MAX_PAIRS) -
+    Get the color differences between all pairs of colors, one from each of labs1, of shape (N, 3),
+    and labs2, of shape (M, 3), as an array of shape (N, M).  If labs2 is None, it is labs1.
+    delta_e is the color difference function to use, which is called on chunks of rows of the result.
+
+Nearest colors:
+
+Matching many colors to the nearest colors of a palette (such as the colors of misc.py),
+by comparing each color with every palette color, is slow for large palettes.  A ColorIndex
+puts the palette colors on a uniform grid in Lab space, and only compares each color with
+the palette colors in the nearby grid cells.  The result is the same as the full comparison.
+
+class ColorIndex (labs, names = None) -
+    An index of a palette of Lab colors, of shape (P, 3), with optional names for them.
+    The attributes are the (read-only) arrays labs and names.  Any (nearly) perceptually
+    uniform space may be used instead of Lab, such as Luv, but only with Delta E 1976.
+
+On these class objects, the following functions are available:
+
+ColorIndex.from_irgb_strings (colorstrings, names = None) -
+    Create a ColorIndex of a palette of displayable color hex strings (like '#AB13D2').
+
+query (labs, k = 1, metric = DELTA_E_76, candidates = DEFAULT_CANDIDATES, max_pairs = DEFAULT_MAX_PAIRS) -
+    Find the k nearest palette colors to each of the Lab colors, of shape (..., 3).
+    Returns a tuple (indices, distances), of the palette indices and the color differences,
+    each of shape (..., k), with the nearest first.  For DELTA_E_2000, the nearest
+    max (k, candidates) colors by Delta E 1976 are found, and re-ranked by Delta E 2000.
+
+nearest_names (labs, metric = DELTA_E_2000, candidates = DEFAULT_CANDIDATES, max_pairs = DEFAULT_MAX_PAIRS) -
+    Get the names of the nearest palette colors to the Lab colors, as an array of shape (...).
+
+References:
+
+CIE Publication 116-1995, Industrial Colour-Difference Evaluation, 1995.
+
+Gaurav Sharma, Wencheng Wu, Edul N. Dalal, The CIEDE2000 Color-Difference Formula:
+    Implementation Notes, Supplementary Test Data, and Mathematical Observations,
+    Color Research and Application, Vol. 30, No. 1, February 2005.
+
+License:
+
+Copyright (C) 2008 Mark Kness
+
+Author - Mark Kness - mkness@alumni.utexas.net
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+import numpy
+
+import colormodels
+
+DEFAULT_MAX_PAIRS = 65536
+
+def _compare_in_chunks (function, lab1, lab2, max_pairs, args):
+    '''Apply the color difference function, of two broadcast arrays of Lab colors,
+    to at most max_pairs pairs of colors at a time.'''
+    lab1 = numpy.asarray (lab1, dtype=float)
+    lab2 = numpy.asarray (lab2, dtype=float)
+    if lab1.shape [-1:] != (3,) or lab2.shape [-1:] != (3,):
+        raise ValueError ('Expecting Lab colors of shape (..., 3), got shapes %s and %s' % (
+            str (lab1.shape), str (lab2.shape)))
+    shape = numpy.broadcast_shapes (lab1.shape, lab2.shape) [:-1]
+    num_pairs = int (numpy.prod (shape))
+    if shape == ():
+        # a single pair, as a pair of one color each, so the functions can index their arrays
+        return function (lab1.reshape (1, 3), lab2.reshape (1, 3), *args) [0]
+    if num_pairs <= max_pairs:
+        return function (lab1, lab2, *args)
+    # the broadcast arrays are views, and only the colors of each chunk are copied out of them
+    lab1 = numpy.broadcast_to (lab1, shape + (3,))
+    lab2 = numpy.broadcast_to (lab2, shape + (3,))
+    result = numpy.empty (num_pairs)
+    for start in range (0, num_pairs, max_pairs):
+        stop = min (start + max_pairs, num_pairs)
+        index = numpy.unravel_index (numpy.arange (start, stop), shape)
+        result [start:stop] = function (lab1 [index], lab2 [index], *args)
+    return result.reshape (shape)
+
+def _chroma (lab):
+    '''Get the chroma of the Lab colors.'''
+    return numpy.hypot (lab [..., 1], lab [..., 2])
+
+# CIE 1976
+
+def delta_e_76 (lab1, lab2, max_pairs = DEFAULT_MAX_PAIRS):
+    '''Get the CIE 1976 color difference, the Lab distance between the colors.'''
+    return _compare_in_chunks (_delta_e_76, lab1, lab2, max_pairs, ())
+
+def _delta_e_76 (lab1, lab2):
+    difference = lab1 - lab2
+    difference *= difference
+    return numpy.sqrt (numpy.sum (difference, axis=-1))
+
+# CIE 1994 - weights (kL, K1, K2) for graphic arts and textiles
+
+CIE94_GRAPHIC_ARTS = (1.0, 0.045, 0.015)
+CIE94_TEXTILES     = (2.0, 0.048, 0.014)
+
+def delta_e_94 (lab1, lab2, textiles = False, max_pairs = DEFAULT_MAX_PAIRS):
+    '''Get the CIE 1994 color difference, with lab1 as the reference colors.
+    The weights are those for graphic arts, or for textiles if textiles is True.'''
+    weights = CIE94_TEXTILES if textiles else CIE94_GRAPHIC_ARTS
+    return _compare_in_chunks (_delta_e_94, lab1, lab2, max_pairs, weights)
+
+def _delta_e_94 (lab1, lab2, kL, K1, K2):
+    C1 = _chroma (lab1)
+    C2 = _chroma (lab2)
+    dL = lab1 [..., 0] - lab2 [..., 0]
+    dC = C1 - C2
+    da = lab1 [..., 1] - lab2 [..., 1]
+    db = lab1 [..., 2] - lab2 [..., 2]
+    # the hue difference squared, which can be slightly negative from rounding
+    dH2 = numpy.maximum (da * da + db * db - dC * dC, 0.0)
+    SC = 1.0 + K1 * C1
+    SH = 1.0 + K2 * C1
+    dL /= kL
+    dC /= SC
+    return numpy.sqrt (dL * dL + dC * dC + dH2 / (SH * SH))
+
+# CIEDE2000 - see [Sharma, Wu and Dalal], whose equation numbers are given below.
+
+def delta_e_2000 (lab1, lab2, kL = 1.0, kC = 1.0, kH = 1.0, max_pairs = DEFAULT_MAX_PAIRS):
+    '''Get the CIEDE2000 color difference.
+    kL, kC and kH are the parametric weights, which are all 1.0 for the reference conditions.'''
+    return _compare_in_chunks (_delta_e_2000, lab1, lab2, max_pairs, (kL, kC, kH))
+
+_POW25_7 = 25.0 ** 7
+
+def _delta_e_2000 (lab1, lab2, kL, kC, kH):
+    (L1, a1, b1) = (lab1 [..., 0], lab1 [..., 1], lab1 [..., 2])
+    (L2, a2, b2) = (lab2 [..., 0], lab2 [..., 1], lab2 [..., 2])
+    # eqs. 2 - 7, adjusted a, chroma and hue (degrees, 0 - 360)
+    C_mean = 0.5 * (numpy.hypot (a1, b1) + numpy.hypot (a2, b2))
+    C_mean7 = C_mean ** 7
+    G = 0.5 * (1.0 - numpy.sqrt (C_mean7 / (C_mean7 + _POW25_7)))
+    a1_prime = (1.0 + G) * a1
+    a2_prime = (1.0 + G) * a2
+    C1_prime = numpy.hypot (a1_prime, b1)
+    C2_prime = numpy.hypot (a2_prime, b2)
+    # atan2 (0, 0) is 0, as the hue of neutral colors should be
+    h1_prime = numpy.degrees (numpy.arctan2 (b1, a1_prime)) % 360.0
+    h2_prime = numpy.degrees (numpy.arctan2 (b2, a2_prime)) % 360.0
+    # eqs. 8 - 11, differences in lightness, chroma and hue
+    dL_prime = L2 - L1
+    dC_prime = C2_prime - C1_prime
+    C_product = C1_prime * C2_prime
+    neutral = (C_product == 0.0)
+    dh_prime = h2_prime - h1_prime
+    dh_prime [dh_prime > 180.0] -= 360.0
+    dh_prime [dh_prime < -180.0] += 360.0
+    dh_prime [neutral] = 0.0
+    dH_prime = 2.0 * numpy.sqrt (C_product) * numpy.sin (numpy.radians (0.5 * dh_prime))
+    # eqs. 12 - 14, means of lightness, chroma and hue
+    L_mean = 0.5 * (L1 + L2)
+    C_mean_prime = 0.5 * (C1_prime + C2_prime)
+    h_sum = h1_prime + h2_prime
+    h_mean = 0.5 * h_sum
+    # the mean hue is around the short way between the hues
+    far = (numpy.abs (h1_prime - h2_prime) > 180.0) & ~neutral
+    h_mean [far & (h_sum < 360.0)] += 180.0
+    h_mean [far & (h_sum >= 360.0)] -= 180.0
+    h_mean [neutral] = h_sum [neutral]
+    # eqs. 15 - 22, weighting functions
+    h_mean_rad = numpy.radians (h_mean)
+    T = (1.0
+        - 0.17 * numpy.cos (h_mean_rad - numpy.radians (30.0))
+        + 0.24 * numpy.cos (2.0 * h_mean_rad)
+        + 0.32 * numpy.cos (3.0 * h_mean_rad + numpy.radians (6.0))
+        - 0.20 * numpy.cos (4.0 * h_mean_rad - numpy.radians (63.0)))
+    d_theta = 30.0 * numpy.exp (-numpy.square ((h_mean - 275.0) / 25.0))
+    C_mean_prime7 = C_mean_prime ** 7
+    R_C = 2.0 * numpy.sqrt (C_mean_prime7 / (C_mean_prime7 + _POW25_7))
+    L_50 = numpy.square (L_mean - 50.0)
+    S_L = 1.0 + (0.015 * L_50) / numpy.sqrt (20.0 + L_50)
+    S_C = 1.0 + 0.045 * C_mean_prime
+    S_H = 1.0 + 0.015 * C_mean_prime * T
+    R_T = -numpy.sin (numpy.radians (2.0 * d_theta)) * R_C
+    # eq. 23
+    L_term = dL_prime / (kL * S_L)
+    C_term = dC_prime / (kC * S_C)
+    H_term = dH_prime / (kH * S_H)
+    return numpy.sqrt (L_term * L_term + C_term * C_term + H_term * H_term + R_T * C_term * H_term)
+
+# All pairs
+
+def delta_e_matrix (labs1, labs2 = None, delta_e = delta_e_2000, max_pairs = DEFAULT_MAX_PAIRS):
+    '''Get the color differences between all pairs of colors, one from each of labs1 (N, 3) and labs2 (M, 3),
+    as an array of shape (N, M).  If labs2 is None, it is labs1.  delta_e is the color difference
+    function, which is called for chunks of rows of the result, of at most max_pairs pairs.'''
+    labs1 = numpy.asarray (labs1, dtype=float)
+    labs2 = labs1 if labs2 is None else numpy.asarray (labs2, dtype=float)
+    if labs1.ndim != 2 or labs2.ndim != 2 or labs1.shape [1] != 3 or labs2.shape [1] != 3:
+        raise ValueError ('Expecting Lab colors of shape (N, 3) and (M, 3), got shapes %s and %s' % (
+            str (labs1.shape), str (labs2.shape)))
+    result = numpy.empty ((len (labs1), len (labs2)))
+    rows = max (1, max_pairs // max (1, len (labs2)))
+    for start in range (0, len (labs1), rows):
+        stop = start + rows
+        result [start:stop] = delta_e (labs1 [start:stop, numpy.newaxis, :], labs2 [numpy.newaxis, :, :], max_pairs=max_pairs)
+    return result
+
+# Nearest colors - an index of a palette of colors, on a uniform grid of cubic cells in Lab space.
+# Palette colors in cells more than r cells away (along any axis) from the cell of a color,
+# are at least r cell sizes away from it.  So once the k nearest colors within r cells are
+# no further than r cell sizes, they are the k nearest of the whole palette.
+
+DELTA_E_76   = 0
+DELTA_E_2000 = 1
+
+DEFAULT_CANDIDATES = 8
+
+# the average number of palette colors in each grid cell
+_COLORS_PER_CELL = 2.0
+
+class ColorIndex (object):
+    '''An index of a palette of Lab colors, to find the nearest palette colors to other colors.'''
+    __slots__ = ('labs', 'names', '_origin', '_cell_size', '_dims', '_order', '_cell_starts')
+
+    def __init__ (self, labs, names = None):
+        labs = numpy.array (labs, dtype=float)
+        if labs.ndim != 2 or labs.shape [1] != 3 or len (labs) == 0:
+            raise ValueError ('Expecting a palette of Lab colors of shape (P, 3), got shape %s' % (str (labs.shape)))
+        if names is not None:
+            names = numpy.array (names)
+            if names.shape != (len (labs),):
+                raise ValueError ('Expecting %d names, got shape %s' % (len (labs), str (names.shape)))
+            names.flags.writeable = False
+        labs.flags.writeable = False
+        self.labs = labs
+        self.names = names
+        self._origin = labs.min (axis=0)
+        extent = labs.max (axis=0) - self._origin
+        # the smallest cell size that gives no more than the wanted number of cells
+        num_cells = max (1.0, len (labs) / _COLORS_PER_CELL)
+        count_cells = lambda cell_size: numpy.prod (numpy.floor (extent / cell_size) + 1.0)
+        (too_small, large_enough) = (0.0, max (1.0, extent.max()))
+        for i in range (0, 50):
+            cell_size = 0.5 * (too_small + large_enough)
+            if count_cells (cell_size) > num_cells:
+                too_small = cell_size
+            else:
+                large_enough = cell_size
+        self._cell_size = large_enough
+        self._dims = (numpy.floor (extent / self._cell_size) + 1.0).astype (int)
+        # the palette colors, sorted by cell, and where each cell starts in that order
+        cell_ids = self._cell_ids (self._cells (labs))
+        self._order = numpy.argsort (cell_ids, kind='stable')
+        counts = numpy.bincount (cell_ids, minlength=int (numpy.prod (self._dims)))
+        self._cell_starts = numpy.concatenate (([0], numpy.cumsum (counts)))
+
+    @classmethod
+    def from_irgb_strings (cls, colorstrings, names = None):
+        '''Create a ColorIndex of a palette of displayable color hex strings (like '#AB13D2').'''
+        (irgbs, invalid) = colormodels.irgbs_from_irgb_strings (colorstrings)
+        if len (invalid) > 0:
+            raise ValueError ('Invalid color hex string %s' % (repr (numpy.ravel (colorstrings) [invalid [0]])))
+        rgbs = colormodels.rgb_from_irgb (irgbs)
+        return cls (colormodels.lab_from_xyz (colormodels.xyz_from_rgb (rgbs)), names)
+
+    def __len__ (self):
+        return len (self.labs)
+
+    def __repr__ (self):
+        return 'ColorIndex (%d colors, %d x %d x %d cells)' % ((len (self.labs),) + tuple (self._dims))
+
+    def query (self, labs, k = 1, metric = DELTA_E_76, candidates = DEFAULT_CANDIDATES, max_pairs = DEFAULT_MAX_PAIRS):
+        '''Find the k nearest palette colors to each of the Lab colors, of shape (..., 3).
+        Returns a tuple (indices, distances), of the palette indices and the color differences,
+        each of shape (..., k), with the nearest first.'''
+        labs = numpy.asarray (labs, dtype=float)
+        if labs.shape [-1:] != (3,):
+            raise ValueError ('Expecting Lab colors of shape (..., 3), got shape %s' % (str (labs.shape)))
+        if k < 1 or k > len (self.labs):
+            raise ValueError ('Expecting 1 <= k <= %d, got %d' % (len (self.labs), k))
+        if metric not in (DELTA_E_76, DELTA_E_2000):
+            raise ValueError ('Invalid color difference metric %s' % (str (metric)))
+        shape = labs.shape [:-1]
+        labs = labs.reshape (-1, 3)
+        if metric == DELTA_E_76:
+            (indices, distances) = self._nearest (labs, k, max_pairs)
+        else:
+            # re-rank the nearest colors by Delta E 1976 with the exact Delta E 2000
+            num_candidates = min (max (k, candidates), len (self.labs))
+            (indices, distances) = self._nearest (labs, num_candidates, max_pairs)
+            distances = delta_e_2000 (labs [:, numpy.newaxis, :], self.labs [indices], max_pairs=max_pairs)
+            ranks = numpy.argsort (distances, axis=1, kind='stable') [:, :k]
+            indices = numpy.take_along_axis (indices, ranks, axis=1)
+            distances = numpy.take_along_axis (distances, ranks, axis=1)
+        return (indices.reshape (shape + (k,)), distances.reshape (shape + (k,)))
+
+    def nearest_names (self, labs, metric = DELTA_E_2000, candidates = DEFAULT_CANDIDATES, max_pairs = DEFAULT_MAX_PAIRS):
+        '''Get the names of the nearest palette colors to the Lab colors, as an array of shape (...).'''
+        if self.names is None:
+            raise ValueError ('The palette colors do not have names')
+        (indices, distances) = self.query (labs, 1, metric, candidates, max_pairs)
+        return self.names [indices [..., 0]]
+
+    def _cells (self, labs):
+        '''Get the grid cell (ix, iy, iz) of each Lab color, clamped to the grid.'''
+        cells = numpy.floor ((labs - self._origin) / self._cell_size)
+        return numpy.clip (cells, 0, self._dims - 1).astype (int)
+
+    def _cell_ids (self, cells):
+        return (cells [..., 0] * self._dims [1] + cells [..., 1]) * self._dims [2] + cells [..., 2]
+
+    def _block (self, cell, r):
+        '''Get the indices of the palette colors in the cells within r cells of the cell.'''
+        low = numpy.maximum (cell - r, 0)
+        high = numpy.minimum (cell + r, self._dims - 1)
+        # along z, the cells of the block are contiguous
+        (ix, iy) = numpy.meshgrid (numpy.arange (low [0], high [0] + 1), numpy.arange (low [1], high [1] + 1), indexing='ij')
+        columns = (ix.ravel() * self._dims [1] + iy.ravel()) * self._dims [2]
+        starts = self._cell_starts [columns + low [2]]
+        lengths = self._cell_starts [columns + high [2] + 1] - starts
+        offsets = numpy.cumsum (lengths) - lengths
+        positions = numpy.arange (lengths.sum()) + numpy.repeat (starts - offsets, lengths)
+        return self._order [positions]
+
+    def _nearest (self, labs, k, max_pairs):
+        '''Get the k nearest palette colors, by Delta E 1976, to each of the (N, 3) Lab colors.'''
+        if len (labs) == 0:
+            return (numpy.empty ((0, k), dtype=int), numpy.empty ((0, k)))
+        cells = self._cells (labs)
+        cell_ids = self._cell_ids (cells)
+        query_order = numpy.argsort (cell_ids, kind='stable')
+        # work on the colors sorted by cell, so that the colors of each cell are contiguous
+        labs = labs [query_order]
+        cell_ids = cell_ids [query_order]
+        indices = numpy.empty ((len (labs), k), dtype=int)
+        distances = numpy.empty ((len (labs), k))
+        bounds = numpy.flatnonzero (numpy.diff (cell_ids)) + 1
+        for (start, stop) in zip (numpy.concatenate (([0], bounds)), numpy.concatenate ((bounds, [len (labs)]))):
+            # all of the colors in one cell share the same candidates
+            cell = cells [query_order [start]]
+            r = 1
+            members = self._block (cell, r)
+            while len (members) < k:
+                r += 1
+                members = self._block (cell, r)
+            reach = self._reach (cell, r)
+            rows = max (1, max_pairs // len (members))
+            for first in range (start, stop, rows):
+                last = min (first + rows, stop)
+                (chunk_indices, chunk_distances) = self._k_nearest (labs [first:last], members, k)
+                # colors whose k-th nearest could be beyond the block, need to look further
+                further = numpy.flatnonzero (chunk_distances [:, -1] > reach (labs [first:last]))
+                if len (further) > 0:
+                    needed = int (numpy.ceil (chunk_distances [further, -1].max() / self._cell_size))
+                    (chunk_indices [further], chunk_distances [further]) = self._k_nearest (
+                        labs [first + further], self._block (cell, max (needed, r + 1)), k)
+                indices [first:last] = chunk_indices
+                distances [first:last] = chunk_distances
+        # back to the original order
+        result_indices = numpy.empty_like (indices)
+        result_distances = numpy.empty_like (distances)
+        result_indices [query_order] = indices
+        result_distances [query_order] = distances
+        return (result_indices, result_distances)
+
+    def _reach (self, cell, r):
+        '''Get a function of Lab colors in the cell, of how far they are from the palette colors
+        outside of the cells within r cells of the cell.'''
+        low = (cell - r) * self._cell_size + self._origin
+        high = (cell + r + 1) * self._cell_size + self._origin
+        # there are no palette colors beyond the edges of the grid
+        low [cell - r <= 0] = -numpy.inf
+        high [cell + r >= self._dims - 1] = numpy.inf
+        return lambda labs: numpy.minimum (labs - low, high - labs).min (axis=1)
+
+    def _k_nearest (self, labs, members, k):
+        '''Get the k nearest of the palette colors members, to each of the Lab colors, by brute force.'''
+        palette = self.labs [members]
+        squared = numpy.zeros ((len (labs), len (members)))
+        for i in range (0, 3):
+            difference = numpy.subtract.outer (labs [:, i], palette [:, i])
+            difference *= difference
+            squared += difference
+        if k == 1:
+            nearest = numpy.argmin (squared, axis=1) [:, numpy.newaxis]
+            return (members [nearest], numpy.sqrt (numpy.take_along_axis (squared, nearest, axis=1)))
+        if k < len (members):
+            nearest = numpy.argpartition (squared, k - 1, axis=1) [:, :k]
+            squared = numpy.take_along_axis (squared, nearest, axis=1)
+        else:
+            nearest = numpy.broadcast_to (numpy.arange (len (members)), squared.shape)
+        ranks = numpy.argsort (squared, axis=1, kind='stable')
+        nearest = numpy.take_along_axis (nearest, ranks, axis=1)
+        squared = numpy.take_along_axis (squared, ranks, axis=1)
+        return (members [nearest], numpy.sqrt (squared))
@@ -49,9 +49,17 @@ PhosphorWhite -
     Chromaticity values for display used in initialization.
     These are the sRGB values by default, but other values can be chosen.
 
-CLIP_CLAMP_TO_ZERO = 0
-CLIP_ADD_WHITE     = 1
+CLIP_CLAMP_TO_ZERO   = 0
+CLIP_ADD_WHITE       = 1
+CLIP_COMPRESS_CHROMA = 2
     Available color clipping methods.  Add white is the default.
+    Compress chroma maps colors outside of the display gamut to the gamut boundary, by reducing
+    their Lab chroma at constant lightness and hue, and so keeps them the closest in appearance.
+
+ADAPT_BRADFORD  = 0
+ADAPT_VON_KRIES = 1
+ADAPT_CAT02     = 2
+    Available chromatic adaptation methods.  Bradford is the default.
 
 Functions:
 
@@ -86,23 +94,52 @@ lab_color (L, a, b) -
 
 Conversion functions:
 
-rgb_from_xyz (xyz) -
+rgb_from_xyz (xyz, out=None) -
     Convert an xyz color to rgb.
 
-xyz_from_rgb (rgb) -
+xyz_from_rgb (rgb, out=None) -
     Convert an rgb color to xyz.
 
+brightest_rgb_from_xyz (xyz, max_component=1.0, out=None) -
+    Convert an xyz color to rgb, and scale to maximum displayable brightness,
+    so one of the components will be 1.0 (or max_component).
+
+    These three also accept arrays of colors, of shape (..., 3), converting each color.
+    If out is given, the result is put into that array, which avoids allocating a new one.
+
+Chromatic adaptation:
+
+chromatic_adaptation_matrix (source_white, destination_white, method = ADAPT_BRADFORD) -
+    Get the 3x3 matrix that adapts xyz colors seen under source_white, to the corresponding
+    colors under destination_white.  The whites may be any of the white points below, or any
+    other xyz colors, and only their chromaticities matter.  The matrix for each pair of whites
+    is computed once, and cached, so repeated adaptations cost just one matrix multiply.
+
+adapt_xyz (xyz, source_white, destination_white, method = ADAPT_BRADFORD, out = None) -
+    Adapt the xyz color, seen under source_white, to the corresponding color under destination_white.
+    This also accepts arrays of colors, of shape (..., 3), and out, as rgb_from_xyz() does.
+
 irgb_string_from_irgb (irgb) -
     Convert a displayable irgb color (0-255) into a hex string.
 
 irgb_from_irgb_string (irgb_string) -
     Convert a color hex string (like '#AB13D2') into a displayable irgb color.
 
+irgb_strings_from_irgbs (irgbs) -
+    Convert an array of displayable irgb colors, of shape (..., 3), into a numpy array of hex strings.
+
+irgbs_from_irgb_strings (irgb_strings) -
+    Convert a sequence of color hex strings into an array of displayable irgb colors, of shape (N, 3).
+    The return value is a tuple (irgbs, invalid), where invalid is an array of the indices of
+    any strings that are not valid, rather than raising an exception on the first one.
+
 irgb_from_rgb (rgb) -
     Convert a (linear) rgb value (range 0.0 - 1.0) into a 0-255 displayable integer irgb value (range 0 - 255).
+    An array of colors, of shape (..., 3), is converted to an array of 8-bit colors with clip_rgb_colors().
 
 rgb_from_irgb (irgb) -
     Convert a displayable (gamma corrected) irgb value (range 0 - 255) into a linear rgb value (range 0.0 - 1.0).
+    An array of integer colors, of shape (..., 3), is converted with gamma_decode().
 
 irgb_string_from_rgb (rgb) -
     Clip the rgb color, convert to a displayable color, and convert to a hex string.
@@ -113,6 +150,15 @@ irgb_from_xyz (xyz) -
 irgb_string_from_xyz (xyz) -
     Convert an xyz color directly into a displayable irgb color hex string.
 
+class DisplayTransform (chunk_size = DEFAULT_TRANSFORM_CHUNK_SIZE, color_space = None) -
+    A fused conversion of arrays of xyz colors, of shape (..., 3), directly into 8-bit irgb colors,
+    with the same results as irgb_from_xyz().  Calling the transform, as transform (xyz, out=None),
+    converts the colors in chunks of chunk_size colors, reusing its scratch arrays for each chunk,
+    so that nothing is allocated but the result (or nothing at all, if out is given),
+    apart from the gamut mapping of CLIP_COMPRESS_CHROMA, for the colors outside of the gamut.
+    It uses the conversion matrix, clipping method and gamma correction of the color space,
+    by default the default color space when it is created.
+
 luv_from_xyz (xyz) -
     Convert CIE XYZ to Luv.
 
@@ -125,6 +171,9 @@ lab_from_xyz (xyz) -
 xyz_from_lab (Lab) -
     Convert color from Lab to CIE XYZ.  Inverse of lab_from_xyz().
 
+    These four also accept arrays of colors, of shape (..., 3), converting each color.
+    The utility functions L_luminance(), Lab_f(), uv_primes() and their inverses accept arrays as well.
+
 Gamma correction:
 
 simple_gamma_invert (x) -
@@ -143,6 +192,19 @@ srgb_gamma_correct (x) -
     sRGB standard for gamma correction.
     This is used by default.
 
+    These four functions also accept arrays of values.
+
+gamma_encode (linear, bits = 8) -
+    Convert an array of linear values into displayable integer codes (0 - 255, or 0 - 65535 for 16 bits),
+    gamma corrected with display_from_linear_component(), by table lookup.
+
+gamma_decode (codes, bits = 8) -
+    Convert an array of displayable integer codes into linear values, with
+    linear_from_display_component(), by table lookup.
+
+    The tables are built by init_gamma_correction() for the current gamma functions
+    (16-bit tables on first use), and give the same results as the gamma functions.
+
 Color clipping:
 
 clip_rgb_color (rgb_color) -
@@ -152,6 +214,49 @@ clip_rgb_color (rgb_color) -
     The return value is a tuple, the first element is the clipped irgb color,
     and the second element is a tuple indicating which (if any) clipping processes were used.
 
+clip_rgb_colors (rgb_colors) -
+    Clip an array of linear rgb colors, of shape (..., 3), as clip_rgb_color() does,
+    and convert to an array of 8-bit displayable irgb colors.
+
+    The return value is a tuple (irgbs, (clipped_chromaticity, clipped_intensity), (num_chromaticity, num_intensity)),
+    with boolean arrays indicating which colors were clipped by each process, and the number of each.
+
+clipped_rgb_from_rgb (rgb_colors) -
+    Clip an array of linear rgb colors, of shape (..., 3), as clip_rgb_colors() does,
+    but return the clipped linear rgb colors, without gamma correction.
+
+Color spaces:
+
+class ColorSpace (
+    phosphor_red   = SRGB_Red,
+    phosphor_green = SRGB_Green,
+    phosphor_blue  = SRGB_Blue,
+    white_point    = SRGB_White,
+    luv_lab_white_point = None,
+    display_from_linear_function = srgb_gamma_invert,
+    linear_from_display_function = srgb_gamma_correct,
+    gamma = STANDARD_GAMMA,
+    clip_method = CLIP_ADD_WHITE) -
+
+    An immutable set of all the settings that the conversions depend on, as set by the
+    initialization functions below.  The Luv/Lab white point is the white point, if None.
+    The settings are attributes of the same names, along with rgb_from_xyz_matrix, xyz_from_rgb_matrix,
+    and the normalized Luv/Lab reference_white.  The conversion functions of this module, from
+    rgb_from_xyz() to irgb_string_from_xyz(), are also methods of a color space, which use its settings.
+    These module functions use the default color space, and the initialization functions replace
+    the default with a changed copy.  So several color spaces can be used at once, from any thread,
+    without changing the module settings back and forth.
+
+replace (**changes) -
+    Get a new color space, with some of the settings (the arguments of ColorSpace()) changed.
+
+get_color_space () -
+    Get the default color space, which the conversion functions of this module use.
+
+set_color_space (color_space) -
+    Make color_space the default color space.  The module values PhosphorRed, rgb_from_xyz_matrix,
+    display_from_linear_component, gamma_exponent, etc. are set from it as well.
+
 Initialization functions:
 
 init (
@@ -163,6 +268,7 @@ init (
     Setup the conversions between CIE XYZ and linear RGB spaces.
     Also do other initializations (gamma, conversions with Luv and Lab spaces, clipping model).
     The default arguments correspond to the sRGB standard RGB space.
+    This runs with the default arguments on first use, if it has not been called before.
     The conversion is defined by supplying the chromaticities of each of
     the monitor phosphors, as well as the resulting white color when all
     of the phosphors are at full strength.
@@ -211,6 +317,8 @@ Wyszecki and Stiles, Color Science: Concepts and Methods, Quantitative Data and
 
 Judd and Wyszecki, Color in Business, Science and Industry, 1975.
 
+Mark D. Fairchild, Color Appearance Models, 2nd edition, John Wiley, 2005. ISBN 0-470-01216-1.
+
 Kasson and Plouffe, An Analysis of Selected Computer Interchange Color Spaces,
     ACM Transactions on Graphics, Vol. 11, No. 4, October 1992.
 
@@ -245,7 +353,8 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
-import math, numpy
+import math, threading
+import numpy
 
 # The xyz constructors have some special versions to handle some common situations
 
@@ -408,14 +517,40 @@ smpte_rgb_from_xyz_matrix = numpy.array ([
 #     Assumptions must be made about the specific device to construct the conversions.
 #
 
-# public - xyz colors of the monitor phosphors (and full white)
-PhosphorRed   = None
-PhosphorGreen = None
-PhosphorBlue  = None
-PhosphorWhite = None
-
-rgb_from_xyz_matrix = None
-xyz_from_rgb_matrix = None
+# The conversions between color models depend on the display (the phosphors and white point),
+# the Luv/Lab white point, the gamma correction and the color clipping method.  All of these are
+# held by an immutable ColorSpace object (see below), and the conversion functions of this module
+# use the default color space.  The default is sRGB, created by init() on first use, and is replaced
+# (never modified) by init(), the other init functions, and set_color_space().
+#
+# public - the settings of the default color space are also available as module values,
+#   the xyz colors of the monitor phosphors (and full white),
+#   PhosphorRed, PhosphorGreen, PhosphorBlue, PhosphorWhite,
+#   the conversion matrices rgb_from_xyz_matrix, xyz_from_rgb_matrix,
+#   and the gamma correction display_from_linear_component, linear_from_display_component, gamma_exponent.
+# Reading any of them from outside the module will run init() first if needed.
+_LAZY_GLOBALS = (
+    'PhosphorRed', 'PhosphorGreen', 'PhosphorBlue', 'PhosphorWhite',
+    'rgb_from_xyz_matrix', 'xyz_from_rgb_matrix',
+    'display_from_linear_component', 'linear_from_display_component', 'gamma_exponent',
+    '_default_color_space')
+
+_init_lock = threading.RLock()
+_init_done = False
+
+def _ensure_init ():
+    '''Run init() with the default arguments, if it has not been run yet.  Thread-safe.'''
+    if not _init_done:
+        with _init_lock:
+            if not _init_done:
+                init()
+
+def __getattr__ (name):
+    '''Initialize on the first access to one of the values set by init().'''
+    if name in _LAZY_GLOBALS:
+        _ensure_init()
+        return globals() [name]
+    raise AttributeError ("module '%s' has no attribute '%s'" % (__name__, name))
 
 def init (
     phosphor_red   = SRGB_Red,
@@ -433,74 +568,157 @@ def init (
 
     See [Foley/Van Dam, p.587, eqn 13.27, 13.29] and [Hall, p. 239].
     '''
+    set_color_space (ColorSpace (phosphor_red, phosphor_green, phosphor_blue, white_point))
+
+def get_color_space ():
+    '''Get the default color space, which the conversion functions of this module use.'''
+    _ensure_init()
+    return _default_color_space
+
+def set_color_space (color_space):
+    '''Make color_space the default color space, which the conversion functions of this module use.'''
+    if not isinstance (color_space, ColorSpace):
+        raise TypeError ('Expecting a ColorSpace, got %s' % (type (color_space).__name__))
+    global _init_done, _default_color_space
     global PhosphorRed, PhosphorGreen, PhosphorBlue, PhosphorWhite
-    PhosphorRed   = phosphor_red
-    PhosphorGreen = phosphor_green
-    PhosphorBlue  = phosphor_blue
-    PhosphorWhite = white_point
     global xyz_from_rgb_matrix, rgb_from_xyz_matrix
-    phosphor_matrix = numpy.column_stack ((phosphor_red, phosphor_green, phosphor_blue))
-    # normalize white point to Y=1.0
-    normalized_white = white_point.copy()
-    xyz_normalize_Y1 (normalized_white)
-    # Determine intensities of each phosphor by solving:
-    #     phosphor_matrix * intensity_vector = white_point
-    intensities = numpy.linalg.solve (phosphor_matrix, normalized_white)
-    # construct xyz_from_rgb matrix from the results
-    xyz_from_rgb_matrix = numpy.column_stack (
-        (phosphor_red   * intensities [0],
-         phosphor_green * intensities [1],
-         phosphor_blue  * intensities [2]))
-    # invert to get rgb_from_xyz matrix
-    rgb_from_xyz_matrix = numpy.linalg.inv (xyz_from_rgb_matrix)
-    #print ('xyz_from_rgb', str (xyz_from_rgb_matrix))
-    #print ('rgb_from_xyz', str (rgb_from_xyz_matrix))
-
-    # conversions between the (almost) perceptually uniform
-    # spaces (Luv, Lab) require the definition of a white point.
-    init_Luv_Lab_white_point (white_point)
-
-    # init gamma correction functions to default
-    init_gamma_correction()
-
-    # init color clipping method to default
-    init_clipping()
-
-def rgb_from_xyz (xyz):
-    '''Convert an xyz color to rgb.'''
-    return numpy.dot (rgb_from_xyz_matrix, xyz)
-
-def xyz_from_rgb (rgb):
-    '''Convert an rgb color to xyz.'''
-    return numpy.dot (xyz_from_rgb_matrix, rgb)
+    global display_from_linear_component, linear_from_display_component, gamma_exponent
+    with _init_lock:
+        PhosphorRed   = color_space.phosphor_red
+        PhosphorGreen = color_space.phosphor_green
+        PhosphorBlue  = color_space.phosphor_blue
+        PhosphorWhite = color_space.white_point
+        xyz_from_rgb_matrix = color_space.xyz_from_rgb_matrix
+        rgb_from_xyz_matrix = color_space.rgb_from_xyz_matrix
+        display_from_linear_component = color_space.display_from_linear_function
+        linear_from_display_component = color_space.linear_from_display_function
+        gamma_exponent = color_space.gamma
+        # the conversion functions only read this, once per call
+        _default_color_space = color_space
+        _init_done = True
+
+def _transform_colors (matrix, colors, out):
+    '''Multiply each color, along the last axis of colors, by the 3x3 matrix.
+    A single color is multiplied as a column vector, as it always has been.
+    An array of colors of shape (..., 3) is multiplied all at once, as colors @ matrix.T.
+    The result is put into out, if it is not None.'''
+    colors = numpy.asarray (colors)
+    if colors.ndim == 1:
+        rtn = numpy.dot (matrix, colors)
+        if out is None:
+            return rtn
+        out [...] = rtn
+        return out
+    return numpy.matmul (colors, matrix.T, out=out)
+
+def rgb_from_xyz (xyz, out=None):
+    '''Convert an xyz color to rgb.
+    xyz may also be an array of colors, of shape (..., 3), and the result then has the same shape.
+    If out is given, the result is put into it (which may be xyz itself) and returned.'''
+    return get_color_space().rgb_from_xyz (xyz, out)
+
+def xyz_from_rgb (rgb, out=None):
+    '''Convert an rgb color to xyz.
+    rgb may also be an array of colors, of shape (..., 3), and the result then has the same shape.
+    If out is given, the result is put into it (which may be rgb itself) and returned.'''
+    return get_color_space().xyz_from_rgb (rgb, out)
 
 # Conversion from xyz to rgb, while also scaling the brightness to the maximum displayable
 
-def brightest_rgb_from_xyz (xyz, max_component=1.0):
-    '''Convert the xyz color to rgb, and scale to maximum displayable brightness, so one of the components will be 1.0 (or max_component).'''
-    rgb = rgb_from_xyz (xyz)
-    max_rgb = max (rgb)
-    if max_rgb != 0.0:
-        scale = max_component / max_rgb
-        rgb *= scale
+def brightest_rgb_from_xyz (xyz, max_component=1.0, out=None):
+    '''Convert the xyz color to rgb, and scale to maximum displayable brightness, so one of the components will be 1.0 (or max_component).
+    xyz may also be an array of colors, of shape (..., 3), and each color is then scaled separately.
+    Colors with a maximum component of zero (like black) are not scaled.
+    If out is given, the result is put into it (which may be xyz itself) and returned.'''
+    return get_color_space().brightest_rgb_from_xyz (xyz, max_component, out)
+
+def _brightest_rgb (rgb, max_component):
+    '''Scale each rgb color, in place, so that its maximum component is max_component.'''
+    max_rgb = numpy.max (rgb, axis=-1, keepdims=True)
+    scale = numpy.ones_like (max_rgb)
+    numpy.divide (max_component, max_rgb, out=scale, where=(max_rgb != 0.0))
+    rgb *= scale
     return rgb
 
+#
+# Chromatic adaptation - convert xyz colors seen under one white (illuminant) into the corresponding
+#     colors under another white, that look the same to an observer adapted to each white.
+#     The colors are converted into cone-like responses, each response is scaled by the ratio
+#     of the responses of the two whites, and the result is converted back to xyz.  [Fairchild, ch. 9]
+#
+
+ADAPT_BRADFORD  = 0
+ADAPT_VON_KRIES = 1
+ADAPT_CAT02     = 2
+
+# The cone response matrices for each method, which convert xyz colors into the cone responses.
+_CONE_RESPONSE_MATRICES = {
+    # Bradford, from Lam (1985)
+    ADAPT_BRADFORD : numpy.array ([
+        [ 0.8951,  0.2664, -0.1614],
+        [-0.7502,  1.7135,  0.0367],
+        [ 0.0389, -0.0685,  1.0296]]),
+    # Hunt-Pointer-Estevez, normalized to D65
+    ADAPT_VON_KRIES : numpy.array ([
+        [ 0.40024,  0.70760, -0.08081],
+        [-0.22630,  1.16532,  0.04570],
+        [ 0.0,      0.0,      0.91822]]),
+    # CAT02, from CIECAM02
+    ADAPT_CAT02 : numpy.array ([
+        [ 0.7328,  0.4296, -0.1624],
+        [-0.7036,  1.6975,  0.0061],
+        [ 0.0030,  0.0136,  0.9834]]),
+}
+
+# The adaptation matrices that have been computed, keyed by (method, source white, destination white).
+# The cache is emptied if it gets large, so that it does not grow without limit.
+_adaptation_matrices = {}
+_adaptation_lock = threading.Lock()
+_ADAPTATION_CACHE_SIZE = 256
+
+def chromatic_adaptation_matrix (source_white, destination_white, method = ADAPT_BRADFORD):
+    '''Get the (read-only) 3x3 matrix that adapts xyz colors under source_white to destination_white.
+    Only the chromaticities of the whites matter, their brightness is ignored.
+    The matrix for each pair of whites is computed once, and then cached.'''
+    source = numpy.asarray (source_white, dtype=float)
+    destination = numpy.asarray (destination_white, dtype=float)
+    if source.shape != (3,) or destination.shape != (3,):
+        raise ValueError ('Expecting xyz white points of shape (3,), got shapes %s and %s' % (
+            str (source.shape), str (destination.shape)))
+    if method not in _CONE_RESPONSE_MATRICES:
+        raise ValueError ('Invalid chromatic adaptation method %s' % (str (method)))
+    # whites of unit luminance, so that the adaptation keeps the luminance of neutral colors
+    source = source / source [1]
+    destination = destination / destination [1]
+    key = (method, tuple (source), tuple (destination))
+    matrix = _adaptation_matrices.get (key)
+    if matrix is None:
+        cone_matrix = _CONE_RESPONSE_MATRICES [method]
+        scale = numpy.dot (cone_matrix, destination) / numpy.dot (cone_matrix, source)
+        matrix = numpy.dot (numpy.linalg.inv (cone_matrix), scale [:, numpy.newaxis] * cone_matrix)
+        matrix.flags.writeable = False
+        with _adaptation_lock:
+            if len (_adaptation_matrices) >= _ADAPTATION_CACHE_SIZE:
+                _adaptation_matrices.clear()
+            matrix = _adaptation_matrices.setdefault (key, matrix)
+    return matrix
+
+def adapt_xyz (xyz, source_white, destination_white, method = ADAPT_BRADFORD, out = None):
+    '''Adapt the xyz color, seen under source_white, to the corresponding color under destination_white.
+    xyz may also be an array of colors, of shape (..., 3), which are adapted with a single matrix multiply.
+    If out is given, the result is put into it (which may be xyz itself) and returned.'''
+    return _transform_colors (chromatic_adaptation_matrix (source_white, destination_white, method), xyz, out)
+
 #
 # Color model conversions to (nearly) perceptually uniform spaces Luv and Lab.
 #
 
 # Luv/Lab conversions depend on the specification of a white point.
 
-_reference_white   = None
-_reference_u_prime = None
-_reference_v_prime = None
-
 def init_Luv_Lab_white_point (white_point):
     '''Specify the white point to use for Luv/Lab conversions.'''
-    global _reference_white, _reference_u_prime, _reference_v_prime
-    _reference_white = white_point.copy()
-    xyz_normalize_Y1 (_reference_white)
-    (_reference_u_prime, _reference_v_prime) = uv_primes (_reference_white)
+    with _init_lock:
+        set_color_space (get_color_space().replace (luv_lab_white_point = white_point))
 
 # Luminance function [of Y value of an XYZ color] used in Luv and Lab. See [Kasson p.399] for details.
 # The linear range coefficient L_LUM_C has more digits than in the paper,
@@ -513,6 +731,8 @@ L_LUM_CUTOFF = 0.008856
 
 def L_luminance (y):
     '''L coefficient for Luv and Lab models.'''
+    if numpy.ndim (y) != 0:
+        return _L_luminance_array (y)
     if y > L_LUM_CUTOFF:
         return L_LUM_A * math.pow (y, 1.0/3.0) - L_LUM_B
     else:
@@ -521,6 +741,8 @@ def L_luminance (y):
 
 def L_luminance_inverse (L):
     '''Inverse of L_luminance().'''
+    if numpy.ndim (L) != 0:
+        return _L_luminance_inverse_array (L)
     if L <= (L_LUM_C * L_LUM_CUTOFF):
         # linear range
         y = L / L_LUM_C
@@ -533,6 +755,8 @@ def L_luminance_inverse (L):
 
 def uv_primes (xyz):
     '''Luv utility.'''
+    if numpy.ndim (xyz) > 1:
+        return _uv_primes_array (xyz)
     x = xyz [0]
     y = xyz [1]
     z = xyz [2]
@@ -548,6 +772,8 @@ def uv_primes (xyz):
 
 def uv_primes_inverse (u_prime, v_prime, y):
     '''Inverse of form_uv_primes(). We will always have y known when this is called.'''
+    if numpy.ndim (u_prime) != 0 or numpy.ndim (v_prime) != 0 or numpy.ndim (y) != 0:
+        return _uv_primes_inverse_array (u_prime, v_prime, y)
     if v_prime != 0.0:
         # normal
         w_denom = (9.0 * y) / v_prime
@@ -573,6 +799,8 @@ LAB_F_B = (16.0/116.0)
 
 def Lab_f (t):
     '''Lab utility function.'''
+    if numpy.ndim (t) != 0:
+        return _Lab_f_array (t)
     if t > L_LUM_CUTOFF:
         return math.pow (t, 1.0/3.0)
     else:
@@ -581,6 +809,8 @@ def Lab_f (t):
 
 def Lab_f_inverse (F):
     '''Inverse of Lab_f().'''
+    if numpy.ndim (F) != 0:
+        return _Lab_f_inverse_array (F)
     if F <= (LAB_F_A * L_LUM_CUTOFF + LAB_F_B):
         # linear range
         t = (F - LAB_F_B) / LAB_F_A
@@ -592,79 +822,151 @@ def Lab_f_inverse (F):
 # and the almost perceptually uniform space Luv.
 
 def luv_from_xyz (xyz):
-    '''Convert CIE XYZ to Luv.'''
-    y = xyz [1]
-    y_p = y / _reference_white [1];       # actually reference_white [1] is probably always 1.0
-    (u_prime, v_prime) = uv_primes (xyz)
-    L = L_luminance (y_p)
-    u = 13.0 * L * (u_prime - _reference_u_prime)
-    v = 13.0 * L * (v_prime - _reference_v_prime)
-    luv = luv_color (L, u, v)
-    return luv
+    '''Convert CIE XYZ to Luv.
+    xyz may also be an array of colors, of shape (..., 3), and the result then has the same shape.'''
+    return get_color_space().luv_from_xyz (xyz)
 
 def xyz_from_luv (luv):
-    '''Convert Luv to CIE XYZ.  Inverse of luv_from_xyz().'''
-    L = luv [0]
-    u = luv [1]
-    v = luv [2]
-    # invert L_luminance() to get y
-    y = L_luminance_inverse (L)
-    if L != 0.0:
-        # color is not totally black
-        # get u_prime, v_prime
-        L13 = 13.0 * L
-        u_prime = _reference_u_prime + (u / L13)
-        v_prime = _reference_v_prime + (v / L13)
-        # get xyz color
-        xyz = uv_primes_inverse (u_prime, v_prime, y)
-    else:
-        # color is black
-        xyz = xyz_color (0.0, 0.0, 0.0)
-    return xyz
+    '''Convert Luv to CIE XYZ.  Inverse of luv_from_xyz().
+    luv may also be an array of colors, of shape (..., 3), and the result then has the same shape.'''
+    return get_color_space().xyz_from_luv (luv)
 
 # Conversions between standard device independent color space (CIE XYZ)
 # and the almost perceptually uniform space Lab.
 
 def lab_from_xyz (xyz):
-    '''Convert color from CIE XYZ to Lab.'''
-    x = xyz [0]
-    y = xyz [1]
-    z = xyz [2]
+    '''Convert color from CIE XYZ to Lab.
+    xyz may also be an array of colors, of shape (..., 3), and the result then has the same shape.'''
+    return get_color_space().lab_from_xyz (xyz)
+
+def xyz_from_lab (Lab):
+    '''Convert color from Lab to CIE XYZ.  Inverse of lab_from_xyz().
+    Lab may also be an array of colors, of shape (..., 3), and the result then has the same shape.'''
+    return get_color_space().xyz_from_lab (Lab)
+
+# Array versions of the Luv and Lab conversions, used by the functions above for arrays of values.
+# Each piecewise function is evaluated on all the values of each branch at once, selected with a mask,
+# and the black color special cases are handled with masks as well.
+
+def _L_luminance_array (y):
+    '''L_luminance() for an array of y values.'''
+    y = numpy.asarray (y, dtype=float)
+    L = L_LUM_C * y
+    cube_root = y > L_LUM_CUTOFF
+    L [cube_root] = L_LUM_A * numpy.power (y [cube_root], 1.0/3.0) - L_LUM_B
+    return L
+
+def _L_luminance_inverse_array (L):
+    '''L_luminance_inverse() for an array of L values.'''
+    L = numpy.asarray (L, dtype=float)
+    y = L / L_LUM_C
+    cube = L > (L_LUM_C * L_LUM_CUTOFF)
+    t = (L [cube] + L_LUM_B) / L_LUM_A
+    y [cube] = numpy.power (t, 3)
+    return y
+
+def _uv_primes_array (xyz):
+    '''uv_primes() for an array of xyz colors, of shape (..., 3).'''
+    xyz = numpy.asarray (xyz, dtype=float)
+    x = xyz [..., 0]
+    y = xyz [..., 1]
+    z = xyz [..., 2]
+    w_denom = x + 15.0 * y + 3.0 * z
+    # black colors have w_denom = 0, and get u_prime = v_prime = 0
+    nonzero = (w_denom != 0.0)
+    u_prime = numpy.zeros (w_denom.shape)
+    v_prime = numpy.zeros (w_denom.shape)
+    numpy.divide (4.0 * x, w_denom, out=u_prime, where=nonzero)
+    numpy.divide (9.0 * y, w_denom, out=v_prime, where=nonzero)
+    return (u_prime, v_prime)
+
+def _uv_primes_inverse_array (u_prime, v_prime, y):
+    '''uv_primes_inverse() for arrays of u_prime, v_prime and y values.'''
+    (u_prime, v_prime, y) = numpy.broadcast_arrays (
+        numpy.asarray (u_prime, dtype=float), numpy.asarray (v_prime, dtype=float), numpy.asarray (y, dtype=float))
+    # black colors have v_prime = 0, and get xyz = 0
+    normal = (v_prime != 0.0)
+    w_denom = numpy.zeros (v_prime.shape)
+    numpy.divide (9.0 * y, v_prime, out=w_denom, where=normal)
+    xyz = numpy.empty (v_prime.shape + (3,))
+    xyz [..., 0] = 0.25 * u_prime * w_denom
+    xyz [..., 1] = y
+    xyz [..., 2] = (w_denom - xyz [..., 0] - 15.0 * y) / 3.0
+    xyz [~normal] = 0.0
+    return xyz
+
+def _Lab_f_array (t):
+    '''Lab_f() for an array of values.'''
+    t = numpy.asarray (t, dtype=float)
+    F = LAB_F_A * t + LAB_F_B
+    cube_root = t > L_LUM_CUTOFF
+    F [cube_root] = numpy.power (t [cube_root], 1.0/3.0)
+    return F
+
+def _Lab_f_inverse_array (F):
+    '''Lab_f_inverse() for an array of values.'''
+    F = numpy.asarray (F, dtype=float)
+    t = (F - LAB_F_B) / LAB_F_A
+    cube = F > (LAB_F_A * L_LUM_CUTOFF + LAB_F_B)
+    t [cube] = numpy.power (F [cube], 3)
+    return t
 
-    x_p = x / _reference_white [0]
-    y_p = y / _reference_white [1]
-    z_p = z / _reference_white [2]
+def _luv_from_xyz_array (color_space, xyz):
+    '''luv_from_xyz() for an array of colors, of shape (..., 3).'''
+    xyz = numpy.asarray (xyz, dtype=float)
+    y_p = xyz [..., 1] / color_space.reference_white [1]
+    (u_prime, v_prime) = _uv_primes_array (xyz)
+    luv = numpy.empty (xyz.shape)
+    L = _L_luminance_array (y_p)
+    luv [..., 0] = L
+    luv [..., 1] = 13.0 * L * (u_prime - color_space.reference_u_prime)
+    luv [..., 2] = 13.0 * L * (v_prime - color_space.reference_v_prime)
+    return luv
 
-    f_x = Lab_f (x_p)
-    f_y = Lab_f (y_p)
-    f_z = Lab_f (z_p)
+def _xyz_from_luv_array (color_space, luv):
+    '''xyz_from_luv() for an array of colors, of shape (..., 3).'''
+    luv = numpy.asarray (luv, dtype=float)
+    L = luv [..., 0]
+    u = luv [..., 1]
+    v = luv [..., 2]
+    y = _L_luminance_inverse_array (L)
+    # black colors have L = 0, and get xyz = 0
+    nonblack = (L != 0.0)
+    L13 = 13.0 * L
+    u_prime = numpy.zeros (L.shape)
+    v_prime = numpy.zeros (L.shape)
+    numpy.divide (u, L13, out=u_prime, where=nonblack)
+    numpy.divide (v, L13, out=v_prime, where=nonblack)
+    u_prime += color_space.reference_u_prime
+    v_prime += color_space.reference_v_prime
+    xyz = _uv_primes_inverse_array (u_prime, v_prime, y)
+    xyz [~nonblack] = 0.0
+    return xyz
 
-    L = L_luminance (y_p)
-    a = 500.0 * (f_x - f_y)
-    b = 200.0 * (f_y - f_z)
-    Lab = lab_color (L, a, b)
+def _lab_from_xyz_array (color_space, xyz):
+    '''lab_from_xyz() for an array of colors, of shape (..., 3).'''
+    xyz = numpy.asarray (xyz, dtype=float)
+    xyz_p = xyz / color_space.reference_white
+    f_xyz = _Lab_f_array (xyz_p)
+    Lab = numpy.empty (xyz.shape)
+    Lab [..., 0] = _L_luminance_array (xyz_p [..., 1])
+    Lab [..., 1] = 500.0 * (f_xyz [..., 0] - f_xyz [..., 1])
+    Lab [..., 2] = 200.0 * (f_xyz [..., 1] - f_xyz [..., 2])
     return Lab
 
-def xyz_from_lab (Lab):
-    '''Convert color from Lab to CIE XYZ.  Inverse of lab_from_xyz().'''
-    L = Lab [0]
-    a = Lab [1]
-    b = Lab [2]
-    # invert L_luminance() to get y_p
-    y_p = L_luminance_inverse (L)
-    # calculate f_y
-    f_y = Lab_f (y_p)
-    # solve for f_x and f_z
-    f_x = f_y + (a / 500.0)
-    f_z = f_y - (b / 200.0)
-    # invert Lab_f() to get x_p and z_p
-    x_p = Lab_f_inverse (f_x)
-    z_p = Lab_f_inverse (f_z)
-    # multiply by reference white to get xyz
-    x = x_p * _reference_white [0]
-    y = y_p * _reference_white [1]
-    z = z_p * _reference_white [2]
-    xyz = xyz_color (x, y, z)
+def _xyz_from_lab_array (color_space, Lab):
+    '''xyz_from_lab() for an array of colors, of shape (..., 3).'''
+    Lab = numpy.asarray (Lab, dtype=float)
+    y_p = _L_luminance_inverse_array (Lab [..., 0])
+    f_y = _Lab_f_array (y_p)
+    f_xz = numpy.empty (Lab.shape [:-1] + (2,))
+    f_xz [..., 0] = f_y + (Lab [..., 1] / 500.0)
+    f_xz [..., 1] = f_y - (Lab [..., 2] / 200.0)
+    xz_p = _Lab_f_inverse_array (f_xz)
+    xyz = numpy.empty (Lab.shape)
+    xyz [..., 0] = xz_p [..., 0] * color_space.reference_white [0]
+    xyz [..., 1] = y_p * color_space.reference_white [1]
+    xyz [..., 2] = xz_p [..., 1] * color_space.reference_white [2]
     return xyz
 
 # Gamma correction
@@ -682,10 +984,8 @@ def xyz_from_lab (Lab):
 # With LCD displays, it is less clear (at least to me), what the genuinely
 # correct correction should be.
 
-# Gamma correction functions
-display_from_linear_component = None
-linear_from_display_component = None
-gamma_exponent = None
+# Gamma correction functions display_from_linear_component, linear_from_display_component,
+# and gamma_exponent, of the default color space, are set by init_gamma_correction().
 
 # sRGB standard effective gamma.  This exponent is not applied explicitly.
 STANDARD_GAMMA = 2.2
@@ -701,18 +1001,24 @@ POYNTON_GAMMA = 2.45
 # Simple power laws for gamma correction
 
 def simple_gamma_invert (x):
-    '''Simple power law for gamma inverse correction.'''
-    if x <= 0.0:
-        return x
-    else:
-        return math.pow (x, 1.0 / gamma_exponent)
+    '''Simple power law for gamma inverse correction, with the gamma exponent of the default color space.'''
+    return _simple_gamma_power (x, 1.0 / get_color_space().gamma)
 
 def simple_gamma_correct (x):
-    '''Simple power law for gamma correction.'''
+    '''Simple power law for gamma correction, with the gamma exponent of the default color space.'''
+    return _simple_gamma_power (x, get_color_space().gamma)
+
+def _simple_gamma_power (x, exponent):
+    '''Raise the positive value(s) x to the power exponent, leaving the others unchanged.'''
+    if numpy.ndim (x) != 0:
+        rtn = numpy.array (x, dtype=float)
+        positive = rtn > 0.0
+        rtn [positive] = numpy.power (rtn [positive], exponent)
+        return rtn
     if x <= 0.0:
         return x
     else:
-        return math.pow (x, gamma_exponent)
+        return math.pow (x, exponent)
 
 # sRGB gamma correction - http://www.color.org/sRGB.xalter
 # The effect of the equations is to closely fit a straightforward
@@ -722,6 +1028,12 @@ def simple_gamma_correct (x):
 
 def srgb_gamma_invert (x):
     '''sRGB standard for gamma inverse correction.'''
+    if numpy.ndim (x) != 0:
+        x = numpy.asarray (x, dtype=float)
+        rtn = 12.92 * x
+        power = x > 0.00304
+        rtn [power] = 1.055 * numpy.power (x [power], 1.0/2.4) - 0.055
+        return rtn
     if x <= 0.00304:
         rtn = 12.92 * x
     else:
@@ -730,6 +1042,12 @@ def srgb_gamma_invert (x):
 
 def srgb_gamma_correct (x):
     '''sRGB standard for gamma correction.'''
+    if numpy.ndim (x) != 0:
+        x = numpy.asarray (x, dtype=float)
+        rtn = x / 12.92
+        power = x > 0.03928
+        rtn [power] = numpy.power ((x [power] + 0.055) / 1.055, 2.4)
+        return rtn
     if x <= 0.03928:
         rtn = x / 12.92
     else:
@@ -762,10 +1080,129 @@ def init_gamma_correction (
 
     The gamma parameter is only used for the simple() functions,
     as sRGB implies an effective gamma of 2.2.'''
-    global display_from_linear_component, linear_from_display_component, gamma_exponent
-    display_from_linear_component = display_from_linear_function
-    linear_from_display_component = linear_from_display_function
-    gamma_exponent = gamma
+    with _init_lock:
+        set_color_space (get_color_space().replace (
+            display_from_linear_function = display_from_linear_function,
+            linear_from_display_function = linear_from_display_function,
+            gamma = gamma))
+
+# The gamma functions above also accept arrays.  Other functions given to init_gamma_correction()
+# are applied to arrays one value at a time.
+
+def _gamma_functions (function, gamma):
+    '''Get the versions of the gamma correction function for (single values, arrays), for a color space
+    with the gamma exponent.  The simple power laws use that exponent, rather than the default.'''
+    if function is simple_gamma_invert:
+        exponent = 1.0 / gamma
+    elif function is simple_gamma_correct:
+        exponent = gamma
+    elif function in (srgb_gamma_invert, srgb_gamma_correct):
+        return (function, function)
+    else:
+        return (function, numpy.vectorize (function, otypes=[float]))
+    power = lambda x: _simple_gamma_power (x, exponent)
+    return (power, power)
+
+# Lookup tables for gamma correction of 8-bit and 16-bit data, for the gamma functions of a color space.
+#
+# Decoding - A displayable code i (0 - 255 for 8-bit) has the linear value
+#   linear_from_display_component (i / 255.0), which is simply tabulated.
+# Encoding - The code for a linear value x is round (255.0 * display_from_linear_component (x)),
+#   clamped to 0 - 255.  As display_from_linear_component() increases with x, each code k starts
+#   at a threshold linear value, and the code for x is the number of thresholds <= x.
+#   The thresholds are found by bisection to the nearest float, so the table lookup
+#   gives the same codes as evaluating the gamma function for every value.
+#   To avoid a binary search for every value, the linear range 0.0 - 2.0 is also divided into
+#   a dense table of equal cells, holding the code at the start of each cell, and the next threshold.
+#   Most cells hold at most one threshold, so the code is found with two lookups and a comparison.
+#   Only values in cells with several thresholds (where the gamma curve is steep) are searched.
+
+_GAMMA_TABLE_BITS = {8 : numpy.uint8, 16 : numpy.uint16}
+
+_GAMMA_ENCODE_RANGE = 2.0
+_GAMMA_ENCODE_CELLS = {8 : 4096, 16 : 65536}
+
+def _build_gamma_tables (color_space, bits):
+    '''Build the (encoding thresholds, decoding table) for the gamma functions of the color space,
+    for data with the given number of bits.'''
+    max_code = (1 << bits) - 1
+    # decoding table, evaluated one value at a time, exactly as rgb_from_irgb() does
+    decode = numpy.array ([color_space.linear_from_display_component (i / float (max_code)) for i in range (0, max_code + 1)])
+    decode.flags.writeable = False
+    # encoding thresholds, the smallest linear value with each code 1 - max_code
+    def code (x):
+        return numpy.clip (numpy.rint (max_code * color_space.display_from_linear_component (x)), 0, max_code)
+    codes = numpy.arange (1, max_code + 1, dtype=float)
+    lo = numpy.zeros (max_code)
+    hi = numpy.full (max_code, 2.0)
+    below = code (lo) < codes
+    reached = code (hi) >= codes
+    while True:
+        mid = 0.5 * (lo + hi)
+        searching = (mid > lo) & (mid < hi)
+        if not numpy.any (searching):
+            break
+        mid_reached = code (mid) >= codes
+        hi = numpy.where (mid_reached, mid, hi)
+        lo = numpy.where (mid_reached, lo, mid)
+    thresholds = numpy.where (below, hi, -numpy.inf)
+    thresholds [~reached] = numpy.inf
+    # dense table of cells, with the code at the start of the cell, the next threshold,
+    # and whether the cell must be searched as it holds more than one threshold
+    num_cells = _GAMMA_ENCODE_CELLS [bits]
+    cell_starts = numpy.arange (num_cells + 1) * (_GAMMA_ENCODE_RANGE / num_cells)
+    cell_codes = numpy.searchsorted (thresholds, cell_starts, side='right')
+    cell_next = numpy.append (thresholds, numpy.nan) [cell_codes [:-1]]
+    cell_search = (cell_codes [1:] - cell_codes [:-1]) > 1
+    # values outside the table get the code of the first or last cell, which is correct
+    # unless some thresholds are outside the table (only possible for unusual gamma functions)
+    finite = thresholds [numpy.isfinite (thresholds)]
+    search_outside = (len (finite) > 0) and ((finite [0] <= 0.0) or (finite [-1] >= _GAMMA_ENCODE_RANGE) or cell_search [-1])
+    for array in (thresholds, cell_codes, cell_next, cell_search, decode):
+        array.flags.writeable = False
+    encode = (thresholds, cell_codes [:-1], cell_next, cell_search, search_outside)
+    return (encode, decode)
+
+def gamma_encode (linear, bits = 8):
+    '''Convert an array of linear values into displayable integer codes, gamma corrected with
+    display_from_linear_component(), scaled to 0 - 255 (or 0 - 65535 for 16 bits) and rounded.
+    This is a table lookup, without evaluating the gamma function.
+    The result is an array of numpy.uint8 (or numpy.uint16), with the same shape.'''
+    return get_color_space().gamma_encode (linear, bits)
+
+def _encode_with_tables (encode, linear, codes, position, cell, work, flags):
+    '''Encode the linear values into codes, with the encoding tables from ColorSpace._get_gamma_tables().
+    The codes (numpy.intp) and the scratch arrays position, cell (numpy.intp), work and flags (bool)
+    must all have the same shape as linear.  No other arrays are allocated, except for the few values
+    that must be searched for.'''
+    (thresholds, cell_codes, cell_next, cell_search, search_outside) = encode
+    num_cells = len (cell_codes)
+    numpy.multiply (linear, num_cells / _GAMMA_ENCODE_RANGE, out=position)
+    if search_outside:
+        outside = ~((position >= 0.0) & (position < num_cells))
+    # fmax/fmin put nan into the first cell
+    numpy.fmax (position, 0.0, out=position)
+    numpy.fmin (position, num_cells - 1, out=position)
+    numpy.copyto (cell, position, casting='unsafe')
+    numpy.take (cell_codes, cell, out=codes, mode='clip')
+    numpy.take (cell_next, cell, out=work, mode='clip')
+    numpy.greater_equal (linear, work, out=flags)
+    codes += flags
+    # values in steep cells (or outside the table) are searched for among all the thresholds
+    numpy.take (cell_search, cell, out=flags, mode='clip')
+    if search_outside:
+        flags |= outside
+    if numpy.any (flags):
+        codes [flags] = numpy.searchsorted (thresholds, numpy.nan_to_num (linear [flags], nan=-numpy.inf), side='right')
+    # infinite values reach even the unreachable codes
+    numpy.minimum (codes, len (thresholds), out=codes)
+    return codes
+
+def gamma_decode (codes, bits = 8):
+    '''Convert an array of displayable integer codes, 0 - 255 (or 0 - 65535 for 16 bits),
+    into linear values with linear_from_display_component().
+    This is a table lookup, without evaluating the gamma function.'''
+    return get_color_space().gamma_decode (codes, bits)
 
 #
 # Color clipping - Physical color values may exceed the what the display can show,
@@ -774,16 +1211,18 @@ def init_gamma_correction (
 #   These must be clipped to something displayable.
 #
 
-_clip_method = None
+# The clipping method of the default color space is set by init_clipping().
 
 # possible color clipping methods
-CLIP_CLAMP_TO_ZERO = 0
-CLIP_ADD_WHITE     = 1
+CLIP_CLAMP_TO_ZERO   = 0
+CLIP_ADD_WHITE       = 1
+CLIP_COMPRESS_CHROMA = 2
+_CLIP_METHODS = (CLIP_CLAMP_TO_ZERO, CLIP_ADD_WHITE, CLIP_COMPRESS_CHROMA)
 
 def init_clipping (clip_method = CLIP_ADD_WHITE):
     '''Specify the color clipping method.'''
-    global _clip_method
-    _clip_method = clip_method
+    with _init_lock:
+        set_color_space (get_color_space().replace (clip_method = clip_method))
 
 def clip_rgb_color (rgb_color):
     '''Convert a linear rgb color (nominal range 0.0 - 1.0), into a displayable
@@ -792,66 +1231,126 @@ def clip_rgb_color (rgb_color):
     The return value is a tuple, the first element is the clipped irgb color,
     and the second element is a tuple indicating which (if any) clipping processes were used.
     '''
-    clipped_chromaticity = False
-    clipped_intensity = False
+    return get_color_space().clip_rgb_color (rgb_color)
+
+def clip_rgb_colors (rgb_colors):
+    '''Convert an array of linear rgb colors, of shape (..., 3), into displayable irgb colors,
+    clipping each color as clip_rgb_color() does, but for all the colors at once.
+
+    The return value is a tuple (irgbs, (clipped_chromaticity, clipped_intensity), (num_chromaticity, num_intensity)).
+    irgbs is an array of 8-bit (numpy.uint8) colors, with the same shape as rgb_colors.
+    clipped_chromaticity and clipped_intensity are boolean arrays, of shape (...), indicating
+    which colors were clipped by each process, and num_chromaticity, num_intensity are the number
+    of colors clipped by each.
+    '''
+    return get_color_space().clip_rgb_colors (rgb_colors)
+
+def clipped_rgb_from_rgb (rgb_colors):
+    '''Clip an array of linear rgb colors, of shape (..., 3), as clip_rgb_colors() does,
+    but return the clipped linear rgb colors, without gamma correction.
 
-    rgb = rgb_color.copy()
+    gamma_encode() of the result gives the same colors as clip_rgb_colors().  The clipped colors are
+    continuous in the rgb colors, so this is the part of the chain that a lookup table (see lut.py) can interpolate.'''
+    return get_color_space().clipped_rgb_from_rgb (rgb_colors)
 
+def _clip_rgb_array (color_space, rgb_colors):
+    '''Clip an array of linear rgb colors as clip_rgb_color() does, but without gamma correction.
+    Returns (rgb, clipped_chromaticity, clipped_intensity), with the clipped (linear) colors.'''
+    clip_method = color_space.clip_method
+    rgb = numpy.array (rgb_colors, dtype=float)
     # clip chromaticity if needed (negative rgb values)
-    if _clip_method == CLIP_CLAMP_TO_ZERO:
+    if clip_method == CLIP_CLAMP_TO_ZERO:
         # set negative rgb values to zero
-        if rgb [0] < 0.0:
-            rgb [0] = 0.0
-            clipped_chromaticity = True
-        if rgb [1] < 0.0:
-            rgb [1] = 0.0
-            clipped_chromaticity = True
-        if rgb [2] < 0.0:
-            rgb [2] = 0.0
-            clipped_chromaticity = True
-    elif _clip_method == CLIP_ADD_WHITE:
-        # add enough white to make all rgb values nonnegative
-        # find max negative rgb (or 0.0 if all non-negative), we need that much white
-        rgb_min = min (0.0, min (rgb))
-        # get max positive component
-        rgb_max = max (rgb)
-	# get scaling factor to maintain max rgb after adding white
-        scaling = 1.0
-        if rgb_max > 0.0:
-            scaling = rgb_max / (rgb_max - rgb_min)
-        # add enough white to cancel this out, maintaining the maximum of rgb
-        if rgb_min < 0.0:
-            rgb [0] = scaling * (rgb [0] - rgb_min);
-            rgb [1] = scaling * (rgb [1] - rgb_min);
-            rgb [2] = scaling * (rgb [2] - rgb_min);
-            clipped_chromaticity = True
+        negative = rgb < 0.0
+        clipped_chromaticity = numpy.any (negative, axis=-1)
+        rgb [negative] = 0.0
+    elif clip_method == CLIP_ADD_WHITE:
+        # add enough white to make all rgb values nonnegative, maintaining the maximum of rgb
+        rgb_min = numpy.minimum (0.0, numpy.min (rgb, axis=-1))
+        rgb_max = numpy.max (rgb, axis=-1)
+        clipped_chromaticity = rgb_min < 0.0
+        scaling = numpy.ones (rgb_max.shape)
+        numpy.divide (rgb_max, rgb_max - rgb_min, out=scaling, where=(clipped_chromaticity & (rgb_max > 0.0)))
+        rgb [clipped_chromaticity] = scaling [clipped_chromaticity, numpy.newaxis] * (
+            rgb [clipped_chromaticity] - rgb_min [clipped_chromaticity, numpy.newaxis])
+    elif clip_method == CLIP_COMPRESS_CHROMA:
+        # reduce the chroma of colors outside of the gamut, to that of the gamut boundary
+        clipped_chromaticity = numpy.any (rgb < 0.0, axis=-1)
+        rgb [clipped_chromaticity] = _compress_chroma (color_space, rgb [clipped_chromaticity])
     else:
-        raise ValueError('Invalid color clipping method %s' % (str(_clip_method)))
-
+        raise ValueError('Invalid color clipping method %s' % (str(clip_method)))
     # clip intensity if needed (rgb values > 1.0) by scaling
-    rgb_max = max (rgb)
-    # we actually don't overflow until 255.0 * intensity > 255.5, so instead of 1.0 use ...
+    rgb_max = numpy.max (rgb, axis=-1)
     intensity_cutoff = 1.0 + (0.5 / 255.0)
-    if rgb_max > intensity_cutoff:
-        # must scale intensity, so max value is intensity_cutoff
-        scaling = intensity_cutoff / rgb_max
-        rgb *= scaling
-        clipped_intensity = True
-
-    # gamma correction
-    for index in range (0, 3):
-        rgb [index] = display_from_linear_component (rgb [index])
-
-    # scale to 0 - 255
-    ir = round (255.0 * rgb [0])
-    ig = round (255.0 * rgb [1])
-    ib = round (255.0 * rgb [2])
-    # ensure that values are in the range 0-255
-    ir = min (255, max (0, ir))
-    ig = min (255, max (0, ig))
-    ib = min (255, max (0, ib))
-    irgb = irgb_color (ir, ig, ib)
-    return (irgb, (clipped_chromaticity, clipped_intensity))
+    clipped_intensity = rgb_max > intensity_cutoff
+    rgb [clipped_intensity] *= (intensity_cutoff / rgb_max [clipped_intensity]) [:, numpy.newaxis]
+    return (rgb, clipped_chromaticity, clipped_intensity)
+
+# Gamut mapping for CLIP_COMPRESS_CHROMA - The display gamut (of colors without negative rgb values)
+#   is described by a table of the largest chroma, at each Lab lightness 0 - 100 and hue 0 - 360 degrees,
+#   of the colors in the gamut.  Each color space builds the table, by bisection, on first use.
+#   The table is cached for the phosphors and white points, which the other settings do not change.
+#   Colors outside of the gamut keep their lightness and hue, but their chroma is reduced to that
+#   of the boundary.  As the gamut is a cone in xyz, and Lab scales with the cube root of the
+#   intensity, the boundary chroma for lightness L > 100 is that at 100, scaled by (L + 16) / 116.
+
+_GAMUT_LIGHTNESS_STEPS = 100
+_GAMUT_HUE_STEPS       = 360
+_GAMUT_MAX_CHROMA      = 400.0
+_GAMUT_BISECTIONS      = 32
+
+# The boundary tables that have been built, keyed by the conversion matrix and the Lab white.
+_gamut_boundaries = {}
+_GAMUT_CACHE_SIZE = 16
+
+def _build_gamut_boundary (color_space):
+    '''Build the table of the largest chroma in the gamut of the color space, of shape
+    (_GAMUT_LIGHTNESS_STEPS + 1, _GAMUT_HUE_STEPS + 1), for each lightness and hue.'''
+    L = numpy.linspace (0.0, 100.0, _GAMUT_LIGHTNESS_STEPS + 1) [:, numpy.newaxis]
+    hue = numpy.radians (numpy.linspace (0.0, 360.0, _GAMUT_HUE_STEPS + 1))
+    (cos_hue, sin_hue) = (numpy.cos (hue), numpy.sin (hue))
+    low = numpy.zeros ((len (L), len (hue)))
+    high = numpy.full (low.shape, _GAMUT_MAX_CHROMA)
+    lab = numpy.empty (low.shape + (3,))
+    lab [..., 0] = L
+    for i in range (0, _GAMUT_BISECTIONS):
+        chroma = 0.5 * (low + high)
+        lab [..., 1] = chroma * cos_hue
+        lab [..., 2] = chroma * sin_hue
+        rgb = color_space.rgb_from_xyz (color_space.xyz_from_lab (lab))
+        inside = numpy.min (rgb, axis=-1) >= 0.0
+        low [inside] = chroma [inside]
+        high [~inside] = chroma [~inside]
+    low.flags.writeable = False
+    return low
+
+def _compress_chroma (color_space, rgb):
+    '''Map the (N, 3) array of linear rgb colors into the gamut, by reducing their Lab chroma
+    to the chroma of the gamut boundary, at constant lightness and hue.'''
+    boundary = color_space._get_gamut_boundary()
+    lab = color_space.lab_from_xyz (color_space.xyz_from_rgb (rgb))
+    L = lab [:, 0]
+    chroma = numpy.hypot (lab [:, 1], lab [:, 2])
+    hue = numpy.degrees (numpy.arctan2 (lab [:, 2], lab [:, 1])) % 360.0
+    # bilinear interpolation of the boundary table
+    L_position = numpy.clip (L, 0.0, 100.0) * (_GAMUT_LIGHTNESS_STEPS / 100.0)
+    L_index = numpy.minimum (L_position.astype (int), _GAMUT_LIGHTNESS_STEPS - 1)
+    L_fraction = L_position - L_index
+    hue_position = hue * (_GAMUT_HUE_STEPS / 360.0)
+    hue_index = numpy.minimum (hue_position.astype (int), _GAMUT_HUE_STEPS - 1)
+    hue_fraction = hue_position - hue_index
+    max_chroma = (
+        (1.0 - L_fraction) * ((1.0 - hue_fraction) * boundary [L_index,     hue_index] + hue_fraction * boundary [L_index,     hue_index + 1]) +
+        L_fraction         * ((1.0 - hue_fraction) * boundary [L_index + 1, hue_index] + hue_fraction * boundary [L_index + 1, hue_index + 1]))
+    bright = L > 100.0
+    max_chroma [bright] *= (L [bright] + 16.0) / 116.0
+    scale = numpy.ones_like (chroma)
+    numpy.divide (max_chroma, chroma, out=scale, where=(chroma > max_chroma))
+    lab [:, 1:] *= scale [:, numpy.newaxis]
+    rgb = color_space.rgb_from_xyz (color_space.xyz_from_lab (lab))
+    # the interpolated boundary is not exact, so remove any small negative values that remain
+    numpy.maximum (rgb, 0.0, out=rgb)
+    return rgb
 
 #
 # Conversions between linear rgb colors (range 0.0 - 1.0, values proportional to light intensity)
@@ -885,43 +1384,589 @@ def irgb_from_irgb_string (irgb_string):
     irgb = irgb_color (ir, ig, ib)
     return irgb
 
+# Hex strings for arrays of colors, built and parsed as arrays of character codes.
+
+_HEX_DIGITS = numpy.array ([ord (c) for c in '0123456789ABCDEF'], dtype=numpy.uint32)
+
+# value of each ASCII character code as a hex digit, or 16 if it is not one
+_HEX_VALUES = numpy.full (128, 16, dtype=numpy.uint8)
+for _i, _c in enumerate ('0123456789ABCDEF'):
+    _HEX_VALUES [ord (_c)] = _i
+    _HEX_VALUES [ord (_c.lower())] = _i
+del _i, _c
+
+def irgb_strings_from_irgbs (irgbs):
+    '''Convert an array of displayable irgb colors (0-255), of shape (..., 3), into
+    a numpy array of hex strings (like '#AB13D2'), of shape (...).
+    Values are clamped to the range 0-255, as irgb_string_from_irgb() does.'''
+    irgbs = numpy.clip (numpy.asarray (irgbs), 0, 255).astype (numpy.uint8)
+    if irgbs.shape [-1:] != (3,):
+        raise ValueError ('Expecting irgb colors of shape (..., 3), got shape %s' % (str (irgbs.shape)))
+    chars = numpy.empty (irgbs.shape [:-1] + (7,), dtype=numpy.uint32)
+    chars [..., 0] = ord ('#')
+    chars [..., 1::2] = _HEX_DIGITS [irgbs >> 4]
+    chars [..., 2::2] = _HEX_DIGITS [irgbs & 15]
+    return chars.view ('U7') [..., 0]
+
+def irgbs_from_irgb_strings (irgb_strings):
+    '''Convert a sequence of color hex strings (like '#AB13D2') into an array of displayable irgb colors.
+
+    Invalid strings do not raise an exception.  Instead, the return value is a tuple (irgbs, invalid),
+    where irgbs is a numpy.uint8 array of shape (N, 3), with black for each invalid string,
+    and invalid is an array of the indices of the invalid strings (empty if all are valid).'''
+    strings = numpy.asarray (irgb_strings)
+    if strings.dtype.kind not in 'SU':
+        strings = strings.astype (str)
+    strings = strings.ravel()
+    num_strings = len (strings)
+    # character codes of each string, padded with zeros
+    char_type = numpy.uint8 if strings.dtype.kind == 'S' else numpy.uint32
+    num_chars = strings.dtype.itemsize // numpy.dtype (char_type).itemsize
+    chars = numpy.ascontiguousarray (strings).view (char_type).reshape (num_strings, num_chars)
+    irgbs = numpy.zeros ((num_strings, 3), dtype=numpy.uint8)
+    if num_chars < 7:
+        return (irgbs, numpy.arange (num_strings))
+    # valid strings have seven characters, '#' and six hex digits
+    valid = (chars [:, 0] == ord ('#')) & numpy.all (chars [:, 7:] == 0, axis=1)
+    digits = chars [:, 1:7]
+    values = _HEX_VALUES [numpy.minimum (digits, 127)]
+    valid &= numpy.all ((digits < 128) & (values < 16), axis=1)
+    irgbs [valid] = (values [valid, 0::2] << 4) | values [valid, 1::2]
+    invalid = numpy.flatnonzero (~valid)
+    return (irgbs, invalid)
+
 def irgb_from_rgb (rgb):
-    '''Convert a (linear) rgb value (range 0.0 - 1.0) into a 0-255 displayable integer irgb value (range 0 - 255).'''
-    result = clip_rgb_color (rgb)
-    (irgb, (clipped_chrom,clipped_int)) = result
-    return irgb
+    '''Convert a (linear) rgb value (range 0.0 - 1.0) into a 0-255 displayable integer irgb value (range 0 - 255).
+    rgb may also be an array of colors, of shape (..., 3), and the result is then an array of 8-bit colors.'''
+    return get_color_space().irgb_from_rgb (rgb)
 
 def rgb_from_irgb (irgb):
-    '''Convert a displayable (gamma corrected) irgb value (range 0 - 255) into a linear rgb value (range 0.0 - 1.0).'''
-    # scale to 0.0 - 1.0
-    r0 = float (irgb [0]) / 255.0
-    g0 = float (irgb [1]) / 255.0
-    b0 = float (irgb [2]) / 255.0
-    # gamma adjustment
-    r = linear_from_display_component (r0)
-    g = linear_from_display_component (g0)
-    b = linear_from_display_component (b0)
-    rgb = rgb_color (r, g, b)
-    return rgb
+    '''Convert a displayable (gamma corrected) irgb value (range 0 - 255) into a linear rgb value (range 0.0 - 1.0).
+    irgb may also be an array of integer colors, of shape (..., 3), which are converted with a lookup table.'''
+    return get_color_space().rgb_from_irgb (irgb)
 
 def irgb_string_from_rgb (rgb):
     '''Clip the rgb color, convert to a displayable color, and convert to a hex string.'''
-    return irgb_string_from_irgb (irgb_from_rgb (rgb))
+    return get_color_space().irgb_string_from_rgb (rgb)
 
 # Multi-level conversions, for convenience
 
 def irgb_from_xyz (xyz):
     '''Convert an xyz color directly into a displayable irgb color.'''
-    return irgb_from_rgb (rgb_from_xyz (xyz))
+    return get_color_space().irgb_from_xyz (xyz)
 
 def irgb_string_from_xyz (xyz):
     '''Convert an xyz color directly into a displayable irgb color hex string.'''
-    return irgb_string_from_rgb (rgb_from_xyz (xyz))
+    return get_color_space().irgb_string_from_xyz (xyz)
 
 #
-# Initialization - Initialize to sRGB at module startup.
-#   If a different rgb model is needed, then the startup can be re-done to set the new conditions.
+# Color spaces - All of the settings that the conversions depend on, in one immutable object.
 #
 
-init()
-# Default conversions setup on module load
+# the settings, in the order of the ColorSpace() arguments
+_COLOR_SPACE_SETTINGS = (
+    'phosphor_red', 'phosphor_green', 'phosphor_blue', 'white_point', 'luv_lab_white_point',
+    'display_from_linear_function', 'linear_from_display_function', 'gamma', 'clip_method')
+
+def _read_only_color (color):
+    '''Get a read-only float copy of the color.'''
+    color = numpy.array (color, dtype=float)
+    color.flags.writeable = False
+    return color
+
+class ColorSpace (object):
+    '''An immutable set of all the settings that the conversions between color models depend on:
+    the display phosphors and white point (with the conversion matrices between xyz and rgb),
+    the Luv/Lab white point, the gamma correction (with its lookup tables), and the clipping method.
+
+    The methods are the conversion functions of this module, which use the default color space.
+    As a color space never changes, several can be used at once, from any number of threads.'''
+    __slots__ = _COLOR_SPACE_SETTINGS + (
+        'xyz_from_rgb_matrix', 'rgb_from_xyz_matrix',
+        'reference_white', 'reference_u_prime', 'reference_v_prime',
+        '_display_from_linear', '_display_from_linear_array',
+        '_linear_from_display', '_linear_from_display_array',
+        '_gamma_tables')
+
+    def __init__ (self,
+        phosphor_red   = SRGB_Red,
+        phosphor_green = SRGB_Green,
+        phosphor_blue  = SRGB_Blue,
+        white_point    = SRGB_White,
+        luv_lab_white_point = None,
+        display_from_linear_function = srgb_gamma_invert,
+        linear_from_display_function = srgb_gamma_correct,
+        gamma = STANDARD_GAMMA,
+        clip_method = CLIP_ADD_WHITE):
+        if clip_method not in _CLIP_METHODS:
+            raise ValueError('Invalid color clipping method %s' % (str(clip_method)))
+        if luv_lab_white_point is None:
+            luv_lab_white_point = white_point
+        settings = {
+            'phosphor_red'   : _read_only_color (phosphor_red),
+            'phosphor_green' : _read_only_color (phosphor_green),
+            'phosphor_blue'  : _read_only_color (phosphor_blue),
+            'white_point'    : _read_only_color (white_point),
+            'luv_lab_white_point' : _read_only_color (luv_lab_white_point),
+            'display_from_linear_function' : display_from_linear_function,
+            'linear_from_display_function' : linear_from_display_function,
+            'gamma'       : gamma,
+            'clip_method' : clip_method,
+        }
+        # conversions between xyz and rgb - see [Foley/Van Dam, p.587, eqn 13.27, 13.29] and [Hall, p. 239]
+        (phosphor_red, phosphor_green, phosphor_blue) = (
+            settings ['phosphor_red'], settings ['phosphor_green'], settings ['phosphor_blue'])
+        phosphor_matrix = numpy.column_stack ((phosphor_red, phosphor_green, phosphor_blue))
+        # normalize white point to Y=1.0
+        normalized_white = numpy.array (white_point, dtype=float)
+        xyz_normalize_Y1 (normalized_white)
+        # Determine intensities of each phosphor by solving:
+        #     phosphor_matrix * intensity_vector = white_point
+        intensities = numpy.linalg.solve (phosphor_matrix, normalized_white)
+        # construct xyz_from_rgb matrix from the results
+        xyz_from_rgb_matrix = numpy.column_stack (
+            (phosphor_red   * intensities [0],
+             phosphor_green * intensities [1],
+             phosphor_blue  * intensities [2]))
+        # invert to get rgb_from_xyz matrix
+        rgb_from_xyz_matrix = numpy.linalg.inv (xyz_from_rgb_matrix)
+        xyz_from_rgb_matrix.flags.writeable = False
+        rgb_from_xyz_matrix.flags.writeable = False
+        settings ['xyz_from_rgb_matrix'] = xyz_from_rgb_matrix
+        settings ['rgb_from_xyz_matrix'] = rgb_from_xyz_matrix
+        # conversions between the (almost) perceptually uniform
+        # spaces (Luv, Lab) require the definition of a white point.
+        reference_white = numpy.array (luv_lab_white_point, dtype=float)
+        xyz_normalize_Y1 (reference_white)
+        reference_white.flags.writeable = False
+        settings ['reference_white'] = reference_white
+        (settings ['reference_u_prime'], settings ['reference_v_prime']) = uv_primes (reference_white)
+        # gamma correction, with lookup tables built on first use
+        (settings ['_display_from_linear'], settings ['_display_from_linear_array']) = _gamma_functions (
+            display_from_linear_function, gamma)
+        (settings ['_linear_from_display'], settings ['_linear_from_display_array']) = _gamma_functions (
+            linear_from_display_function, gamma)
+        settings ['_gamma_tables'] = {}
+        for (name, value) in settings.items():
+            object.__setattr__ (self, name, value)
+
+    def __setattr__ (self, name, value):
+        raise AttributeError ('ColorSpace is immutable, use replace() to get a changed copy')
+
+    def __delattr__ (self, name):
+        raise AttributeError ('ColorSpace is immutable, use replace() to get a changed copy')
+
+    def replace (self, **changes):
+        '''Get a new color space, with some of the settings (the arguments of ColorSpace()) changed.'''
+        for name in changes:
+            if name not in _COLOR_SPACE_SETTINGS:
+                raise TypeError ('Invalid ColorSpace setting %s' % (name))
+        settings = dict ((name, getattr (self, name)) for name in _COLOR_SPACE_SETTINGS)
+        settings.update (changes)
+        return ColorSpace (**settings)
+
+    def __reduce__ (self):
+        return (ColorSpace, tuple (getattr (self, name) for name in _COLOR_SPACE_SETTINGS))
+
+    def __repr__ (self):
+        return 'ColorSpace (white point %s, Luv/Lab white point %s, gamma %s %s, clip method %d)' % (
+            str (self.white_point), str (self.luv_lab_white_point),
+            self.display_from_linear_function.__name__, str (self.gamma), self.clip_method)
+
+    # Conversions between xyz and rgb colors.
+
+    def rgb_from_xyz (self, xyz, out=None):
+        '''Convert xyz color(s) to rgb.'''
+        return _transform_colors (self.rgb_from_xyz_matrix, xyz, out)
+
+    def xyz_from_rgb (self, rgb, out=None):
+        '''Convert rgb color(s) to xyz.'''
+        return _transform_colors (self.xyz_from_rgb_matrix, rgb, out)
+
+    def brightest_rgb_from_xyz (self, xyz, max_component=1.0, out=None):
+        '''Convert xyz color(s) to rgb, and scale each to maximum displayable brightness.'''
+        return _brightest_rgb (self.rgb_from_xyz (xyz, out=out), max_component)
+
+    # Conversions with the (nearly) perceptually uniform spaces Luv and Lab.
+
+    def luv_from_xyz (self, xyz):
+        '''Convert CIE XYZ to Luv.'''
+        if numpy.ndim (xyz) > 1:
+            return _luv_from_xyz_array (self, xyz)
+        y = xyz [1]
+        y_p = y / self.reference_white [1];       # actually reference_white [1] is probably always 1.0
+        (u_prime, v_prime) = uv_primes (xyz)
+        L = L_luminance (y_p)
+        u = 13.0 * L * (u_prime - self.reference_u_prime)
+        v = 13.0 * L * (v_prime - self.reference_v_prime)
+        luv = luv_color (L, u, v)
+        return luv
+
+    def xyz_from_luv (self, luv):
+        '''Convert Luv to CIE XYZ.  Inverse of luv_from_xyz().'''
+        if numpy.ndim (luv) > 1:
+            return _xyz_from_luv_array (self, luv)
+        L = luv [0]
+        u = luv [1]
+        v = luv [2]
+        # invert L_luminance() to get y
+        y = L_luminance_inverse (L)
+        if L != 0.0:
+            # color is not totally black
+            # get u_prime, v_prime
+            L13 = 13.0 * L
+            u_prime = self.reference_u_prime + (u / L13)
+            v_prime = self.reference_v_prime + (v / L13)
+            # get xyz color
+            xyz = uv_primes_inverse (u_prime, v_prime, y)
+        else:
+            # color is black
+            xyz = xyz_color (0.0, 0.0, 0.0)
+        return xyz
+
+    def lab_from_xyz (self, xyz):
+        '''Convert color from CIE XYZ to Lab.'''
+        if numpy.ndim (xyz) > 1:
+            return _lab_from_xyz_array (self, xyz)
+        x = xyz [0]
+        y = xyz [1]
+        z = xyz [2]
+
+        x_p = x / self.reference_white [0]
+        y_p = y / self.reference_white [1]
+        z_p = z / self.reference_white [2]
+
+        f_x = Lab_f (x_p)
+        f_y = Lab_f (y_p)
+        f_z = Lab_f (z_p)
+
+        L = L_luminance (y_p)
+        a = 500.0 * (f_x - f_y)
+        b = 200.0 * (f_y - f_z)
+        Lab = lab_color (L, a, b)
+        return Lab
+
+    def xyz_from_lab (self, Lab):
+        '''Convert color from Lab to CIE XYZ.  Inverse of lab_from_xyz().'''
+        if numpy.ndim (Lab) > 1:
+            return _xyz_from_lab_array (self, Lab)
+        L = Lab [0]
+        a = Lab [1]
+        b = Lab [2]
+        # invert L_luminance() to get y_p
+        y_p = L_luminance_inverse (L)
+        # calculate f_y
+        f_y = Lab_f (y_p)
+        # solve for f_x and f_z
+        f_x = f_y + (a / 500.0)
+        f_z = f_y - (b / 200.0)
+        # invert Lab_f() to get x_p and z_p
+        x_p = Lab_f_inverse (f_x)
+        z_p = Lab_f_inverse (f_z)
+        # multiply by reference white to get xyz
+        x = x_p * self.reference_white [0]
+        y = y_p * self.reference_white [1]
+        z = z_p * self.reference_white [2]
+        xyz = xyz_color (x, y, z)
+        return xyz
+
+    # Gamma correction.
+
+    def display_from_linear_component (self, x):
+        '''Gamma correct the linear component value(s) x into displayable values.'''
+        if numpy.ndim (x) != 0:
+            return self._display_from_linear_array (x)
+        return self._display_from_linear (x)
+
+    def linear_from_display_component (self, x):
+        '''Convert the displayable component value(s) x into linear values.'''
+        if numpy.ndim (x) != 0:
+            return self._linear_from_display_array (x)
+        return self._linear_from_display (x)
+
+    def _get_gamma_tables (self, bits):
+        '''Get the (encoding thresholds, decoding table) for data with the given number of bits.'''
+        if bits not in _GAMMA_TABLE_BITS:
+            raise ValueError ('Gamma tables are available for 8 or 16 bits, not %s' % (str (bits)))
+        tables = self._gamma_tables.get (bits)
+        if tables is None:
+            with _init_lock:
+                tables = self._gamma_tables.get (bits)
+                if tables is None:
+                    tables = _build_gamma_tables (self, bits)
+                    self._gamma_tables [bits] = tables
+        return tables
+
+    def _get_gamut_boundary (self):
+        '''Get the table of the largest chroma in the gamut, for each lightness and hue, for CLIP_COMPRESS_CHROMA.'''
+        # the table only depends on the conversions with xyz and Lab, and is shared by all color spaces with them
+        key = (self.rgb_from_xyz_matrix.tobytes(), self.reference_white.tobytes())
+        boundary = _gamut_boundaries.get (key)
+        if boundary is None:
+            with _init_lock:
+                boundary = _gamut_boundaries.get (key)
+                if boundary is None:
+                    boundary = _build_gamut_boundary (self)
+                    if len (_gamut_boundaries) >= _GAMUT_CACHE_SIZE:
+                        _gamut_boundaries.clear()
+                    _gamut_boundaries [key] = boundary
+        return boundary
+
+    def gamma_encode (self, linear, bits = 8):
+        '''Convert an array of linear values into displayable integer codes, by table lookup.'''
+        (encode, decode) = self._get_gamma_tables (bits)
+        linear = numpy.asarray (linear, dtype=float)
+        codes = _encode_with_tables (encode, linear,
+            numpy.empty (linear.shape, numpy.intp), numpy.empty (linear.shape), numpy.empty (linear.shape, numpy.intp),
+            numpy.empty (linear.shape), numpy.empty (linear.shape, bool))
+        return codes.astype (_GAMMA_TABLE_BITS [bits])
+
+    def gamma_decode (self, codes, bits = 8):
+        '''Convert an array of displayable integer codes into linear values, by table lookup.'''
+        (encode, decode) = self._get_gamma_tables (bits)
+        codes = numpy.asarray (codes)
+        if codes.dtype.kind not in 'ui':
+            raise ValueError ('Expecting integer codes for gamma_decode(), got %s' % (str (codes.dtype)))
+        if codes.size != 0 and (codes.min() < 0 or codes.max() >= len (decode)):
+            raise ValueError ('Expecting codes in the range 0 - %d for %d bits, got %s - %s' % (
+                len (decode) - 1, bits, str (codes.min()), str (codes.max())))
+        return numpy.take (decode, codes)
+
+    # Color clipping, and conversions between rgb and displayable irgb colors.
+
+    def clip_rgb_color (self, rgb_color):
+        '''Convert a linear rgb color (nominal range 0.0 - 1.0), into a displayable
+        irgb color with values in the range (0 - 255), clipping as necessary.
+
+        The return value is a tuple, the first element is the clipped irgb color,
+        and the second element is a tuple indicating which (if any) clipping processes were used.
+        '''
+        clipped_chromaticity = False
+        clipped_intensity = False
+
+        rgb = rgb_color.copy()
+
+        # clip chromaticity if needed (negative rgb values)
+        if self.clip_method == CLIP_CLAMP_TO_ZERO:
+            # set negative rgb values to zero
+            if rgb [0] < 0.0:
+                rgb [0] = 0.0
+                clipped_chromaticity = True
+            if rgb [1] < 0.0:
+                rgb [1] = 0.0
+                clipped_chromaticity = True
+            if rgb [2] < 0.0:
+                rgb [2] = 0.0
+                clipped_chromaticity = True
+        elif self.clip_method == CLIP_ADD_WHITE:
+            # add enough white to make all rgb values nonnegative
+            # find max negative rgb (or 0.0 if all non-negative), we need that much white
+            rgb_min = min (0.0, min (rgb))
+            # get max positive component
+            rgb_max = max (rgb)
+            # get scaling factor to maintain max rgb after adding white
+            scaling = 1.0
+            if rgb_max > 0.0:
+                scaling = rgb_max / (rgb_max - rgb_min)
+            # add enough white to cancel this out, maintaining the maximum of rgb
+            if rgb_min < 0.0:
+                rgb [0] = scaling * (rgb [0] - rgb_min);
+                rgb [1] = scaling * (rgb [1] - rgb_min);
+                rgb [2] = scaling * (rgb [2] - rgb_min);
+                clipped_chromaticity = True
+        elif self.clip_method == CLIP_COMPRESS_CHROMA:
+            # reduce the chroma of the color to that of the gamut boundary, if it is outside
+            if min (rgb) < 0.0:
+                rgb = _compress_chroma (self, rgb [numpy.newaxis, :]) [0]
+                clipped_chromaticity = True
+        else:
+            raise ValueError('Invalid color clipping method %s' % (str(self.clip_method)))
+
+        # clip intensity if needed (rgb values > 1.0) by scaling
+        rgb_max = max (rgb)
+        # we actually don't overflow until 255.0 * intensity > 255.5, so instead of 1.0 use ...
+        intensity_cutoff = 1.0 + (0.5 / 255.0)
+        if rgb_max > intensity_cutoff:
+            # must scale intensity, so max value is intensity_cutoff
+            scaling = intensity_cutoff / rgb_max
+            rgb *= scaling
+            clipped_intensity = True
+
+        # gamma correction
+        for index in range (0, 3):
+            rgb [index] = self._display_from_linear (rgb [index])
+
+        # scale to 0 - 255
+        ir = round (255.0 * rgb [0])
+        ig = round (255.0 * rgb [1])
+        ib = round (255.0 * rgb [2])
+        # ensure that values are in the range 0-255
+        ir = min (255, max (0, ir))
+        ig = min (255, max (0, ig))
+        ib = min (255, max (0, ib))
+        irgb = irgb_color (ir, ig, ib)
+        return (irgb, (clipped_chromaticity, clipped_intensity))
+
+    def clip_rgb_colors (self, rgb_colors):
+        '''Clip an array of linear rgb colors, of shape (..., 3), as clip_rgb_color() does,
+        and convert to an array of 8-bit displayable irgb colors.
+        Returns (irgbs, (clipped_chromaticity, clipped_intensity), (num_chromaticity, num_intensity)).'''
+        (rgb, clipped_chromaticity, clipped_intensity) = _clip_rgb_array (self, rgb_colors)
+        # gamma correction, scale to 0 - 255, and ensure that values are in the range 0-255
+        irgbs = self.gamma_encode (rgb, 8)
+        num_chromaticity = int (numpy.count_nonzero (clipped_chromaticity))
+        num_intensity = int (numpy.count_nonzero (clipped_intensity))
+        return (irgbs, (clipped_chromaticity, clipped_intensity), (num_chromaticity, num_intensity))
+
+    def clipped_rgb_from_rgb (self, rgb_colors):
+        '''Clip an array of linear rgb colors, but return the clipped linear rgb colors, without gamma correction.'''
+        (rgb, clipped_chromaticity, clipped_intensity) = _clip_rgb_array (self, rgb_colors)
+        return rgb
+
+    def irgb_from_rgb (self, rgb):
+        '''Convert (linear) rgb color(s) (range 0.0 - 1.0) into 0-255 displayable integer irgb color(s).'''
+        if numpy.ndim (rgb) > 1:
+            (irgbs, clipped, counts) = self.clip_rgb_colors (rgb)
+            return irgbs
+        result = self.clip_rgb_color (rgb)
+        (irgb, (clipped_chrom,clipped_int)) = result
+        return irgb
+
+    def rgb_from_irgb (self, irgb):
+        '''Convert displayable (gamma corrected) irgb color(s) (range 0 - 255) into linear rgb color(s) (range 0.0 - 1.0).'''
+        if numpy.ndim (irgb) > 1:
+            irgb = numpy.asarray (irgb)
+            if irgb.dtype.kind in 'ui':
+                return self.gamma_decode (irgb, 8)
+            return self._linear_from_display_array (irgb / 255.0)
+        # scale to 0.0 - 1.0
+        r0 = float (irgb [0]) / 255.0
+        g0 = float (irgb [1]) / 255.0
+        b0 = float (irgb [2]) / 255.0
+        # gamma adjustment
+        r = self._linear_from_display (r0)
+        g = self._linear_from_display (g0)
+        b = self._linear_from_display (b0)
+        rgb = rgb_color (r, g, b)
+        return rgb
+
+    def irgb_string_from_rgb (self, rgb):
+        '''Clip the rgb color, convert to a displayable color, and convert to a hex string.'''
+        return irgb_string_from_irgb (self.irgb_from_rgb (rgb))
+
+    def irgb_from_xyz (self, xyz):
+        '''Convert xyz color(s) directly into displayable irgb color(s).'''
+        return self.irgb_from_rgb (self.rgb_from_xyz (xyz))
+
+    def irgb_string_from_xyz (self, xyz):
+        '''Convert an xyz color directly into a displayable irgb color hex string.'''
+        return self.irgb_string_from_rgb (self.rgb_from_xyz (xyz))
+
+# Fused conversion of arrays of xyz colors to displayable irgb colors.
+
+DEFAULT_TRANSFORM_CHUNK_SIZE = 4096
+
+class DisplayTransform (object):
+    '''Converts arrays of xyz colors directly into 8-bit displayable irgb colors, as irgb_from_xyz() does,
+    in a single pass over fixed size chunks of colors, reusing the same scratch arrays for every chunk.
+
+    The conversion matrix, clipping method and gamma tables are those of the color space
+    (by default, the default color space when the transform is created).
+    The scratch arrays make a transform unsafe to share between threads.'''
+    __slots__ = ('chunk_size', 'clip_method', '_color_space', '_matrix', '_encode',
+        '_rgb', '_min', '_max', '_denom', '_scale', '_mask', '_mask2',
+        '_codes', '_position', '_cell', '_work', '_flags')
+
+    def __init__ (self, chunk_size = DEFAULT_TRANSFORM_CHUNK_SIZE, color_space = None):
+        if color_space is None:
+            color_space = get_color_space()
+        self.chunk_size = chunk_size
+        self.clip_method = color_space.clip_method
+        self._color_space = color_space
+        self._matrix = numpy.ascontiguousarray (color_space.rgb_from_xyz_matrix.T)
+        (self._encode, decode) = color_space._get_gamma_tables (8)
+        # scratch arrays for one chunk
+        self._rgb      = numpy.empty ((chunk_size, 3))
+        self._min      = numpy.empty ((chunk_size, 1))
+        self._max      = numpy.empty ((chunk_size, 1))
+        self._denom    = numpy.empty ((chunk_size, 1))
+        self._scale    = numpy.empty ((chunk_size, 1))
+        self._mask     = numpy.empty ((chunk_size, 1), bool)
+        self._mask2    = numpy.empty ((chunk_size, 1), bool)
+        self._codes    = numpy.empty ((chunk_size, 3), numpy.intp)
+        self._position = numpy.empty ((chunk_size, 3))
+        self._cell     = numpy.empty ((chunk_size, 3), numpy.intp)
+        self._work     = numpy.empty ((chunk_size, 3))
+        self._flags    = numpy.empty ((chunk_size, 3), bool)
+
+    def __call__ (self, xyz, out = None):
+        '''Convert the array of xyz colors, of shape (..., 3), into numpy.uint8 irgb colors of the same shape.
+        If out is given, the result is put into it and returned.'''
+        xyz = numpy.asarray (xyz)
+        if xyz.shape [-1:] != (3,):
+            raise ValueError ('Expecting xyz colors of shape (..., 3), got shape %s' % (str (xyz.shape)))
+        if out is None:
+            out = numpy.empty (xyz.shape, numpy.uint8)
+        elif out.shape != xyz.shape or out.dtype != numpy.uint8:
+            raise ValueError ('Expecting out as a numpy.uint8 array of shape %s' % (str (xyz.shape)))
+        xyz_rows = xyz.reshape (-1, 3)
+        if not out.flags.c_contiguous:
+            raise ValueError ('Expecting out to be a contiguous array')
+        out_rows = out.reshape (-1, 3)
+        for start in range (0, len (xyz_rows), self.chunk_size):
+            stop = min (start + self.chunk_size, len (xyz_rows))
+            self._convert_chunk (xyz_rows [start:stop], out_rows [start:stop])
+        return out
+
+    def _convert_chunk (self, xyz, out):
+        '''Convert one chunk of xyz colors, of shape (n, 3), into out.'''
+        n = len (xyz)
+        rgb = self._rgb [:n]
+        rgb_min = self._min [:n]
+        rgb_max = self._max [:n]
+        denom = self._denom [:n]
+        scale = self._scale [:n]
+        mask = self._mask [:n]
+        mask2 = self._mask2 [:n]
+        numpy.matmul (xyz, self._matrix, out=rgb)
+        # clip chromaticity if needed (negative rgb values)
+        if self.clip_method == CLIP_CLAMP_TO_ZERO:
+            numpy.maximum (rgb, 0.0, out=rgb)
+        elif self.clip_method == CLIP_COMPRESS_CHROMA:
+            # the gamut mapping allocates arrays, but only for the colors outside of the gamut
+            outside = numpy.any (rgb < 0.0, axis=1)
+            if numpy.any (outside):
+                rgb [outside] = _compress_chroma (self._color_space, rgb [outside])
+        else:
+            # add enough white to make all rgb values nonnegative, maintaining the maximum of rgb
+            # (colors without negative values are shifted by zero, and scaled by 1.0, so are unchanged)
+            numpy.minimum (rgb [:, 0:1], rgb [:, 1:2], out=rgb_min)
+            numpy.minimum (rgb_min, rgb [:, 2:3], out=rgb_min)
+            numpy.minimum (rgb_min, 0.0, out=rgb_min)
+            numpy.maximum (rgb [:, 0:1], rgb [:, 1:2], out=rgb_max)
+            numpy.maximum (rgb_max, rgb [:, 2:3], out=rgb_max)
+            numpy.subtract (rgb_max, rgb_min, out=denom)
+            numpy.less (rgb_min, 0.0, out=mask)
+            numpy.greater (rgb_max, 0.0, out=mask2)
+            mask &= mask2
+            scale.fill (1.0)
+            numpy.divide (rgb_max, denom, out=scale, where=mask)
+            rgb -= rgb_min
+            rgb *= scale
+        # clip intensity if needed (rgb values > 1.0) by scaling
+        intensity_cutoff = 1.0 + (0.5 / 255.0)
+        numpy.maximum (rgb [:, 0:1], rgb [:, 1:2], out=rgb_max)
+        numpy.maximum (rgb_max, rgb [:, 2:3], out=rgb_max)
+        numpy.greater (rgb_max, intensity_cutoff, out=mask)
+        scale.fill (1.0)
+        numpy.divide (intensity_cutoff, rgb_max, out=scale, where=mask)
+        rgb *= scale
+        # gamma correction, and scale to 0 - 255
+        codes = _encode_with_tables (self._encode, rgb, self._codes [:n],
+            self._position [:n], self._cell [:n], self._work [:n], self._flags [:n])
+        numpy.copyto (out, codes, casting='unsafe')
+
+#
+# Initialization - Initialize to sRGB on first use (see _ensure_init() above).
+#   If a different rgb model is needed, then init() can be called to set the new conditions.
+#
@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 '''
 massage_CIEXYZ.py - Convert CIE XYZ tables (1931 matching functions, D65)
-into appropriate Python syntax to be inserted into ColorPy.
+into appropriate Python syntax to be inserted into ColorPy,
+and into the binary NumPy (.npy) tables that ColorPy loads at startup.
 
 This was used in developing ColorPy.
+Run it from this directory to regenerate the .npy tables after changing the source data.
 
 References:
 
@@ -52,6 +54,8 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
+import numpy
+
 # Conversions for data (5 nm increments) from CIE website:
 #   http://www.cie.co.at/main/freepubs.html
 #   http://www.cie.co.at/publ/abst/datatables15_2004/x2.txt
@@ -86,10 +90,9 @@ def create_CIE_XYZ_1931_table_5nm ():
     dict_y = read_CIE_file (CIE_y)
     dict_z = read_CIE_file (CIE_z)
     # get keys
-    keys = dict_x.keys()   # all should be the same
-    keys.sort()
+    keys = sorted (dict_x.keys())   # all should be the same
     msgs.append ('_CIEXYZ_1931_table = [\n')
-    for i in xrange (0, len (keys)):
+    for i in range (0, len (keys)):
         ikey = keys [i]
         wl_nm = ikey
         x = dict_x [ikey]
@@ -124,7 +127,7 @@ def create_CVRL_XYZ_1931_table_1nm ():
     lines = f.readlines()
     f.close()
     msgs.append ('_CIEXYZ_1931_table = [\n')
-    for i in xrange (0, len (lines)):
+    for i in range (0, len (lines)):
         iline = lines [i].rstrip()
         sep = ','
         if i == len (lines)-1:
@@ -150,7 +153,7 @@ def create_CVRL_D65_table_1nm ():
     lines = f.readlines()
     f.close()
     msgs.append ('_Illuminant_D65_table = [\n')
-    for i in xrange (0, len (lines)):
+    for i in range (0, len (lines)):
         iline = lines [i].rstrip()
         sep = ','
         if i == len (lines)-1:
@@ -167,13 +170,37 @@ def doit_CVRL_D65_table_1nm ():
     f.writelines (msgs)
     f.close()
 
+# Binary tables, loaded by ciexyz.py and illuminants.py.
+# Each row is the wavelength (nm), followed by the value(s) at that wavelength.
+
+CIEXYZ_1931_TABLE_NPY    = 'CIEXYZ_1931_table.npy'
+ILLUMINANT_D65_TABLE_NPY = 'Illuminant_D65_table.npy'
+
+def create_npy_table (filename, num_cols):
+    '''Read a comma separated CVRL table into a 2D float array.'''
+    # some of the files end with a DOS end-of-file (Ctrl-Z) character, ignore it
+    table = numpy.loadtxt (filename, delimiter=',', comments='\x1a', ndmin=2)
+    assert table.shape [1] == num_cols, 'Expecting %d columns in %s, got %d' % (num_cols, filename, table.shape [1])
+    return table
+
+def doit_npy_tables ():
+    '''Write the 1931 matching functions and D65 as .npy files.'''
+    table_xyz = create_npy_table ('ciexyz31_1.txt', 4)
+    numpy.save (CIEXYZ_1931_TABLE_NPY, table_xyz)
+    print ('Saved %s with shape %s' % (CIEXYZ_1931_TABLE_NPY, str (table_xyz.shape)))
+    table_D65 = create_npy_table ('Illuminantd65.txt', 2)
+    numpy.save (ILLUMINANT_D65_TABLE_NPY, table_D65)
+    print ('Saved %s with shape %s' % (ILLUMINANT_D65_TABLE_NPY, str (table_D65.shape)))
+
 # Main - perform all of the conversions.
-# The resulting source files are manually incorporated into the ColorPy code.
+# The resulting Python source files were manually incorporated into the ColorPy code,
+# the .npy files are used as is.
 
 def main ():
     doit_CIE_XYZ_1931_5nm ()
     doit_CVRL_XYZ_1931_table_1nm ()
     doit_CVRL_D65_table_1nm ()
+    doit_npy_tables ()
 
 
 if __name__ == '__main__':
@@ -9,8 +9,8 @@ This can also create the figures with some non-default initialization conditions
 
 Functions:
 
-figures() -
-    Create all the sample figures.
+figures (color_space = None) -
+    Create all the sample figures, with the colormodels.ColorSpace (sRGB by default).
 
 figures_clip_clamp_to_zero () -
     Adjust the color clipping method, and create the sample figures.
@@ -50,10 +50,12 @@ import rayleigh
 import thinfilm
 import misc
 
-def figures ():
-    '''Create all the ColorPy sample figures.'''
+def figures (color_space = None):
+    '''Create all the ColorPy sample figures, with the color space (sRGB by default).'''
     # no figures for colormodels and ciexyz
-    colormodels.init()  # default
+    if color_space is None:
+        color_space = colormodels.ColorSpace()  # default
+    colormodels.set_color_space (color_space)
     illuminants.figures()
     plots.figures()
     blackbody.figures()
@@ -63,24 +65,18 @@ def figures ():
 
 def figures_clip_clamp_to_zero ():
     '''Adjust the color clipping method, and create the sample figures.'''
-    colormodels.init()
-    colormodels.init_clipping (colormodels.CLIP_CLAMP_TO_ZERO)
-    figures()
+    figures (colormodels.ColorSpace (clip_method = colormodels.CLIP_CLAMP_TO_ZERO))
 
 def figures_gamma_245 ():
     '''Adjust the gamma correction to a power law gamma = 2.45 and create samples.'''
-    colormodels.init()
-    colormodels.init_gamma_correction (
+    figures (colormodels.ColorSpace (
         display_from_linear_function = colormodels.simple_gamma_invert,
         linear_from_display_function = colormodels.simple_gamma_correct,
-        gamma = 2.45)
-    figures()
+        gamma = 2.45))
 
 def figures_white_A ():
     '''Adjust the white point (for Luv/Lab) and create sample figures.'''
-    colormodels.init()
-    colormodels.init_Luv_Lab_white_point (colormodels.WhiteA)
-    figures()
+    figures (colormodels.ColorSpace (luv_lab_white_point = colormodels.WhiteA))
 
 
 if __name__ == '__main__':
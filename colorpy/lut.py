@@ -0,0 +1,320 @@
+'''
+lut.py - Three dimensional lookup tables for fast color conversions.
+
+Description:
+
+A conversion chain of colormodels functions, such as xyz -> rgb -> clipping,
+is sampled once at the points of an N x N x N lattice over a box of input colors.
+The lookup table is then applied to arrays of colors by interpolating between the lattice points,
+which is much faster than evaluating the chain, and gives nearly the same results.
+
+Two interpolations are available:
+
+Trilinear - Each value is blended from the 8 corners of the lattice cell that holds the color.
+
+Tetrahedral - Each cell is split into 6 tetrahedra along its main diagonal, and each value is
+    blended from the 4 corners of the tetrahedron that holds the color.  This needs half as many
+    table lookups as trilinear interpolation, is exact for any linear conversion (such as rgb_from_xyz),
+    and is the usual choice for color lookup tables.
+
+Colors outside of the box are clamped to the box, and colors with a NaN component give zero.
+The conversion chain is sampled with the settings (conversion matrix, clipping method) of a
+colormodels.ColorSpace, by default the default color space when the table is built.  The interpolation error, against the exact chain, is found with lut_error().
+
+For conversions to displayable irgb colors, the table holds the clipped linear rgb colors,
+and the gamma correction is done afterwards, exactly, by the gamma_encode() of the color space.
+The gamma curve is very steep near zero, so interpolating after it would give large errors
+for colors with one small rgb component.
+
+A table can be saved to a single .npy file, and loaded back as a read-only memory map,
+so that it is built once, and shared by all of the worker processes that load it.
+
+Constants:
+
+INTERP_TRILINEAR   = 0
+INTERP_TETRAHEDRAL = 1
+    Available interpolation methods.  Tetrahedral is the default.
+
+DEFAULT_LUT_SIZE = 33
+    Default number of lattice points along each axis.
+
+Functions:
+
+class ColorLUT (table, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0)) -
+    A lookup table.  The attributes are:
+    table      - array of shape (N, N, N, C), the output values (C of them) at each lattice point.
+    domain_min - the input color at the first lattice point, table [0, 0, 0].
+    domain_max - the input color at the last lattice point, table [-1, -1, -1].
+
+On these class objects, the following functions are available:
+
+apply (colors, method = INTERP_TETRAHEDRAL, out = None) -
+    Interpolate the table at an array of colors, of shape (..., 3).
+    The result has shape (..., C).  If out is given, the result is put into that array.
+
+irgb (colors, method = INTERP_TETRAHEDRAL, color_space = None) -
+    For a table of linear rgb colors, such as display_lut() builds, interpolate and
+    convert to 8-bit irgb colors (range 0 - 255), with the gamma_encode() of the color space
+    (by default, the default color space).
+
+save (filename) -
+    Save the table to a .npy file.
+
+ColorLUT.load (filename, mmap = True) -
+    Load a table saved by save().  By default, the table is a read-only memory map of the file.
+
+build_lut (function, size = DEFAULT_LUT_SIZE, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0), dtype = float) -
+    Sample function, which converts an array of colors of shape (M, 3) into an array
+    of shape (M, C), at the size x size x size lattice points spanning the box.
+
+display_lut (space = 'xyz', size = DEFAULT_LUT_SIZE, color_space = None) -
+    Build a lookup table from xyz (or 'lab') colors to clipped linear rgb colors,
+    the chain of irgb_from_xyz() before gamma correction, over the default domain for the space.
+    The table's irgb() then gives nearly the same colors as irgb_from_xyz().
+    The conversions are those of the color space, by default the default color space.
+
+display_function (space = 'xyz', color_space = None) -
+    Get the exact conversion function that display_lut() samples, for lut_error().
+
+lut_error (lut, function, colors = None, num_samples = 100000, method = INTERP_TETRAHEDRAL) -
+    Measure the interpolation error of the table, against the exact conversion function.
+    The errors are found at the given colors, or at num_samples random colors in the domain.
+    The return value is a tuple (max_error, rms_error, worst_color), of the absolute errors
+    over all the output values, and the color with the largest error.
+
+License:
+
+Copyright (C) 2008 Mark Kness
+
+Author - Mark Kness - mkness@alumni.utexas.net
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+import numpy
+
+import colormodels
+
+# available interpolation methods
+INTERP_TRILINEAR   = 0
+INTERP_TETRAHEDRAL = 1
+
+DEFAULT_LUT_SIZE = 33
+
+# Colors are interpolated in chunks of this many, to keep the temporary arrays small.
+_CHUNK_SIZE = 65536
+
+# Default domains for display_lut(), which cover the colors that are displayable,
+# and the conversion chains from each space to clipped linear rgb colors.
+_DISPLAY_DOMAINS = {
+    'xyz' : ((0.0, 0.0, 0.0), (1.0, 1.0, 1.1)),
+    'lab' : ((0.0, -128.0, -128.0), (100.0, 128.0, 128.0)),
+}
+
+def _clipped_rgb_from_xyz (color_space, xyz):
+    return color_space.clipped_rgb_from_rgb (color_space.rgb_from_xyz (xyz))
+
+def _clipped_rgb_from_lab (color_space, lab):
+    return color_space.clipped_rgb_from_rgb (color_space.rgb_from_xyz (color_space.xyz_from_lab (lab)))
+
+_DISPLAY_FUNCTIONS = {
+    'xyz' : _clipped_rgb_from_xyz,
+    'lab' : _clipped_rgb_from_lab,
+}
+
+class ColorLUT (object):
+    '''A three dimensional lookup table, over a box of input colors.'''
+    __slots__ = ('table', 'domain_min', 'domain_max', '_flat', '_scale', '_strides')
+
+    def __init__ (self, table, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0)):
+        table = numpy.asarray (table)
+        if table.ndim != 4 or table.shape [0] < 2 or table.shape [0:3] != (table.shape [0],) * 3:
+            raise ValueError ('Expecting a table of shape (N, N, N, C), with N >= 2, got shape %s' % (str (table.shape)))
+        self.table = table
+        self.domain_min = numpy.array (domain_min, dtype=float)
+        self.domain_max = numpy.array (domain_max, dtype=float)
+        if self.domain_min.shape != (3,) or self.domain_max.shape != (3,) or not numpy.all (self.domain_max > self.domain_min):
+            raise ValueError ('Invalid lookup table domain %s - %s' % (str (domain_min), str (domain_max)))
+        size = table.shape [0]
+        # the table is read one row (of C values) at a time
+        self._flat = numpy.ascontiguousarray (table).reshape (size * size * size, table.shape [3])
+        self._scale = (size - 1) / (self.domain_max - self.domain_min)
+        self._strides = numpy.array ([size * size, size, 1], dtype=numpy.intp)
+
+    @property
+    def size (self):
+        return self.table.shape [0]
+
+    def apply (self, colors, method = INTERP_TETRAHEDRAL, out = None):
+        '''Interpolate the table at an array of colors, of shape (..., 3), giving an array of shape (..., C).'''
+        if method not in (INTERP_TRILINEAR, INTERP_TETRAHEDRAL):
+            raise ValueError ('Invalid interpolation method %s' % (str (method)))
+        colors = numpy.asarray (colors, dtype=float)
+        if colors.shape [-1:] != (3,):
+            raise ValueError ('Expecting colors of shape (..., 3), got shape %s' % (str (colors.shape)))
+        shape = colors.shape [:-1] + (self.table.shape [3],)
+        if out is None:
+            out = numpy.empty (shape)
+        elif out.shape != shape or not out.flags.c_contiguous:
+            raise ValueError ('Expecting out to be a contiguous array of shape %s' % (str (shape)))
+        colors_2d = colors.reshape (-1, 3)
+        out_2d = out.reshape (-1, shape [-1])
+        for start in range (0, len (colors_2d), _CHUNK_SIZE):
+            stop = start + _CHUNK_SIZE
+            out_2d [start:stop] = self._interpolate (colors_2d [start:stop], method)
+        return out
+
+    def _interpolate (self, colors, method):
+        '''Interpolate the table at a 2D array of colors.'''
+        size = self.table.shape [0]
+        # position of each color along each axis in lattice units, the lattice cell that holds it,
+        # and the fraction of the way across the cell
+        base = numpy.zeros (len (colors), dtype=numpy.intp)
+        fractions = []
+        for axis in range (0, 3):
+            position = colors [:, axis] - self.domain_min [axis]
+            position *= self._scale [axis]
+            numpy.clip (position, 0.0, size - 1, out=position)
+            # NaN survives the clip, and would cast to a wild index
+            numpy.nan_to_num (position, copy=False, nan=0.0)
+            cell = position.astype (numpy.intp)
+            numpy.minimum (cell, size - 2, out=cell)
+            position -= cell
+            cell *= self._strides [axis]
+            base += cell
+            fractions.append (position)
+        (fx, fy, fz) = fractions
+        result = self._blend (base, fx, fy, fz, method)
+        # colors with a NaN component give zero (black), as irgb_from_xyz() does
+        invalid = numpy.isnan (colors).any (axis=1)
+        if invalid.any():
+            result [invalid] = 0.0
+        return result
+
+    def _blend (self, base, fx, fy, fz, method):
+        '''Blend the table corners around the base lattice points, by the fractions along each axis.'''
+        size = self.table.shape [0]
+        (sx, sy, sz) = (size * size, size, 1)
+        flat = self._flat
+        corner = lambda index: numpy.take (flat, index, axis=0)
+        if method == INTERP_TETRAHEDRAL:
+            # The tetrahedron is picked by the order of the fractions.  Walk from the base corner
+            # to the opposite one, first along the axis with the largest fraction, then the middle.
+            # Ties go to the first axis for the largest, and the last axis for the smallest.
+            fxy_max = numpy.maximum (fx, fy)
+            fxy_min = numpy.minimum (fx, fy)
+            f_max = numpy.maximum (fxy_max, fz)
+            f_min = numpy.minimum (fxy_min, fz)
+            f_mid = numpy.maximum (fxy_min, numpy.minimum (fxy_max, fz))
+            step_max = numpy.where (fx == f_max, sx, numpy.where (fy == f_max, sy, sz))
+            step_min = numpy.where (fz == f_min, sz, numpy.where (fy == f_min, sy, sx))
+            f_max = f_max [:, numpy.newaxis]
+            f_mid = f_mid [:, numpy.newaxis]
+            f_min = f_min [:, numpy.newaxis]
+            result = (1.0 - f_max) * corner (base)
+            result += (f_max - f_mid) * corner (base + step_max)
+            result += (f_mid - f_min) * corner (base + (sx + sy + sz) - step_min)
+            result += f_min * corner (base + (sx + sy + sz))
+            return result
+        # trilinear - blend along the last axis, then the middle, then the first
+        (fx, fy, fz) = (fx [:, numpy.newaxis], fy [:, numpy.newaxis], fz [:, numpy.newaxis])
+        def blend (index):
+            c0 = corner (index)
+            return c0 + fz * (corner (index + sz) - c0)
+        c00 = blend (base)
+        c01 = blend (base + sy)
+        c10 = blend (base + sx)
+        c11 = blend (base + sx + sy)
+        c0 = c00 + fy * (c01 - c00)
+        c1 = c10 + fy * (c11 - c10)
+        return c0 + fx * (c1 - c0)
+
+    def irgb (self, colors, method = INTERP_TETRAHEDRAL, color_space = None):
+        '''Interpolate a table of linear rgb colors, and convert to 8-bit irgb colors.'''
+        if color_space is None:
+            color_space = colormodels.get_color_space()
+        return color_space.gamma_encode (self.apply (colors, method), 8)
+
+    def save (self, filename):
+        '''Save the table to a .npy file, that load() can memory map.'''
+        record_type = numpy.dtype ([
+            ('domain', float, (2, 3)),
+            ('table', self.table.dtype, self.table.shape)])
+        record = numpy.zeros ((), record_type)
+        record ['domain'] = [self.domain_min, self.domain_max]
+        record ['table'] = self.table
+        numpy.save (filename, record)
+
+    @classmethod
+    def load (cls, filename, mmap = True):
+        '''Load a table saved by save().  By default, the table is a read-only memory map of the file.'''
+        record = numpy.load (filename, mmap_mode=('r' if mmap else None))
+        if record.dtype.names != ('domain', 'table'):
+            raise ValueError ('%s is not a saved lookup table' % (str (filename)))
+        domain = numpy.array (record ['domain'])
+        return cls (numpy.asarray (record ['table']), domain [0], domain [1])
+
+    def __repr__ (self):
+        return 'ColorLUT (%d x %d x %d lattice, %d values, domain %s - %s)' % (
+            self.size, self.size, self.size, self.table.shape [3], str (self.domain_min), str (self.domain_max))
+
+def build_lut (function, size = DEFAULT_LUT_SIZE, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0), dtype = float):
+    '''Sample the conversion function at the size x size x size lattice points spanning the box.
+
+    function should convert an array of colors, of shape (M, 3), into an array of shape (M, C).'''
+    if size < 2:
+        raise ValueError ('Lookup table size must be at least 2, got %s' % (str (size)))
+    domain_min = numpy.array (domain_min, dtype=float)
+    domain_max = numpy.array (domain_max, dtype=float)
+    axes = [numpy.linspace (domain_min [i], domain_max [i], size) for i in range (0, 3)]
+    lattice = numpy.stack (numpy.meshgrid (*axes, indexing='ij'), axis=-1).reshape (-1, 3)
+    values = numpy.asarray (function (lattice))
+    if values.ndim == 1:
+        values = values [:, numpy.newaxis]
+    table = values.reshape (size, size, size, values.shape [-1]).astype (dtype)
+    return ColorLUT (table, domain_min, domain_max)
+
+def display_lut (space = 'xyz', size = DEFAULT_LUT_SIZE, color_space = None):
+    '''Build a lookup table from xyz (or 'lab') colors to clipped linear rgb colors.'''
+    function = display_function (space, color_space)
+    (domain_min, domain_max) = _DISPLAY_DOMAINS [space]
+    return build_lut (function, size, domain_min, domain_max)
+
+def display_function (space = 'xyz', color_space = None):
+    '''Get the exact conversion function, from xyz (or 'lab') colors to clipped linear rgb colors,
+    that display_lut() samples.'''
+    if space not in _DISPLAY_FUNCTIONS:
+        raise ValueError ('Invalid color space %s, expecting one of %s' % (str (space), str (sorted (_DISPLAY_FUNCTIONS))))
+    if color_space is None:
+        color_space = colormodels.get_color_space()
+    function = _DISPLAY_FUNCTIONS [space]
+    return lambda colors: function (color_space, colors)
+
+def lut_error (lut, function, colors = None, num_samples = 100000, method = INTERP_TETRAHEDRAL):
+    '''Measure the interpolation error of the table against the exact conversion function.
+
+    The errors are found at the given colors, or at num_samples random colors in the domain.
+    The return value is a tuple (max_error, rms_error, worst_color).'''
+    if colors is None:
+        random = numpy.random.RandomState (0)
+        colors = random.uniform (lut.domain_min, lut.domain_max, (num_samples, 3))
+    colors = numpy.asarray (colors, dtype=float).reshape (-1, 3)
+    exact = numpy.asarray (function (colors), dtype=float).reshape (len (colors), -1)
+    errors = numpy.abs (lut.apply (colors, method).reshape (len (colors), -1) - exact)
+    color_errors = numpy.max (errors, axis=1)
+    worst = int (numpy.argmax (color_errors))
+    max_error = float (color_errors [worst])
+    rms_error = float (numpy.sqrt (numpy.mean (errors * errors)))
+    return (max_error, rms_error, colors [worst])
@@ -128,11 +128,10 @@ primary_names = [ 'Black', 'Red', 'Green', 'Blue', 'Yellow', 'Magenta', 'Cyan',
 
 def colorstring_patch_plot (colorstrings, color_names, title, filename, num_across=6):
     '''Color patch plot for colors specified as hex strings.'''
-    rgb_colors = []
-    for color in colorstrings:
-        irgb = colormodels.irgb_from_irgb_string (color)
-        rgb = colormodels.rgb_from_irgb (irgb)
-        rgb_colors.append (rgb)
+    (irgbs, invalid) = colormodels.irgbs_from_irgb_strings (colorstrings)
+    if len (invalid) > 0:
+        raise ValueError ('Invalid color hex strings at indices %s' % (str (list (invalid))))
+    rgb_colors = colormodels.rgb_from_irgb (irgbs)
     plots.rgb_patch_plot (
         rgb_colors,
         color_names,
@@ -279,9 +278,7 @@ def perceptually_uniform_spectral_colors (
     #xyz_from_uniform = colormodels.xyz_from_lab
 
     # convert colors to a nearly perceptually uniform space
-    uniforms = numpy.empty ((num_colors, 3))
-    for i in range (0, num_colors):
-        uniforms [i] = uniform_from_xyz (xyzs [i])
+    uniforms = uniform_from_xyz (xyzs)
     # determine spacing
     sum_ds = 0.0
     dss = numpy.empty ((num_colors, 1))
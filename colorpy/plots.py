@@ -229,11 +229,8 @@ def spectrum_subplot (spectrum):
     It is assumed that this function is being called by one that handles those things.'''
     (num_wl, num_cols) = spectrum.shape
     # get rgb colors for each wavelength
-    rgb_colors = numpy.empty ((num_wl, 3))
-    for i in range (0, num_wl):
-        wl_nm = spectrum [i][0]
-        xyz = ciexyz.xyz_from_wavelength (wl_nm)
-        rgb_colors [i] = colormodels.rgb_from_xyz (xyz)
+    xyzs = ciexyz.xyz_from_wavelength (spectrum [:,0])
+    rgb_colors = colormodels.rgb_from_xyz (xyzs)
     # scale to make brightest rgb value = 1.0
     rgb_max = numpy.max (rgb_colors)
     scaling = 1.0 / rgb_max
@@ -362,11 +359,8 @@ def visible_spectrum_plot ():
     spectrum = ciexyz.empty_spectrum()
     (num_wl, num_cols) = spectrum.shape
     # get rgb colors for each wavelength
-    rgb_colors = numpy.empty ((num_wl, 3))
-    for i in range (0, num_wl):
-        xyz = ciexyz.xyz_from_wavelength (spectrum [i][0])
-        rgb = colormodels.rgb_from_xyz (xyz)
-        rgb_colors [i] = rgb
+    xyzs = ciexyz.xyz_from_wavelength (spectrum [:,0])
+    rgb_colors = colormodels.rgb_from_xyz (xyzs)
     # scale to make brightest rgb value = 1.0
     rgb_max = numpy.max (rgb_colors)
     scaling = 1.0 / rgb_max
@@ -387,13 +381,10 @@ def cie_matching_functions_plot ():
     spectrum_x = ciexyz.empty_spectrum()
     spectrum_y = ciexyz.empty_spectrum()
     spectrum_z = ciexyz.empty_spectrum()
-    (num_wl, num_cols) = spectrum_x.shape
-    for i in range (0, num_wl):
-        wl_nm = spectrum_x [i][0]
-        xyz = ciexyz.xyz_from_wavelength (wl_nm)
-        spectrum_x [i][1] = xyz [0]
-        spectrum_y [i][1] = xyz [1]
-        spectrum_z [i][1] = xyz [2]
+    xyzs = ciexyz.xyz_from_wavelength (spectrum_x [:,0])
+    spectrum_x [:,1] = xyzs [:,0]
+    spectrum_y [:,1] = xyzs [:,1]
+    spectrum_z [:,1] = xyzs [:,2]
     # Plot three separate subplots, with CIE X in the first, CIE Y in the second, and CIE Z in the third.
     # Label appropriately for the whole plot.
     pylab.clf ()
@@ -423,12 +414,10 @@ def scattered_visual_brightness ():
     '''Plot the perceptual brightness of Rayleigh scattered light.'''
     # get 'spectra' for y matching functions and multiply by 1/wl^4
     spectrum_y = ciexyz.empty_spectrum()
-    (num_wl, num_cols) = spectrum_y.shape
-    for i in range (0, num_wl):
-        wl_nm = spectrum_y [i][0]
-        rayleigh = math.pow (550.0 / wl_nm, 4)
-        xyz = ciexyz.xyz_from_wavelength (wl_nm)
-        spectrum_y [i][1] = xyz [1] * rayleigh
+    wl_nm = spectrum_y [:,0]
+    rayleigh = numpy.power (550.0 / wl_nm, 4)
+    xyzs = ciexyz.xyz_from_wavelength (wl_nm)
+    spectrum_y [:,1] = xyzs [:,1] * rayleigh
     pylab.clf ()
     pylab.title ('Perceptual Brightness of Rayleigh Scattered Light')
     pylab.xlabel ('Wavelength (nm)')
@@ -571,14 +560,9 @@ def visible_spectrum_table (filename='visible_spectrum.html'):
     spectrum = ciexyz.empty_spectrum()
     (num_wl, num_cols) = spectrum.shape
     # get rgb colors for each wavelength
-    rgb_colors_1 = numpy.empty ((num_wl, 3))
-    rgb_colors_2 = numpy.empty ((num_wl, 3))
-    for i in range (0, num_wl):
-        xyz = ciexyz.xyz_from_wavelength (spectrum [i][0])
-        rgb_1 = colormodels.rgb_from_xyz (xyz)
-        rgb_2 = colormodels.brightest_rgb_from_xyz (xyz)
-        rgb_colors_1 [i] = rgb_1
-        rgb_colors_2 [i] = rgb_2
+    xyzs = ciexyz.xyz_from_wavelength (spectrum [:,0])
+    rgb_colors_1 = colormodels.rgb_from_xyz (xyzs)
+    rgb_colors_2 = colormodels.brightest_rgb_from_xyz (xyzs)
     # scale 1 to make brightest rgb value = 1.0
     rgb_max = numpy.max (rgb_colors_1)
     scaling = 1.0 / rgb_max
@@ -24,6 +24,7 @@ data_files = [
     'COPYING.LESSER.txt',
     'license.txt',
     'ColorPy.html',
+    'data/*.npy',
 ]
 
 long_description = '''
@@ -0,0 +1,225 @@
+'''
+spectrum.py - Compact storage for spectra, and batches of spectra, that share a wavelength axis.
+
+Description:
+
+A ColorPy spectrum, as returned by ciexyz.empty_spectrum(), is a 2D numpy array with
+two columns, the wavelength [nm] and the intensity.  Every such spectrum repeats the
+wavelength column, which doubles the memory needed for many spectra, and the intensities
+of a list of them are not contiguous.
+
+The classes here instead hold a single read-only wavelength axis, shared by all of the
+spectra with the same wavelengths, and a contiguous array of just the intensities.
+A SpectrumBatch of a million spectra then needs half the memory of the two-column arrays,
+and its colors are found with a single matrix product.
+
+Adapters are provided to convert to and from the two-column arrays, which the rest of
+ColorPy (the plots, for example) still uses.
+
+Functions:
+
+wavelength_axis (wavelengths = None) -
+    Get a shared, read-only 1D array of the wavelengths [nm].
+    If wavelengths is None, this is the wavelengths of ciexyz.empty_spectrum().
+    Equal wavelengths give the same array, as long as it is in use.
+
+class Spectrum (wavelengths = None, intensities = None) -
+    A single spectrum.  The attributes are:
+    wavelengths - 1D read-only array of the wavelengths [nm], shared with other spectra.
+    intensities - 1D contiguous array of the intensity at each wavelength.
+    If intensities is None, the spectrum is black (all zero).
+
+On these class objects, the following functions are available:
+
+Spectrum.from_array (spectrum) -
+    Create a Spectrum from a two-column ColorPy spectrum array.
+
+to_array () -
+    Get the two-column ColorPy spectrum array, as ciexyz.empty_spectrum() returns.
+
+xyz (integration = ciexyz.INTEGRATE_SAMPLED) -
+    Get the xyz color of the spectrum, as ciexyz.xyz_from_spectrum() does.
+
+copy () -
+    Get a copy of the spectrum, with its own intensities, and the same (shared) wavelengths.
+
+class SpectrumBatch (wavelengths = None, intensities = None, count = 0) -
+    A batch of spectra, all with the same wavelengths.  The attributes are:
+    wavelengths - 1D read-only array of the wavelengths [nm], shared with other spectra.
+    intensities - 2D contiguous array of the intensities, one row for each spectrum.
+    If intensities is None, the batch has count black (all zero) spectra.
+
+On these class objects, the following functions are available:
+
+SpectrumBatch.from_arrays (spectra) -
+    Create a SpectrumBatch from a list of two-column ColorPy spectrum arrays,
+    which must all have the same wavelengths.
+
+to_arrays () -
+    Get a list of the two-column ColorPy spectrum arrays.
+
+xyz (integration = ciexyz.INTEGRATE_SAMPLED) -
+    Get the xyz colors of all the spectra, as a 2D array with one row for each spectrum.
+
+batch [i] -
+    Get spectrum i of the batch, as a Spectrum whose intensities are a view into the batch.
+    A slice, batch [i:j], gives a SpectrumBatch that is a view into the batch.
+
+License:
+
+Copyright (C) 2008 Mark Kness
+
+Author - Mark Kness - mkness@alumni.utexas.net
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+import threading, weakref
+import numpy
+
+import ciexyz
+
+# Private - the wavelength axes in use, keyed by the wavelength values.
+# Entries go away when no spectrum refers to the axis any more.
+_axis_cache = weakref.WeakValueDictionary()
+_axis_lock = threading.Lock()
+
+def wavelength_axis (wavelengths = None):
+    '''Get a shared, read-only 1D array of the wavelengths [nm].
+
+    If wavelengths is None, this is the wavelengths of ciexyz.empty_spectrum().
+    Equal wavelengths give the same array, as long as it is in use.'''
+    if wavelengths is None:
+        wavelengths = ciexyz.empty_spectrum() [:,0]
+    wavelengths = numpy.asarray (wavelengths, dtype=float)
+    if wavelengths.ndim != 1:
+        raise ValueError ('Expecting a 1D array of wavelengths, got shape %s' % (str (wavelengths.shape)))
+    key = wavelengths.tobytes()
+    with _axis_lock:
+        axis = _axis_cache.get (key)
+        if axis is None:
+            axis = numpy.array (wavelengths)
+            axis.flags.writeable = False
+            _axis_cache [key] = axis
+    return axis
+
+def _intensity_array (intensities, shape):
+    '''Get the intensities as a contiguous float array, checking the shape.'''
+    intensities = numpy.ascontiguousarray (intensities, dtype=float)
+    if intensities.shape != shape:
+        raise ValueError ('Expecting intensities of shape %s, got shape %s' % (str (shape), str (intensities.shape)))
+    return intensities
+
+class Spectrum (object):
+    '''A single spectrum, with a shared wavelength axis.'''
+    __slots__ = ('wavelengths', 'intensities')
+
+    def __init__ (self, wavelengths = None, intensities = None):
+        self.wavelengths = wavelength_axis (wavelengths)
+        num_wl = len (self.wavelengths)
+        if intensities is None:
+            self.intensities = numpy.zeros (num_wl)
+        else:
+            self.intensities = _intensity_array (intensities, (num_wl,))
+
+    @classmethod
+    def from_array (cls, spectrum):
+        '''Create a Spectrum from a two-column ColorPy spectrum array.'''
+        return cls (spectrum [:,0], numpy.array (spectrum [:,1], dtype=float))
+
+    def to_array (self):
+        '''Get the two-column ColorPy spectrum array, as ciexyz.empty_spectrum() returns.'''
+        spectrum = numpy.empty ((len (self.wavelengths), 2))
+        spectrum [:,0] = self.wavelengths
+        spectrum [:,1] = self.intensities
+        return spectrum
+
+    def xyz (self, integration = ciexyz.INTEGRATE_SAMPLED):
+        '''Get the xyz color of the spectrum, as ciexyz.xyz_from_spectrum() does.'''
+        weights = ciexyz.get_xyz_weights (self.wavelengths, integration)
+        return numpy.dot (self.intensities, weights)
+
+    def copy (self):
+        '''Get a copy of the spectrum, with its own intensities, and the same (shared) wavelengths.'''
+        return _make_spectrum (self.wavelengths, self.intensities.copy())
+
+    def __len__ (self):
+        return len (self.wavelengths)
+
+    def __repr__ (self):
+        return 'Spectrum (%d wavelengths, %g - %g nm)' % (
+            len (self.wavelengths), self.wavelengths [0], self.wavelengths [-1])
+
+def _make_spectrum (wavelengths, intensities):
+    '''Make a Spectrum from an existing axis and intensity array, without checks or copies.'''
+    spectrum = Spectrum.__new__ (Spectrum)
+    spectrum.wavelengths = wavelengths
+    spectrum.intensities = intensities
+    return spectrum
+
+class SpectrumBatch (object):
+    '''A batch of spectra, all with the same shared wavelength axis.'''
+    __slots__ = ('wavelengths', 'intensities')
+
+    def __init__ (self, wavelengths = None, intensities = None, count = 0):
+        self.wavelengths = wavelength_axis (wavelengths)
+        num_wl = len (self.wavelengths)
+        if intensities is None:
+            self.intensities = numpy.zeros ((count, num_wl))
+        else:
+            intensities = numpy.asarray (intensities)
+            self.intensities = _intensity_array (intensities, (len (intensities), num_wl))
+
+    @classmethod
+    def from_arrays (cls, spectra):
+        '''Create a SpectrumBatch from a list of two-column ColorPy spectrum arrays,
+        which must all have the same wavelengths.'''
+        if len (spectra) == 0:
+            return cls()
+        wavelengths = spectra [0][:,0]
+        intensities = numpy.empty ((len (spectra), len (wavelengths)))
+        for i in range (0, len (spectra)):
+            if not numpy.array_equal (spectra [i][:,0], wavelengths):
+                raise ValueError ('Spectrum %d does not have the same wavelengths as the first' % (i))
+            intensities [i] = spectra [i][:,1]
+        return cls (wavelengths, intensities)
+
+    def to_arrays (self):
+        '''Get a list of the two-column ColorPy spectrum arrays.'''
+        return [self [i].to_array() for i in range (0, len (self))]
+
+    def xyz (self, integration = ciexyz.INTEGRATE_SAMPLED):
+        '''Get the xyz colors of all the spectra, as a 2D array with one row for each spectrum.'''
+        return ciexyz.xyz_from_spectra (self.wavelengths, self.intensities, integration)
+
+    def __len__ (self):
+        return len (self.intensities)
+
+    def __getitem__ (self, index):
+        '''Get a spectrum of the batch (or a batch, for a slice), whose intensities
+        are a view into the batch.'''
+        if isinstance (index, slice):
+            batch = SpectrumBatch.__new__ (SpectrumBatch)
+            batch.wavelengths = self.wavelengths
+            batch.intensities = self.intensities [index]
+            return batch
+        return _make_spectrum (self.wavelengths, self.intensities [index])
+
+    def __iter__ (self):
+        for i in range (0, len (self)):
+            yield self [i]
+
+    def __repr__ (self):
+        return 'SpectrumBatch (%d spectra, %d wavelengths)' % (len (self.intensities), len (self.wavelengths))
@@ -32,10 +32,13 @@ from __future__ import print_function
 import unittest
 
 import test_colormodels
+import test_colordiff
 import test_ciexyz
 import test_illuminants
+import test_lut
 import test_blackbody
 import test_rayleigh
+import test_spectrum
 import test_thinfilm
 
 def test ():
@@ -47,9 +50,12 @@ def test ():
     modules = [
         test_blackbody,
         test_ciexyz,
+        test_colordiff,
         test_colormodels,
         test_illuminants,
+        test_lut,
         test_rayleigh,
+        test_spectrum,
         test_thinfilm,
     ]
     for module in modules:
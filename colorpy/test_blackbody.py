@@ -136,6 +136,125 @@ class TestBlackbody(unittest.TestCase):
             if verbose:
                 print (msg)
 
+    def test_arrays(self, verbose=False):
+        ''' Test that the intensities, spectra and colors for arrays agree with single values. '''
+        wl_list = numpy.array ([0.0, 1.0, 360.0, 555.0, 830.0, 100000.0])
+        T_list = numpy.array ([numpy.nan, -100.0, 0.0, 1.0, 100.0, 1336.0, blackbody.SUN_TEMPERATURE, 1.0e6])
+        intensities = blackbody.blackbody_specific_intensity (wl_list, T_list [:, numpy.newaxis])
+        self.assertEqual(intensities.shape, (len (T_list), len (wl_list)))
+        for i in range (0, len (T_list)):
+            for j in range (0, len (wl_list)):
+                expected = blackbody.blackbody_specific_intensity (wl_list [j], T_list [i])
+                # NaN temperatures give NaN, as for single values
+                if math.isnan (expected):
+                    self.assertTrue(math.isnan (intensities [i, j]))
+                    continue
+                # the large exponent cutoff gives zero intensity for the same values
+                self.assertEqual(intensities [i, j] == 0.0, expected == 0.0)
+                self.assertAlmostEqual(intensities [i, j], expected, delta=1.0e-12 * expected)
+        spectra = blackbody.blackbody_spectra (T_list)
+        colors = blackbody.blackbody_color (T_list)
+        self.assertEqual(colors.shape, (len (T_list), 3))
+        for i in range (0, len (T_list)):
+            spectrum = blackbody.blackbody_spectrum (T_list [i])
+            self.assertTrue(numpy.allclose (spectra [i], spectrum [:,1], rtol=1.0e-12, atol=0.0, equal_nan=True))
+            xyz = blackbody.blackbody_color (T_list [i])
+            if verbose:
+                print ('T: %g K    xyz: %s    batch xyz: %s' % (T_list [i], str (xyz), str (colors [i])))
+            self.assertTrue(numpy.allclose (colors [i], xyz, rtol=1.0e-12, atol=0.0, equal_nan=True))
+        with self.assertRaises(ValueError):
+            blackbody.blackbody_spectra (T_list.reshape (1, len (T_list)))
+
+    def test_planckian_locus(self, verbose=False):
+        ''' Test that the colors from the Planckian locus table agree with the exact colors. '''
+        locus = blackbody.get_planckian_locus()
+        self.assertIs(blackbody.get_planckian_locus(), locus)
+        T_list = numpy.exp (numpy.random.uniform (math.log (locus.T_min), math.log (locus.T_max), 20000))
+        # include the table temperatures at the ends of the range
+        T_list [0:2] = [locus.T_min, locus.T_max]
+        exact = blackbody.blackbody_color (T_list)
+        colors = blackbody.blackbody_color_lookup (T_list)
+        errors = numpy.abs (colors - exact) / exact [:, 1:2]
+        if verbose:
+            print ('%s: max relative error %g' % (repr (locus), numpy.max (errors)))
+        self.assertLess(numpy.max (errors), 1.0e-9)
+        # the luminance increases with temperature
+        T_dense = numpy.linspace (locus.T_min, locus.T_max, 100000)
+        self.assertTrue(numpy.all (numpy.diff (blackbody.blackbody_color_lookup (T_dense) [:,1]) > 0.0))
+        # single temperatures, other shapes, and temperatures outside of the table
+        xyz = blackbody.blackbody_color_lookup (blackbody.SUN_TEMPERATURE)
+        self.assertEqual(xyz.shape, (3,))
+        self.assertTrue(numpy.allclose (xyz, blackbody.blackbody_color (blackbody.SUN_TEMPERATURE), rtol=1.0e-9, atol=0.0))
+        T_grid = numpy.array ([[0.0, 100.0, 2000.0], [6500.0, 1.0e5, 1.0e6]])
+        colors = blackbody.blackbody_color_lookup (T_grid)
+        self.assertEqual(colors.shape, (2, 3, 3))
+        for T_K in [0.0, 100.0, 1.0e6]:
+            self.assertTrue(numpy.array_equal (blackbody.blackbody_color_lookup (T_K), blackbody.blackbody_color (T_K)))
+        self.assertTrue(numpy.allclose (colors.reshape (6, 3), blackbody.blackbody_color (T_grid.reshape (6)), rtol=1.0e-9, atol=0.0))
+        # a smaller table
+        small = blackbody.PlanckianLocus (1000.0, 20000.0, 64)
+        errors = numpy.abs (small.color (T_list) - exact) / exact [:, 1:2]
+        if verbose:
+            print ('%s: max relative error %g' % (repr (small), numpy.max (errors)))
+        self.assertLess(numpy.max (errors), 1.0e-5)
+        with self.assertRaises(ValueError):
+            blackbody.PlanckianLocus (1000.0, 500.0)
+        with self.assertRaises(ValueError):
+            blackbody.PlanckianLocus (500.0, 1000.0, 1)
+
+    def test_correlated_color_temperature(self, verbose=False):
+        ''' Test the correlated color temperatures of colors near the Planckian locus. '''
+        # colors at known distances Duv from the locus, along the normal to it in the uv diagram
+        random = numpy.random.RandomState (0)
+        T_list = numpy.exp (random.uniform (math.log (600.0), math.log (90000.0), 10000))
+        Duv_list = random.uniform (-0.05, 0.05, 10000)
+        def locus_uv (T_K):
+            (u, v_prime) = colormodels.uv_primes (blackbody.blackbody_color (T_K))
+            return (u, v_prime * (2.0 / 3.0))
+        (u, v) = locus_uv (T_list)
+        (u_1, v_1) = locus_uv (T_list * math.exp (1.0e-5))
+        (u_0, v_0) = locus_uv (T_list * math.exp (-1.0e-5))
+        (du, dv) = (u_1 - u_0, v_1 - v_0)
+        length = numpy.hypot (du, dv)
+        u += Duv_list * dv / length
+        v -= Duv_list * du / length
+        xyz = colormodels.uv_primes_inverse (u, v * 1.5, numpy.ones (len (u)))
+        (T_cct, Duv) = blackbody.correlated_color_temperature (xyz)
+        T_errors = numpy.abs (T_cct / T_list - 1.0)
+        Duv_errors = numpy.abs (Duv - Duv_list)
+        if verbose:
+            print ('max CCT relative error %g, max Duv error %g' % (numpy.max (T_errors), numpy.max (Duv_errors)))
+        self.assertLess(numpy.max (T_errors), 1.0e-6)
+        self.assertLess(numpy.max (Duv_errors), 1.0e-9)
+        # single colors, other shapes, and colors without a temperature
+        (T_K, Duv) = blackbody.correlated_color_temperature (blackbody.blackbody_color (6500.0))
+        self.assertIsInstance(T_K, float)
+        self.assertAlmostEqual(T_K, 6500.0, delta=1.0e-3)
+        self.assertAlmostEqual(Duv, 0.0, delta=1.0e-9)
+        (T_cct, Duv) = blackbody.correlated_color_temperature (xyz [0:6].reshape (2, 3, 3))
+        self.assertEqual(T_cct.shape, (2, 3))
+        self.assertTrue(numpy.allclose (T_cct.reshape (6), T_list [0:6], rtol=1.0e-6, atol=0.0))
+        for xyz in [[0.0, 0.0, 0.0], blackbody.blackbody_color (200.0), blackbody.blackbody_color (1.0e6)]:
+            (T_K, Duv) = blackbody.correlated_color_temperature (xyz)
+            self.assertTrue(math.isnan (T_K) and math.isnan (Duv))
+        with self.assertRaises(ValueError):
+            blackbody.correlated_color_temperature ([0.3, 0.3])
+
+    def test_correlated_color_temperature_judd_wyszecki(self, verbose=False):
+        ''' Test the correlated color temperatures of the chromaticities in the table in Judd and Wyszecki. '''
+        table = Judd_Wyszeki_blackbody_chromaticity_table
+        xyz = numpy.column_stack ([table [:,1], table [:,2], 1.0 - table [:,1] - table [:,2]])
+        (T_cct, Duv) = blackbody.correlated_color_temperature (xyz)
+        # compare in mireds (1.0e6 / T), as the rounding of the table to 4 digits
+        # gives about the same uncertainty in mireds at all temperatures
+        mired_errors = numpy.abs (1.0e6 / T_cct - 1.0e6 / table [:,0])
+        for i in range (0, len (table)):
+            if verbose:
+                print ('T: %8.1f K    CCT: %9.2f K    Duv: %9.6f    Error: %.3f mired' % (
+                    table [i][0], T_cct [i], Duv [i], mired_errors [i]))
+        self.assertLess(numpy.max (mired_errors), 1.0)
+        self.assertLess(numpy.max (numpy.abs (Duv)), 1.0e-4)
+
     def test_coverage_total_intensity(self):
         ''' Coverage test of blackbody total intensity. '''
         # FIXME: This function is only used in a test that is not working now.
@@ -24,7 +24,8 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
-import random
+import math, os, random, subprocess, sys
+import numpy
 import unittest
 
 import ciexyz
@@ -52,6 +53,208 @@ class TestCiexyz(unittest.TestCase):
         if verbose:
             print ('555 nm = %s' % (str (xyz_555)))
 
+    def test_wavelength_array(self, verbose=False):
+        ''' Test that xyz_from_wavelength() of an array matches the scalar results. '''
+        wl_nm = 300.0 + 600.0 * numpy.random.random ((10, 7))
+        wl_nm [0,:4] = [359.0, 359.5, 830.5, 831.0]
+        xyzs = ciexyz.xyz_from_wavelength (wl_nm)
+        self.assertEqual(xyzs.shape, (10, 7, 3))
+        for i in range (10):
+            for j in range (7):
+                expect = ciexyz.xyz_from_wavelength (float (wl_nm [i][j]))
+                self.assertTrue(numpy.array_equal (xyzs [i][j], expect))
+
+    def test_wavelength_angstroms(self, verbose=False):
+        ''' Test the angstrom locus table against xyz_from_wavelength(). '''
+        wl_A = numpy.arange (3000, 9000)
+        xyzs = ciexyz.xyz_from_wavelength_angstroms (wl_A)
+        expect = ciexyz.xyz_from_wavelength (wl_A * 0.1)
+        self.assertTrue(numpy.array_equal (xyzs, expect))
+        # scalar lookups should not share memory with the table
+        xyz = ciexyz.xyz_from_wavelength_angstroms (5550)
+        xyz *= 0.0
+        self.assertTrue(numpy.array_equal (ciexyz.xyz_from_wavelength_angstroms (5550), expect [5550 - 3000]))
+
+    def test_spectrum_vs_wavelength_sum(self, verbose=False):
+        ''' Test that xyz_from_spectrum() matches a sum over xyz_from_wavelength(). '''
+        # Random wavelengths, including some outside the table and in the 359/831 nm padding.
+        num_wl = 500
+        spectrum = numpy.empty ((num_wl, 2))
+        spectrum [:,0] = 300.0 + 600.0 * numpy.random.random (num_wl)
+        spectrum [:,1] = numpy.random.random (num_wl)
+        spectrum [:4,0] = [359.0, 359.5, 830.5, 831.0]
+        expect = numpy.zeros (3)
+        for i in range (num_wl):
+            expect += spectrum [i][1] * ciexyz.xyz_from_wavelength (spectrum [i][0])
+        actual = ciexyz.xyz_from_spectrum (spectrum)
+        if verbose:
+            print ('expect = %s, actual = %s' % (str (expect), str (actual)))
+        self.assertTrue(numpy.allclose (actual, expect, rtol=1.0e-12, atol=0.0))
+
+    def test_spectra_vs_spectrum(self, verbose=False):
+        ''' Test that xyz_from_spectra() matches xyz_from_spectrum() for each spectrum. '''
+        wavelengths = ciexyz.empty_spectrum() [:,0]
+        num_spectra = 20
+        intensities = numpy.random.random ((num_spectra, len (wavelengths)))
+        actual = ciexyz.xyz_from_spectra (wavelengths, intensities)
+        self.assertEqual(actual.shape, (num_spectra, 3))
+        for i in range (num_spectra):
+            spectrum = numpy.column_stack ((wavelengths, intensities [i]))
+            expect = ciexyz.xyz_from_spectrum (spectrum)
+            if verbose:
+                print ('expect = %s, actual = %s' % (str (expect), str (actual [i])))
+            self.assertTrue(numpy.allclose (actual [i], expect, rtol=1.0e-12, atol=0.0))
+
+    def test_weights_cache(self, verbose=False):
+        ''' Test the hit/miss counting, eviction and invalidation of the weights cache. '''
+        try:
+            ciexyz.init_weights_cache (max_size=2)
+            grid_1 = numpy.linspace (360.0, 830.0, 471)
+            grid_5 = numpy.linspace (380.0, 780.0, 81)
+            grid_10 = numpy.linspace (400.0, 700.0, 31)
+            ciexyz.get_xyz_weights (grid_1)
+            ciexyz.get_xyz_weights (grid_1.copy())
+            ciexyz.get_xyz_weights (grid_5)
+            info = ciexyz.weights_cache_info()
+            if verbose:
+                print ('weights cache = %s' % (str (info)))
+            self.assertEqual((info ['hits'], info ['misses'], info ['size']), (1, 2, 2))
+            # grid_1 is the least recently used, so adding grid_10 evicts it
+            ciexyz.get_xyz_weights (grid_10)
+            ciexyz.get_xyz_weights (grid_1)
+            info = ciexyz.weights_cache_info()
+            self.assertEqual((info ['hits'], info ['misses'], info ['size']), (1, 4, 2))
+            # cached weights must follow a change in the display intensity
+            weights = ciexyz.get_xyz_weights (grid_1)
+            ciexyz.init (2.0 * ciexyz.DEFAULT_DISPLAY_INTENSITY)
+            self.assertEqual(ciexyz.weights_cache_info() ['size'], 0)
+            halved = ciexyz.get_xyz_weights (grid_1)
+            self.assertTrue(numpy.allclose (halved, 0.5 * weights, rtol=1.0e-12, atol=0.0))
+        finally:
+            ciexyz.init()
+            ciexyz.init_weights_cache()
+
+    def test_spectral_sampling(self, verbose=False):
+        ''' Test that a coarser spectral sampling gives nearly the full resolution colors. '''
+        def smooth_spectrum_color (center_nm):
+            # A smooth spectrum, with each intensity the light in an interval of delta_wl_nm.
+            spectrum = ciexyz.empty_spectrum()
+            density = numpy.exp (-0.5 * ((spectrum [:,0] - center_nm) / 60.0) ** 2)
+            spectrum [:,1] = density * ciexyz.delta_wl_nm
+            return ciexyz.xyz_from_spectrum (spectrum)
+        centers = [450.0, 550.0, 650.0]
+        try:
+            exact = [smooth_spectrum_color (c) for c in centers]
+            ciexyz.init_spectral_sampling (380, 780, 5)
+            self.assertEqual(ciexyz.empty_spectrum().shape, (81, 2))
+            self.assertEqual(ciexyz.empty_spectrum() [-1][0], 780.0)
+            # over the full range, only the coarser spacing contributes to the error
+            ciexyz.init_spectral_sampling (360, 830, 5)
+            for (center, xyz_exact) in zip (centers, exact):
+                xyz = smooth_spectrum_color (center)
+                error = numpy.max (numpy.abs (xyz - xyz_exact)) / xyz_exact [1]
+                if verbose:
+                    print ('center %g nm: exact %s, 5 nm %s, error %.2e' % (center, str (xyz_exact), str (xyz), error))
+                self.assertLess(error, 3.0e-3)
+            # monochromatic colors do not depend on the sampling
+            self.assertTrue(numpy.array_equal (
+                ciexyz.xyz_from_wavelength (555.0), ciexyz._xyz_from_wavelength_array ([555.0]) [0]))
+            with self.assertRaises(ValueError):
+                ciexyz.init_spectral_sampling (380, 781, 5)
+        finally:
+            ciexyz.init_spectral_sampling()
+        self.assertEqual(ciexyz.empty_spectrum().shape, (471, 2))
+
+    def test_linear_integration(self, verbose=False):
+        ''' Test that INTEGRATE_LINEAR integrates piecewise linear spectra exactly. '''
+        # A constant spectrum over the whole table integrates the matching functions.
+        flat = numpy.array ([[359.0, 1.0], [831.0, 1.0]])
+        xyz = ciexyz.xyz_from_spectrum (flat, ciexyz.INTEGRATE_LINEAR)
+        total = numpy.sum (ciexyz._xyz_colors, axis=0)
+        self.assertTrue(numpy.allclose (xyz, total, rtol=1.0e-12))
+        # A coarse 10 nm spectrum, against a dense numeric integral of its linear interpolation.
+        wls = numpy.arange (380.0, 781.0, 10.0)
+        density = 1.0 + numpy.sin (wls / 37.0) + 0.001 * (wls - 380.0)
+        spectrum = numpy.column_stack ((wls, density))
+        xyz = ciexyz.xyz_from_spectrum (spectrum, ciexyz.INTEGRATE_LINEAR)
+        dense_wls = numpy.linspace (380.0, 780.0, 40001)
+        dense_density = numpy.interp (dense_wls, wls, density)
+        dense_xyz = numpy.dot (dense_density, ciexyz.xyz_from_wavelength (dense_wls))
+        dense_xyz -= 0.5 * (dense_density [0] * ciexyz.xyz_from_wavelength (dense_wls [0]) +
+                            dense_density [-1] * ciexyz.xyz_from_wavelength (dense_wls [-1]))
+        dense_xyz *= (dense_wls [1] - dense_wls [0])
+        error = numpy.max (numpy.abs (xyz - dense_xyz)) / dense_xyz [1]
+        if verbose:
+            print ('linear %s, dense %s, error %.2e' % (str (xyz), str (dense_xyz), error))
+        self.assertLess(error, 1.0e-6)
+        # Batched spectra agree, and the weights are cached separately from the sampled ones.
+        xyzs = ciexyz.xyz_from_spectra (wls, numpy.array ([density, 2.0 * density]), ciexyz.INTEGRATE_LINEAR)
+        self.assertTrue(numpy.allclose (xyzs [1], 2.0 * xyz, rtol=1.0e-12))
+        self.assertFalse(numpy.array_equal (
+            ciexyz.get_xyz_weights (wls), ciexyz.get_xyz_weights (wls, ciexyz.INTEGRATE_LINEAR)))
+        with self.assertRaises(ValueError):
+            ciexyz.get_xyz_weights (wls, 2)
+
+    def test_spectral_line_colors(self, verbose=False):
+        ''' Test the spectral line colors against a color by color calculation. '''
+        import colormodels
+        def reference_colors (brightness, num_purples, dwl_angstroms):
+            xyzs = []
+            names = []
+            for wl_A in range (3600, 8310, dwl_angstroms):
+                xyzs.append (colormodels.xyz_normalize (ciexyz.xyz_from_wavelength (wl_A * 0.1)))
+                names.append ('%.1f nm' % (wl_A * 0.1))
+            first_xyz = xyzs [0]
+            last_xyz  = xyzs [-1]
+            for ipurple in range (0, num_purples):
+                t = float (ipurple) / float (num_purples - 1)
+                xyzs.append (colormodels.xyz_normalize (t * first_xyz + (1.0 - t) * last_xyz))
+                names.append ('%03d purple' % math.floor (1000.0 * t + 0.5))
+            xyzs = [colormodels.xyz_from_rgb (colormodels.brightest_rgb_from_xyz (xyz, brightness)) for xyz in xyzs]
+            return (numpy.array (xyzs), names)
+        for (brightness, num_purples, dwl_angstroms) in [(1.0, 0, 10), (1.0, 200, 10), (0.5, 200, 1), (0.8, 2, 7)]:
+            (ref_xyzs, ref_names) = reference_colors (brightness, num_purples, dwl_angstroms)
+            (xyzs, names) = ciexyz.get_normalized_spectral_line_colors_annotated (brightness, num_purples, dwl_angstroms)
+            if verbose:
+                print ('%d colors, last %s %s' % (len (xyzs), names [-1], str (xyzs [-1])))
+            self.assertTrue(numpy.array_equal (xyzs, ref_xyzs))
+            self.assertTrue(numpy.array_equal (
+                ciexyz.get_normalized_spectral_line_colors (brightness, num_purples, dwl_angstroms), ref_xyzs))
+            self.assertEqual(len (names), len (ref_names))
+            self.assertEqual(list (names), ref_names)
+            self.assertEqual(names [-1], ref_names [-1])
+
+    def test_lazy_init(self, verbose=False):
+        ''' Test that the tables are only built on first use, in a fresh interpreter. '''
+        here = os.path.dirname (os.path.abspath (__file__))
+        code = '''
+import threading
+import colormodels, ciexyz, illuminants
+assert not ciexyz._init_done and not colormodels._init_done
+assert illuminants._Illuminant_D65 is None
+colormodels.irgb_string_from_rgb (colormodels.rgb_color (0.5, 0.5, 0.5))
+assert colormodels._init_done and not ciexyz._init_done
+# many threads racing on the first use
+results = []
+def worker ():
+    results.append (ciexyz.xyz_from_wavelength (555.0))
+threads = [threading.Thread (target=worker) for i in range (8)]
+for t in threads: t.start()
+for t in threads: t.join()
+assert len (results) == 8 and all ((r == results [0]).all() for r in results)
+assert ciexyz.start_wl_nm == 360
+'''
+        subprocess.check_call ([sys.executable, '-c', code], cwd=here)
+        # warmup() builds everything
+        code = '''
+import sys, os
+sys.path.insert (0, os.path.dirname (os.getcwd()))
+import colorpy, ciexyz, illuminants
+colorpy.warmup()
+assert ciexyz._init_done and illuminants._Illuminant_D65 is not None
+'''
+        subprocess.check_call ([sys.executable, '-c', code], cwd=here)
+
 
 if __name__ == '__main__':
     unittest.main()
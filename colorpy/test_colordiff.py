@@ -0,0 +1,227 @@
+'''
+test_colordiff.py - Test cases for colordiff.py
+
+License:
+
+Copyright (C) 2008 Mark Kness
+
+Author - Mark Kness - mkness@alumni.utexas.net
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import math
+import numpy
+import tracemalloc
+import unittest
+
+import colordiff
+import colormodels
+
+# The CIEDE2000 test data from [Sharma, Wu and Dalal], Table 1.
+# Each row is L1, a1, b1, L2, a2, b2, Delta E 2000.
+SHARMA_DATA = numpy.array ([
+    [50.0000,  2.6772, -79.7751, 50.0000,  0.0000, -82.7485,  2.0425],
+    [50.0000,  3.1571, -77.2803, 50.0000,  0.0000, -82.7485,  2.8615],
+    [50.0000,  2.8361, -74.0200, 50.0000,  0.0000, -82.7485,  3.4412],
+    [50.0000, -1.3802, -84.2814, 50.0000,  0.0000, -82.7485,  1.0000],
+    [50.0000, -1.1848, -84.8006, 50.0000,  0.0000, -82.7485,  1.0000],
+    [50.0000, -0.9009, -85.5211, 50.0000,  0.0000, -82.7485,  1.0000],
+    [50.0000,  0.0000,   0.0000, 50.0000, -1.0000,   2.0000,  2.3669],
+    [50.0000, -1.0000,   2.0000, 50.0000,  0.0000,   0.0000,  2.3669],
+    [50.0000,  2.4900,  -0.0010, 50.0000, -2.4900,   0.0009,  7.1792],
+    [50.0000,  2.4900,  -0.0010, 50.0000, -2.4900,   0.0010,  7.1792],
+    [50.0000,  2.4900,  -0.0010, 50.0000, -2.4900,   0.0011,  7.2195],
+    [50.0000,  2.4900,  -0.0010, 50.0000, -2.4900,   0.0012,  7.2195],
+    [50.0000, -0.0010,   2.4900, 50.0000,  0.0009,  -2.4900,  4.8045],
+    [50.0000, -0.0010,   2.4900, 50.0000,  0.0010,  -2.4900,  4.8045],
+    [50.0000, -0.0010,   2.4900, 50.0000,  0.0011,  -2.4900,  4.7461],
+    [50.0000,  2.5000,   0.0000, 50.0000,  0.0000,  -2.5000,  4.3065],
+    [50.0000,  2.5000,   0.0000, 73.0000, 25.0000, -18.0000, 27.1492],
+    [50.0000,  2.5000,   0.0000, 61.0000, -5.0000,  29.0000, 22.8977],
+    [50.0000,  2.5000,   0.0000, 56.0000,-27.0000,  -3.0000, 31.9030],
+    [50.0000,  2.5000,   0.0000, 58.0000, 24.0000,  15.0000, 19.4535],
+    [50.0000,  2.5000,   0.0000, 50.0000,  3.1736,   0.5854,  1.0000],
+    [50.0000,  2.5000,   0.0000, 50.0000,  3.2972,   0.0000,  1.0000],
+    [50.0000,  2.5000,   0.0000, 50.0000,  1.8634,   0.5757,  1.0000],
+    [50.0000,  2.5000,   0.0000, 50.0000,  3.2592,   0.3350,  1.0000],
+    [60.2574,-34.0099,  36.2677, 60.4626,-34.1751,  39.4387,  1.2644],
+    [63.0109,-31.0961,  -5.8663, 62.8187,-29.7946,  -4.0864,  1.2630],
+    [61.2901,  3.7196,  -5.3901, 61.4292,  2.2480,  -4.9620,  1.8731],
+    [35.0831,-44.1164,   3.7933, 35.0232,-40.0716,   1.5901,  1.8645],
+    [22.7233, 20.0904, -46.6940, 23.0331, 14.9730, -42.5619,  2.0373],
+    [36.4612, 47.8580,  18.3852, 36.2715, 50.5065,  21.2231,  1.4146],
+    [90.8027, -2.0831,   1.4410, 91.1528, -1.6435,   0.0447,  1.4441],
+    [90.9257, -0.5406,  -0.9208, 88.6381, -0.8985,  -0.7239,  1.5381],
+    [ 6.7747, -0.2908,  -2.4247,  5.8714, -0.0985,  -2.2286,  0.6377],
+    [ 2.0776,  0.0795,  -1.1350,  0.9033, -0.0636,  -0.5514,  0.9082]])
+
+
+def delta_e_94_single (lab1, lab2, kL, K1, K2):
+    ''' Straightforward CIE 1994 color difference of a single pair, to check against. '''
+    C1 = math.sqrt (lab1 [1] ** 2 + lab1 [2] ** 2)
+    C2 = math.sqrt (lab2 [1] ** 2 + lab2 [2] ** 2)
+    dL = lab1 [0] - lab2 [0]
+    dC = C1 - C2
+    dH2 = (lab1 [1] - lab2 [1]) ** 2 + (lab1 [2] - lab2 [2]) ** 2 - dC ** 2
+    return math.sqrt ((dL / kL) ** 2 + (dC / (1.0 + K1 * C1)) ** 2 + max (dH2, 0.0) / (1.0 + K2 * C1) ** 2)
+
+
+class TestColorDiff(unittest.TestCase):
+    ''' Test cases for the color differences. '''
+
+    def test_ciede2000(self, verbose=False):
+        ''' Test Delta E 2000 against the published reference data. '''
+        lab1 = SHARMA_DATA [:, 0:3]
+        lab2 = SHARMA_DATA [:, 3:6]
+        expected = SHARMA_DATA [:, 6]
+        dE = colordiff.delta_e_2000 (lab1, lab2)
+        if verbose:
+            for i in range (0, len (dE)):
+                print ('pair %2d: %.4f (expected %.4f)' % (i + 1, dE [i], expected [i]))
+        self.assertEqual(dE.shape, expected.shape)
+        self.assertTrue(numpy.allclose (dE, expected, rtol=0.0, atol=0.5e-4))
+        # symmetric, and the same one pair at a time, or in small chunks
+        self.assertTrue(numpy.allclose (colordiff.delta_e_2000 (lab2, lab1), dE, rtol=0.0, atol=1.0e-12))
+        self.assertTrue(numpy.allclose (colordiff.delta_e_2000 (lab1, lab2, max_pairs=5), dE, rtol=0.0, atol=1.0e-12))
+        for i in range (0, len (dE)):
+            self.assertAlmostEqual(colordiff.delta_e_2000 (lab1 [i], lab2 [i]), dE [i], delta=1.0e-12)
+        # parametric weights - a lightness difference only depends on kL
+        self.assertAlmostEqual(colordiff.delta_e_2000 ([60.0, 0.0, 0.0], [50.0, 0.0, 0.0], kL=2.0, kC=3.0, kH=4.0),
+            0.5 * colordiff.delta_e_2000 ([60.0, 0.0, 0.0], [50.0, 0.0, 0.0]), delta=1.0e-12)
+
+    def test_delta_e_76_94(self):
+        ''' Test Delta E 1976 and 1994 against direct formulas. '''
+        rs = numpy.random.RandomState (0)
+        lab1 = rs.uniform ((0.0, -100.0, -100.0), (100.0, 100.0, 100.0), (20, 50, 3))
+        lab2 = rs.uniform ((0.0, -100.0, -100.0), (100.0, 100.0, 100.0), (20, 50, 3))
+        dE76 = colordiff.delta_e_76 (lab1, lab2, max_pairs=77)
+        self.assertEqual(dE76.shape, (20, 50))
+        self.assertTrue(numpy.allclose (dE76, numpy.linalg.norm (lab1 - lab2, axis=-1)))
+        for (textiles, weights) in [(False, colordiff.CIE94_GRAPHIC_ARTS), (True, colordiff.CIE94_TEXTILES)]:
+            dE94 = colordiff.delta_e_94 (lab1, lab2, textiles=textiles, max_pairs=77)
+            self.assertEqual(dE94.shape, (20, 50))
+            for (i, j) in [(0, 0), (3, 17), (19, 49)]:
+                self.assertAlmostEqual(dE94 [i, j], delta_e_94_single (lab1 [i, j], lab2 [i, j], *weights), delta=1.0e-10)
+        # a single reference color against many
+        dE94 = colordiff.delta_e_94 (lab1 [0, 0], lab2)
+        self.assertEqual(dE94.shape, (20, 50))
+        self.assertAlmostEqual(dE94 [5, 6], delta_e_94_single (lab1 [0, 0], lab2 [5, 6], *colordiff.CIE94_GRAPHIC_ARTS), delta=1.0e-10)
+        with self.assertRaises(ValueError):
+            colordiff.delta_e_76 (numpy.zeros ((5, 2)), numpy.zeros ((5, 2)))
+
+    def test_broadcast_chunks(self):
+        ''' Test that chunked comparisons of broadcast arrays agree, and keep the temporary arrays small. '''
+        rs = numpy.random.RandomState (3)
+        lab1 = rs.uniform ((0.0, -100.0, -100.0), (100.0, 100.0, 100.0), (1000, 1, 3))
+        lab2 = rs.uniform ((0.0, -100.0, -100.0), (100.0, 100.0, 100.0), (1, 1000, 3))
+        for delta_e in [colordiff.delta_e_76, colordiff.delta_e_94, colordiff.delta_e_2000]:
+            expected = delta_e (lab1 [:5], lab2, max_pairs=10000000)
+            self.assertTrue(numpy.allclose (delta_e (lab1 [:5], lab2, max_pairs=333), expected, rtol=0.0, atol=1.0e-12))
+        # copying out the full broadcast inputs would take 48 bytes per pair, 48 MB here
+        tracemalloc.start()
+        try:
+            result = colordiff.delta_e_76 (lab1, lab2, max_pairs=4096)
+            (current, peak) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(result.shape, (1000, 1000))
+        self.assertLess(peak, result.nbytes + 4000000)
+
+    def test_delta_e_matrix(self):
+        ''' Test the differences between all pairs of colors. '''
+        rs = numpy.random.RandomState (1)
+        labs1 = rs.uniform ((0.0, -100.0, -100.0), (100.0, 100.0, 100.0), (37, 3))
+        labs2 = rs.uniform ((0.0, -100.0, -100.0), (100.0, 100.0, 100.0), (23, 3))
+        for delta_e in [colordiff.delta_e_76, colordiff.delta_e_94, colordiff.delta_e_2000]:
+            expected = delta_e (labs1 [:, numpy.newaxis, :], labs2 [numpy.newaxis, :, :])
+            for max_pairs in [1, 50, colordiff.DEFAULT_MAX_PAIRS]:
+                matrix = colordiff.delta_e_matrix (labs1, labs2, delta_e=delta_e, max_pairs=max_pairs)
+                self.assertEqual(matrix.shape, (37, 23))
+                self.assertTrue(numpy.allclose (matrix, expected, rtol=0.0, atol=1.0e-12))
+        # against itself, the diagonal is zero and Delta E 2000 is symmetric
+        matrix = colordiff.delta_e_matrix (labs1)
+        self.assertEqual(matrix.shape, (37, 37))
+        self.assertTrue(numpy.allclose (numpy.diag (matrix), 0.0))
+        self.assertTrue(numpy.allclose (matrix, matrix.T, rtol=0.0, atol=1.0e-12))
+        with self.assertRaises(ValueError):
+            colordiff.delta_e_matrix (labs1.reshape (1, 37, 3))
+
+    def test_color_index(self):
+        ''' Test that the nearest colors from the index match a full comparison. '''
+        rs = numpy.random.RandomState (2)
+        lab_min = (0.0, -100.0, -100.0)
+        lab_max = (100.0, 100.0, 100.0)
+        # a clustered palette, and colors both inside and outside of its range
+        palette = numpy.concatenate ((
+            rs.uniform (lab_min, lab_max, (150, 3)),
+            rs.normal ((50.0, 20.0, -20.0), 2.0, (100, 3)),
+            [[50.0, 0.0, 0.0]] * 3))
+        index = colordiff.ColorIndex (palette)
+        self.assertEqual(len (index), len (palette))
+        labs = rs.uniform ((-20.0, -150.0, -150.0), (120.0, 150.0, 150.0), (50, 40, 3))
+        full = colordiff.delta_e_matrix (labs.reshape (-1, 3), palette, delta_e=colordiff.delta_e_76).reshape (50, 40, -1)
+        for k in [1, 5, len (palette)]:
+            (indices, distances) = index.query (labs, k, max_pairs=1000)
+            self.assertEqual(indices.shape, (50, 40, k))
+            expected = numpy.sort (full, axis=-1) [..., :k]
+            self.assertTrue(numpy.allclose (distances, expected, rtol=0.0, atol=1.0e-10))
+            self.assertTrue(numpy.allclose (numpy.take_along_axis (full, indices, axis=-1), distances, rtol=0.0, atol=1.0e-10))
+        # re-ranking by Delta E 2000, with every palette color as a candidate, is exact
+        full_2000 = colordiff.delta_e_matrix (labs.reshape (-1, 3), palette).reshape (50, 40, -1)
+        (indices, distances) = index.query (labs, 3, colordiff.DELTA_E_2000, candidates=len (palette))
+        self.assertTrue(numpy.allclose (distances, numpy.sort (full_2000, axis=-1) [..., :3], rtol=0.0, atol=1.0e-10))
+        (indices, distances) = index.query (labs, 2, colordiff.DELTA_E_2000)
+        self.assertTrue(numpy.all (numpy.diff (distances, axis=-1) >= 0.0))
+        self.assertTrue(numpy.allclose (numpy.take_along_axis (full_2000, indices, axis=-1), distances, rtol=0.0, atol=1.0e-10))
+        # re-ranking a large batch, over many chunks, agrees with re-ranking each color on its own
+        many_labs = rs.uniform (lab_min, lab_max, (20000, 3))
+        (indices, distances) = index.query (many_labs, 2, colordiff.DELTA_E_2000, max_pairs=1000)
+        self.assertEqual(indices.shape, (20000, 2))
+        for i in [0, 1234, 19999]:
+            (expected_indices, expected_distances) = index.query (many_labs [i], 2, colordiff.DELTA_E_2000)
+            self.assertTrue(numpy.array_equal (indices [i], expected_indices))
+            self.assertTrue(numpy.allclose (distances [i], expected_distances, rtol=0.0, atol=1.0e-12))
+        # a single color
+        (indices, distances) = index.query (palette [7])
+        self.assertEqual(indices.shape, (1,))
+        self.assertEqual(distances [0], 0.0)
+        (indices, distances) = index.query (numpy.empty ((0, 3)), 2, colordiff.DELTA_E_2000)
+        self.assertEqual(indices.shape, (0, 2))
+        with self.assertRaises(ValueError):
+            index.query (labs, 0)
+        with self.assertRaises(ValueError):
+            index.query (labs, 1, metric=5)
+
+    def test_color_index_names(self):
+        ''' Test looking up the names of the nearest palette colors. '''
+        import misc
+        index = colordiff.ColorIndex.from_irgb_strings (misc.primary_colors, misc.primary_names)
+        colorstrings = ['#F01010', '#0A0A0A', '#EEEEFF', '#10E0E8']
+        (irgbs, invalid) = colormodels.irgbs_from_irgb_strings (colorstrings)
+        labs = colormodels.lab_from_xyz (colormodels.xyz_from_rgb (colormodels.rgb_from_irgb (irgbs)))
+        names = index.nearest_names (labs)
+        self.assertEqual(list (names), ['Red', 'Black', 'White', 'Cyan'])
+        self.assertEqual(index.nearest_names (labs [0]), 'Red')
+        self.assertEqual(list (index.nearest_names (labs, max_pairs=3)), ['Red', 'Black', 'White', 'Cyan'])
+        # a palette of one color
+        single = colordiff.ColorIndex ([[50.0, 10.0, 10.0]], ['gray'])
+        self.assertEqual(list (single.nearest_names (labs)), ['gray'] * 4)
+        with self.assertRaises(ValueError):
+            colordiff.ColorIndex.from_irgb_strings (['#FF0000', 'red'])
+        with self.assertRaises(ValueError):
+            colordiff.ColorIndex (labs).nearest_names (labs)
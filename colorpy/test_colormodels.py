@@ -24,7 +24,7 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
-import math, random, numpy
+import math, pickle, random, threading, numpy
 import unittest
 
 import colormodels
@@ -101,6 +101,34 @@ class TestColormodels(unittest.TestCase):
             xyz0 = colormodels.xyz_color (x0, y0, z0)
             self.check_xyz_rgb (xyz0, verbose)
 
+    def test_xyz_rgb_arrays(self, verbose=False):
+        ''' Test the conversions of arrays of colors against the single color conversions. '''
+        xyzs = 10.0 * numpy.random.random ((4, 5, 3))
+        xyzs [1, 2] = 0.0
+        rgbs = colormodels.rgb_from_xyz (xyzs)
+        brightest = colormodels.brightest_rgb_from_xyz (xyzs, 0.8)
+        self.assertEqual(rgbs.shape, xyzs.shape)
+        for index in numpy.ndindex (xyzs.shape [:-1]):
+            self.assertTrue(numpy.allclose (rgbs [index], colormodels.rgb_from_xyz (xyzs [index]), rtol=1.0e-14, atol=1.0e-14))
+            self.assertTrue(numpy.allclose (brightest [index], colormodels.brightest_rgb_from_xyz (xyzs [index], 0.8), rtol=1.0e-14, atol=1.0e-14))
+        if verbose:
+            print ('brightest rgbs: %s' % (str (brightest)))
+        # black is not scaled, every other color has a maximum component of 0.8
+        self.assertTrue(numpy.all (brightest [1, 2] == 0.0))
+        max_rgbs = numpy.max (brightest, axis=-1)
+        max_rgbs [1, 2] = 0.8
+        self.assertTrue(numpy.allclose (max_rgbs, 0.8))
+        self.assertTrue(numpy.allclose (colormodels.xyz_from_rgb (rgbs), xyzs, atol=1.0e-10))
+        # results into an existing buffer, including the input itself
+        out = numpy.empty_like (xyzs)
+        self.assertIs(colormodels.rgb_from_xyz (xyzs, out=out), out)
+        self.assertTrue(numpy.array_equal (out, rgbs))
+        self.assertIs(colormodels.xyz_from_rgb (out, out=out), out)
+        self.assertTrue(numpy.allclose (out, xyzs, atol=1.0e-10))
+        single = numpy.empty (3)
+        self.assertIs(colormodels.brightest_rgb_from_xyz (xyzs [0, 0], out=single), single)
+        self.assertTrue(numpy.allclose (single, colormodels.brightest_rgb_from_xyz (xyzs [0, 0])))
+
     def check_xyz_irgb(self, xyz0, verbose):
         ''' Check the direct conversions from xyz to irgb. '''
         irgb0 = colormodels.irgb_from_rgb (
@@ -188,6 +216,34 @@ class TestColormodels(unittest.TestCase):
             irgb = colormodels.irgb_color (ir, ig, ib)
             self.check_irgb_string(irgb, verbose)
 
+    def test_irgb_string_arrays(self, verbose=False):
+        ''' Convert arrays of colors back and forth from irgb and irgb_string. '''
+        irgbs = numpy.random.randint (0, 256, (1000, 3))
+        irgbs [0] = [0, 0, 0]
+        irgbs [1] = [255, 255, 255]
+        strings = colormodels.irgb_strings_from_irgbs (irgbs)
+        self.assertEqual(strings.shape, (1000,))
+        for i in range (0, len (irgbs)):
+            self.assertEqual(strings [i], colormodels.irgb_string_from_irgb (irgbs [i].copy()))
+        (irgbs1, invalid) = colormodels.irgbs_from_irgb_strings (strings)
+        self.assertEqual(irgbs1.dtype, numpy.uint8)
+        self.assertTrue(numpy.array_equal (irgbs1, irgbs))
+        self.assertEqual(len (invalid), 0)
+        # out of range values are clamped
+        self.assertEqual(list (colormodels.irgb_strings_from_irgbs ([[-5, 300, 16]])), ['#00FF10'])
+        # lowercase is accepted, and invalid strings are reported rather than raising
+        strings = ['#ab13d2', 'AB13D2F', '#AB13D', '#AB13D22', '#GG0000', '#0000FF', '', '#00\u00e900']
+        (irgbs2, invalid) = colormodels.irgbs_from_irgb_strings (strings)
+        if verbose:
+            print ('invalid: %s' % (str (invalid)))
+        self.assertEqual(list (invalid), [1, 2, 3, 4, 6, 7])
+        self.assertEqual(list (irgbs2 [0]), [0xAB, 0x13, 0xD2])
+        self.assertEqual(list (irgbs2 [5]), [0, 0, 255])
+        self.assertEqual(list (irgbs2 [4]), [0, 0, 0])
+        (irgbs3, invalid) = colormodels.irgbs_from_irgb_strings (numpy.array ([b'#102030', b'#1020']))
+        self.assertEqual(list (irgbs3 [0]), [0x10, 0x20, 0x30])
+        self.assertEqual(list (invalid), [1])
+
     # Clipping.
 
     def test_clipping(self, verbose=False):
@@ -195,23 +251,203 @@ class TestColormodels(unittest.TestCase):
         # This is just a coverage test.
         xyz_colors = ciexyz.get_normalized_spectral_line_colors ()
         num_wl = xyz_colors.shape[0]
-        for i in range (num_wl):
-            # Get rgb values for standard add white clipping.
-            colormodels.init_clipping (colormodels.CLIP_ADD_WHITE)
-            rgb_white_color = colormodels.irgb_string_from_rgb (
-                colormodels.rgb_from_xyz (xyz_colors [i]))
-
-            # Get rgb values for clamp-to-zero clipping.
-            colormodels.init_clipping (colormodels.CLIP_CLAMP_TO_ZERO)
-            rgb_clamp_color = colormodels.irgb_string_from_rgb (
-                colormodels.rgb_from_xyz (xyz_colors [i]))
-
-            msg = 'Wavelength: %s    White: %s    Clamp: %s' % (
-                str(i),    # FIXME: Put in Angstroms.
-                rgb_white_color,
-                rgb_clamp_color)
+        try:
+            for i in range (num_wl):
+                # Get rgb values for standard add white clipping.
+                colormodels.init_clipping (colormodels.CLIP_ADD_WHITE)
+                rgb_white_color = colormodels.irgb_string_from_rgb (
+                    colormodels.rgb_from_xyz (xyz_colors [i]))
+
+                # Get rgb values for clamp-to-zero clipping.
+                colormodels.init_clipping (colormodels.CLIP_CLAMP_TO_ZERO)
+                rgb_clamp_color = colormodels.irgb_string_from_rgb (
+                    colormodels.rgb_from_xyz (xyz_colors [i]))
+
+                # Get rgb values for compress chroma clipping.
+                colormodels.init_clipping (colormodels.CLIP_COMPRESS_CHROMA)
+                rgb_compress_color = colormodels.irgb_string_from_rgb (
+                    colormodels.rgb_from_xyz (xyz_colors [i]))
+
+                msg = 'Wavelength: %s    White: %s    Clamp: %s    Compress: %s' % (
+                    str(i),    # FIXME: Put in Angstroms.
+                    rgb_white_color,
+                    rgb_clamp_color,
+                    rgb_compress_color)
+                if verbose:
+                    print (msg)
+        finally:
+            colormodels.init_clipping()
+
+    def test_clipping_arrays(self, verbose=False):
+        ''' Test that clip_rgb_colors() agrees with clip_rgb_color() for each color. '''
+        rgbs = numpy.random.uniform (-0.5, 1.5, (6, 50, 3))
+        rgbs [0, 0] = 0.0
+        rgbs [0, 1] = [-0.2, -0.1, -0.3]
+        rgbs [0, 2] = [0.5, 0.25, 0.125]
+        def custom_gamma (x):
+            return colormodels.srgb_gamma_invert (x)
+        try:
+            for (clip_method, display_from_linear) in [
+                (colormodels.CLIP_ADD_WHITE, colormodels.srgb_gamma_invert),
+                (colormodels.CLIP_CLAMP_TO_ZERO, colormodels.srgb_gamma_invert),
+                (colormodels.CLIP_COMPRESS_CHROMA, colormodels.srgb_gamma_invert),
+                (colormodels.CLIP_ADD_WHITE, colormodels.simple_gamma_invert),
+                (colormodels.CLIP_ADD_WHITE, custom_gamma)]:
+                colormodels.init_clipping (clip_method)
+                colormodels.init_gamma_correction (display_from_linear, colormodels.srgb_gamma_correct)
+                (irgbs, (chromaticity, intensity), (num_chromaticity, num_intensity)) = colormodels.clip_rgb_colors (rgbs)
+                self.assertEqual(irgbs.dtype, numpy.uint8)
+                self.assertEqual(irgbs.shape, rgbs.shape)
+                self.assertEqual(chromaticity.shape, rgbs.shape [:-1])
+                for index in numpy.ndindex (rgbs.shape [:-1]):
+                    (irgb, (chrom, inten)) = colormodels.clip_rgb_color (rgbs [index])
+                    self.assertTrue(numpy.array_equal (irgbs [index], irgb))
+                    self.assertEqual(chromaticity [index], chrom)
+                    self.assertEqual(intensity [index], inten)
+                self.assertEqual(num_chromaticity, numpy.sum (chromaticity))
+                self.assertEqual(num_intensity, numpy.sum (intensity))
+                self.assertTrue(numpy.array_equal (colormodels.irgb_from_rgb (rgbs), irgbs))
+                if verbose:
+                    print ('clip method %d: %d chromaticity, %d intensity clipped, of %d' % (
+                        clip_method, num_chromaticity, num_intensity, len (chromaticity.ravel())))
+        finally:
+            colormodels.init_clipping()
+            colormodels.init_gamma_correction()
+
+    def test_gamut_mapping(self, verbose=False):
+        ''' Test that CLIP_COMPRESS_CHROMA keeps the lightness and hue of colors outside of the gamut. '''
+        for space in [colormodels.ColorSpace (clip_method=colormodels.CLIP_COMPRESS_CHROMA),
+                      colormodels.ColorSpace (colormodels.SMPTE_Red, colormodels.SMPTE_Green, colormodels.SMPTE_Blue,
+                          colormodels.WhiteD65, clip_method=colormodels.CLIP_COMPRESS_CHROMA)]:
+            labs = numpy.random.RandomState (3).uniform ((20.0, -150.0, -150.0), (70.0, 150.0, 150.0), (2000, 3))
+            rgbs = space.rgb_from_xyz (space.xyz_from_lab (labs))
+            clipped = space.clipped_rgb_from_rgb (rgbs)
+            self.assertTrue(numpy.all (clipped >= 0.0) and numpy.all (clipped <= 1.0 + 0.5 / 255.0))
+            # colors in the gamut are unchanged, unless the intensity is clipped
+            outside = numpy.any (rgbs < 0.0, axis=1)
+            self.assertTrue(numpy.any (outside) and not numpy.all (outside))
+            unchanged = ~outside & (numpy.max (rgbs, axis=1) <= 1.0)
+            self.assertTrue(numpy.array_equal (clipped [unchanged], rgbs [unchanged]))
+            # colors outside are mapped to (nearly) the gamut boundary, where one of the rgb values is zero
+            self.assertTrue(numpy.all (numpy.min (clipped [outside], axis=1) < 0.005))
+            mapped = outside & (numpy.max (clipped, axis=1) < 1.0)
+            self.assertGreater(numpy.sum (mapped), 100)
+            mapped_labs = space.lab_from_xyz (space.xyz_from_rgb (clipped [mapped]))
+            chroma = numpy.hypot (labs [mapped, 1], labs [mapped, 2])
+            mapped_chroma = numpy.hypot (mapped_labs [:, 1], mapped_labs [:, 2])
+            hue_difference = numpy.degrees (numpy.arctan2 (mapped_labs [:, 2], mapped_labs [:, 1]) - numpy.arctan2 (labs [mapped, 2], labs [mapped, 1]))
+            hue_difference = (hue_difference + 180.0) % 360.0 - 180.0
             if verbose:
-                print (msg)
+                print ('%d colors mapped, max lightness difference %g, max hue difference %g' % (
+                    numpy.sum (mapped), numpy.max (numpy.abs (mapped_labs [:, 0] - labs [mapped, 0])), numpy.max (numpy.abs (hue_difference))))
+            self.assertTrue(numpy.allclose (mapped_labs [:, 0], labs [mapped, 0], rtol=0.0, atol=0.05))
+            self.assertTrue(numpy.all (numpy.abs (hue_difference [mapped_chroma > 5.0]) < 0.5))
+            self.assertTrue(numpy.all (mapped_chroma < chroma))
+
+    def test_display_transform(self, verbose=False):
+        ''' Test that DisplayTransform agrees with irgb_from_xyz(). '''
+        xyzs = numpy.random.uniform (-0.2, 1.5, (7, 300, 3))
+        xyzs [0, 0] = 0.0
+        xyzs [0, 1] = [-1.0, -1.0, -1.0]
+        xyzs [0, 2] = [0.0, 5.0, 0.0]
+        try:
+            for clip_method in [colormodels.CLIP_ADD_WHITE, colormodels.CLIP_CLAMP_TO_ZERO, colormodels.CLIP_COMPRESS_CHROMA]:
+                colormodels.init_clipping (clip_method)
+                expected = colormodels.irgb_from_xyz (xyzs)
+                # a small chunk size, to have a partial last chunk
+                transform = colormodels.DisplayTransform (chunk_size=256)
+                irgbs = transform (xyzs)
+                if verbose:
+                    print ('clip method %d: %s' % (clip_method, str (irgbs [0, :3])))
+                self.assertEqual(irgbs.dtype, numpy.uint8)
+                self.assertTrue(numpy.array_equal (irgbs, expected))
+                out = numpy.zeros (xyzs.shape, numpy.uint8)
+                self.assertIs(transform (xyzs, out=out), out)
+                self.assertTrue(numpy.array_equal (out, expected))
+                self.assertTrue(numpy.array_equal (transform (xyzs [0, 5]), colormodels.irgb_from_xyz (xyzs [0, 5])))
+            with self.assertRaises(ValueError):
+                transform (xyzs, out=numpy.zeros (xyzs.shape, numpy.float64))
+        finally:
+            colormodels.init_clipping()
+
+    def test_color_space(self, verbose=False):
+        ''' Test that color spaces agree with the module functions, and can be used at once. '''
+        xyzs = numpy.random.uniform (-0.1, 1.2, (200, 3))
+        spaces = [
+            colormodels.ColorSpace(),
+            colormodels.ColorSpace (clip_method=colormodels.CLIP_CLAMP_TO_ZERO),
+            colormodels.ColorSpace (
+                display_from_linear_function=colormodels.simple_gamma_invert,
+                linear_from_display_function=colormodels.simple_gamma_correct,
+                gamma=colormodels.POYNTON_GAMMA),
+            colormodels.ColorSpace (luv_lab_white_point=colormodels.WhiteA),
+            colormodels.ColorSpace (colormodels.SMPTE_Red, colormodels.SMPTE_Green, colormodels.SMPTE_Blue, colormodels.WhiteD55),
+        ]
+        def results (color_space):
+            return [
+                color_space.irgb_from_xyz (xyzs),
+                color_space.luv_from_xyz (xyzs),
+                color_space.lab_from_xyz (xyzs),
+                color_space.rgb_from_irgb (color_space.irgb_from_xyz (xyzs)),
+                numpy.array ([color_space.irgb_from_xyz (xyz) for xyz in xyzs [:10]]),
+                numpy.array ([color_space.xyz_from_lab (color_space.lab_from_xyz (xyz)) for xyz in xyzs [:10]])]
+        # the settings made with the init functions, one at a time
+        try:
+            expected = []
+            for (index, init) in enumerate ([
+                lambda: None,
+                lambda: colormodels.init_clipping (colormodels.CLIP_CLAMP_TO_ZERO),
+                lambda: colormodels.init_gamma_correction (
+                    colormodels.simple_gamma_invert, colormodels.simple_gamma_correct, colormodels.POYNTON_GAMMA),
+                lambda: colormodels.init_Luv_Lab_white_point (colormodels.WhiteA),
+                lambda: colormodels.init (colormodels.SMPTE_Red, colormodels.SMPTE_Green, colormodels.SMPTE_Blue, colormodels.WhiteD55)]):
+                colormodels.init()
+                init()
+                expected.append (results (colormodels))
+                self.assertTrue(numpy.array_equal (colormodels.rgb_from_xyz_matrix, spaces [index].rgb_from_xyz_matrix))
+        finally:
+            colormodels.init()
+        # all of the color spaces at once, from several threads
+        outputs = [None] * len (spaces)
+        def worker (index):
+            outputs [index] = results (spaces [index])
+        threads = [threading.Thread (target=worker, args=(i,)) for i in range (len (spaces))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index in range (len (spaces)):
+            if verbose:
+                print (repr (spaces [index]))
+            for (output, expect) in zip (outputs [index], expected [index]):
+                self.assertTrue(numpy.array_equal (output, expect))
+        # the module functions are not changed by the other color spaces
+        self.assertTrue(numpy.array_equal (colormodels.irgb_from_xyz (xyzs), expected [0][0]))
+        # immutable, but can be copied with changes, and pickled
+        space = spaces [1]
+        with self.assertRaises(AttributeError):
+            space.clip_method = colormodels.CLIP_ADD_WHITE
+        with self.assertRaises(ValueError):
+            space.rgb_from_xyz_matrix [0, 0] = 1.0
+        changed = space.replace (clip_method=colormodels.CLIP_ADD_WHITE)
+        self.assertEqual(space.clip_method, colormodels.CLIP_CLAMP_TO_ZERO)
+        self.assertTrue(numpy.array_equal (changed.irgb_from_xyz (xyzs), expected [0][0]))
+        with self.assertRaises(TypeError):
+            space.replace (clipping=1)
+        with self.assertRaises(ValueError):
+            colormodels.ColorSpace (clip_method=7)
+        copied = pickle.loads (pickle.dumps (spaces [2]))
+        self.assertTrue(numpy.array_equal (copied.irgb_from_xyz (xyzs), expected [2][0]))
+        # set_color_space() makes a color space the default
+        try:
+            colormodels.set_color_space (spaces [2])
+            self.assertIs(colormodels.get_color_space(), spaces [2])
+            self.assertEqual(colormodels.gamma_exponent, colormodels.POYNTON_GAMMA)
+            self.assertTrue(numpy.array_equal (colormodels.irgb_from_xyz (xyzs), expected [2][0]))
+            self.assertTrue(numpy.array_equal (colormodels.DisplayTransform() (xyzs), expected [2][0]))
+            self.assertTrue(numpy.array_equal (colormodels.DisplayTransform (color_space=spaces [1]) (xyzs), expected [1][0]))
+        finally:
+            colormodels.init()
 
     # Gamma correction.
 
@@ -236,6 +472,46 @@ class TestColormodels(unittest.TestCase):
             self.assertLessEqual(rel_err1, tolerance)
             self.assertLessEqual(rel_err2, tolerance)
 
+    def test_chromatic_adaptation(self, verbose=False):
+        ''' Test the chromatic adaptation between white points. '''
+        # Bradford D65 to D50, from Lindbloom (www.brucelindbloom.com), for his XYZ whites.
+        D65 = colormodels.xyz_color (0.95047, 1.0, 1.08883)
+        D50 = colormodels.xyz_color (0.96422, 1.0, 0.82521)
+        expected = numpy.array ([
+            [ 1.0478112,  0.0228866, -0.0501270],
+            [ 0.0295424,  0.9904844, -0.0170491],
+            [-0.0092345,  0.0150436,  0.7521316]])
+        matrix = colormodels.chromatic_adaptation_matrix (D65, D50)
+        if verbose:
+            print ('Bradford D65 to D50:', matrix)
+        self.assertTrue(numpy.allclose (matrix, expected, rtol=0.0, atol=1.0e-6))
+        # cached, and read-only
+        self.assertIs(colormodels.chromatic_adaptation_matrix (D65, D50), matrix)
+        self.assertFalse(matrix.flags.writeable)
+        rgb = numpy.random.RandomState (0).uniform (0.0, 1.0, (100, 3))
+        xyzs = colormodels.xyz_from_rgb (rgb)
+        whites = [colormodels.WhiteA, colormodels.WhiteD55, colormodels.WhiteD65, colormodels.WhiteD75, colormodels.MacBethWhite]
+        for method in [colormodels.ADAPT_BRADFORD, colormodels.ADAPT_VON_KRIES, colormodels.ADAPT_CAT02]:
+            for source in whites:
+                for destination in whites:
+                    # the source white goes to the destination white, at the same luminance
+                    adapted_white = colormodels.adapt_xyz (source, source, destination, method)
+                    self.assertTrue(numpy.allclose (adapted_white, destination * (source [1] / destination [1])))
+                    # arrays of colors are the same as single colors, and adapting back is the inverse
+                    adapted = colormodels.adapt_xyz (xyzs, source, destination, method)
+                    self.assertTrue(numpy.allclose (adapted [7], colormodels.adapt_xyz (xyzs [7], source, destination, method)))
+                    self.assertTrue(numpy.allclose (colormodels.adapt_xyz (adapted, destination, source, method), xyzs))
+                    if source is destination:
+                        self.assertTrue(numpy.allclose (adapted, xyzs))
+        # in place
+        out = xyzs.copy()
+        self.assertIs(colormodels.adapt_xyz (out, colormodels.WhiteA, colormodels.WhiteD65, out=out), out)
+        self.assertTrue(numpy.allclose (out, colormodels.adapt_xyz (xyzs, colormodels.WhiteA, colormodels.WhiteD65)))
+        with self.assertRaises(ValueError):
+            colormodels.chromatic_adaptation_matrix (D65, D50, method=7)
+        with self.assertRaises(ValueError):
+            colormodels.chromatic_adaptation_matrix (D65, [0.3, 0.3])
+
     def test_gamma_srgb(self, verbose=False):
         ''' Test default sRGB component (cannot supply exponent). '''
         msg = 'Testing sRGB gamma:'
@@ -259,6 +535,47 @@ class TestColormodels(unittest.TestCase):
                 gamma = gamma)
             self.check_gamma_correction(verbose)
 
+    def test_gamma_tables(self, verbose=False):
+        ''' Test that the gamma lookup tables agree with the gamma functions. '''
+        linear = numpy.random.uniform (-0.1, 1.1, 20000)
+        linear [:6] = [0.0, 1.0, 0.00304, 1.0e-300, -numpy.inf, numpy.inf]
+        try:
+            for (invert, correct, gamma) in [
+                (colormodels.srgb_gamma_invert, colormodels.srgb_gamma_correct, 2.2),
+                (colormodels.simple_gamma_invert, colormodels.simple_gamma_correct, 2.2),
+                (colormodels.simple_gamma_invert, colormodels.simple_gamma_correct, 0.5)]:
+                colormodels.init_gamma_correction (invert, correct, gamma)
+                for (bits, dtype) in [(8, numpy.uint8), (16, numpy.uint16)]:
+                    max_code = (1 << bits) - 1
+                    codes = colormodels.gamma_encode (linear, bits)
+                    expected = numpy.clip (numpy.rint (max_code * invert (linear)), 0, max_code)
+                    self.assertEqual(codes.dtype, dtype)
+                    self.assertTrue(numpy.array_equal (codes, expected))
+                    all_codes = numpy.arange (max_code + 1)
+                    decoded = colormodels.gamma_decode (all_codes, bits)
+                    for i in [0, 1, 2, max_code // 3, max_code - 1, max_code]:
+                        self.assertEqual(decoded [i], correct (i / float (max_code)))
+                    # decoding then encoding gives the same codes back
+                    self.assertTrue(numpy.array_equal (colormodels.gamma_encode (decoded, bits), all_codes))
+                    if verbose:
+                        print ('gamma %s, %d bits: ok' % (invert.__name__, bits))
+            # rgb_from_irgb() on arrays uses the 8-bit table
+            irgbs = numpy.random.randint (0, 256, (10, 3)).astype (numpy.uint8)
+            rgbs = colormodels.rgb_from_irgb (irgbs)
+            for i in range (0, len (irgbs)):
+                self.assertTrue(numpy.array_equal (rgbs [i], colormodels.rgb_from_irgb (irgbs [i])))
+            with self.assertRaises(ValueError):
+                colormodels.gamma_encode (linear, 12)
+            with self.assertRaises(ValueError):
+                colormodels.gamma_decode (linear)
+            # codes outside of the range for the bit depth
+            for (bits, bad_code) in [(8, -1), (8, 256), (16, -1), (16, 65536)]:
+                with self.assertRaises(ValueError):
+                    colormodels.gamma_decode (numpy.array ([0, bad_code]), bits)
+            self.assertEqual(colormodels.gamma_decode (numpy.array ([], dtype=int)).shape, (0,))
+        finally:
+            colormodels.init_gamma_correction()
+
     # Conversions between standard device independent color space (CIE XYZ)
     # and the almost perceptually uniform space Luv.
 
@@ -329,6 +646,45 @@ class TestColormodels(unittest.TestCase):
             xyz0 = colormodels.xyz_color (x0, y0, z0)
             self.check_xyz_lab(xyz0, verbose)
 
+    def test_luv_lab_arrays(self, verbose=False):
+        ''' Test the array Luv and Lab conversions against the single color conversions. '''
+        # include black, dark colors in the linear ranges, and colors in the cube root ranges
+        xyzs = numpy.empty ((3, 40, 3))
+        xyzs [0] = 0.02 * numpy.random.random ((40, 3))
+        xyzs [1] = 10.0 * numpy.random.random ((40, 3))
+        xyzs [2] = numpy.random.random ((40, 3))
+        xyzs [0, 0] = 0.0
+        xyzs [2, 0] = [0.0, 0.0, 0.5]
+        luvs = colormodels.luv_from_xyz (xyzs)
+        labs = colormodels.lab_from_xyz (xyzs)
+        luvs_xyz = colormodels.xyz_from_luv (luvs)
+        labs_xyz = colormodels.xyz_from_lab (labs)
+        self.assertEqual(luvs.shape, xyzs.shape)
+        self.assertEqual(labs.shape, xyzs.shape)
+        tolerance = 1.0e-12
+        for index in numpy.ndindex (xyzs.shape [:-1]):
+            xyz = xyzs [index]
+            luv = colormodels.luv_from_xyz (xyz)
+            lab = colormodels.lab_from_xyz (xyz)
+            self.assertTrue(numpy.allclose (luvs [index], luv, rtol=tolerance, atol=tolerance))
+            self.assertTrue(numpy.allclose (labs [index], lab, rtol=tolerance, atol=tolerance))
+            self.assertTrue(numpy.allclose (luvs_xyz [index], colormodels.xyz_from_luv (luv), rtol=tolerance, atol=tolerance))
+            self.assertTrue(numpy.allclose (labs_xyz [index], colormodels.xyz_from_lab (lab), rtol=tolerance, atol=tolerance))
+        self.assertTrue(numpy.all (luvs_xyz [0, 0] == 0.0))
+        if verbose:
+            print ('Luv: %s' % (str (luvs [1, :3])))
+            print ('Lab: %s' % (str (labs [1, :3])))
+        # the piecewise utility functions, on both sides of the cutoffs
+        ts = numpy.linspace (-0.1, 2.0, 1001)
+        for (func, values) in [
+            (colormodels.L_luminance, ts),
+            (colormodels.L_luminance_inverse, 100.0 * ts),
+            (colormodels.Lab_f, ts),
+            (colormodels.Lab_f_inverse, ts)]:
+            results = func (values)
+            for i in range (0, len (values)):
+                self.assertLessEqual(math.fabs (results [i] - func (float (values [i]))), tolerance * max (1.0, math.fabs (results [i])))
+
     # Luminance function [of Y value of an XYZ color] used in Luv and Lab.
 
     def check_L_luminance_inverse_1(self, y0, verbose):
@@ -0,0 +1,121 @@
+'''
+test_lut.py - Test cases for lut.py
+
+License:
+
+Copyright (C) 2008 Mark Kness
+
+Author - Mark Kness - mkness@alumni.utexas.net
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import os, shutil, tempfile
+import numpy
+import unittest
+
+import colormodels
+import lut
+
+
+class TestLut(unittest.TestCase):
+    ''' Test cases for the lookup tables. '''
+
+    def test_linear(self, verbose=False):
+        ''' Test that both interpolations are exact for a linear conversion. '''
+        matrix = numpy.array ([[0.5, -0.2, 0.1], [0.3, 1.2, -0.4], [-0.1, 0.2, 0.9]])
+        offset = numpy.array ([0.1, 0.0, -0.2])
+        function = lambda colors: numpy.dot (colors, matrix.T) + offset
+        table = lut.build_lut (function, 5, (-1.0, 0.0, 0.0), (1.0, 2.0, 3.0))
+        self.assertEqual(table.size, 5)
+        colors = numpy.random.uniform ((-1.0, 0.0, 0.0), (1.0, 2.0, 3.0), (1000, 3))
+        # include points on the lattice, and the upper corner
+        colors [0:3] = [[-1.0, 0.0, 0.0], [0.5, 1.0, 1.5], [1.0, 2.0, 3.0]]
+        for method in [lut.INTERP_TRILINEAR, lut.INTERP_TETRAHEDRAL]:
+            (max_error, rms_error, worst_color) = lut.lut_error (table, function, colors, method=method)
+            if verbose:
+                print ('method %d: max error %g, rms error %g' % (method, max_error, rms_error))
+            self.assertLess(max_error, 1.0e-12)
+        # single colors, and out
+        self.assertTrue(numpy.allclose (table.apply (colors [5]), function (colors [5]), atol=1.0e-12))
+        out = numpy.empty ((10, 100, 3))
+        self.assertIs(table.apply (colors.reshape (10, 100, 3), out=out), out)
+        self.assertTrue(numpy.allclose (out.reshape (1000, 3), function (colors), atol=1.0e-12))
+        # colors outside of the domain are clamped to it
+        self.assertTrue(numpy.allclose (table.apply ([5.0, -1.0, 1.0]), function ([1.0, 0.0, 1.0]), atol=1.0e-12))
+        with self.assertRaises(ValueError):
+            table.apply (colors, method=7)
+        with self.assertRaises(ValueError):
+            table.apply (colors, out=numpy.empty ((1000, 2)))
+        with self.assertRaises(ValueError):
+            lut.ColorLUT (numpy.zeros ((4, 4, 3, 3)))
+
+    def test_display_lut(self, verbose=False):
+        ''' Test that the display lookup tables nearly agree with irgb_from_xyz(). '''
+        for space in ['xyz', 'lab']:
+            table = lut.display_lut (space, 33)
+            colors = numpy.random.uniform (table.domain_min, table.domain_max, (20000, 3))
+            xyzs = colors if space == 'xyz' else colormodels.xyz_from_lab (colors)
+            exact = colormodels.irgb_from_xyz (xyzs)
+            for method in [lut.INTERP_TRILINEAR, lut.INTERP_TETRAHEDRAL]:
+                (max_error, rms_error, worst_color) = lut.lut_error (table, lut.display_function (space), method=method)
+                irgbs = table.irgb (colors, method)
+                self.assertEqual(irgbs.dtype, numpy.uint8)
+                code_errors = numpy.abs (irgbs.astype (int) - exact)
+                if verbose:
+                    print ('%s method %d: max error %g, rms error %g, worst color %s, mean code error %g' % (
+                        space, method, max_error, rms_error, str (worst_color), numpy.mean (code_errors)))
+                self.assertLess(rms_error, 0.01)
+                self.assertLess(numpy.mean (code_errors), 1.0)
+        # in gamut colors far from the gamut boundary are exact for the xyz table
+        rgbs = numpy.random.uniform (0.1, 0.9, (1000, 3))
+        xyzs = colormodels.xyz_from_rgb (rgbs)
+        table = lut.display_lut ('xyz', 65)
+        (max_error, rms_error, worst_color) = lut.lut_error (table, lut.display_function ('xyz'), xyzs)
+        self.assertLess(max_error, 1.0e-3)
+        # colors with a NaN component are black, as with irgb_from_xyz()
+        nan_xyzs = numpy.array ([[numpy.nan, 0.2, 0.2], [0.2, 0.2, numpy.nan]])
+        for method in [lut.INTERP_TRILINEAR, lut.INTERP_TETRAHEDRAL]:
+            self.assertTrue(numpy.array_equal (table.irgb (nan_xyzs, method), colormodels.irgb_from_xyz (nan_xyzs)))
+            self.assertTrue(numpy.array_equal (table.irgb (nan_xyzs, method), numpy.zeros ((2, 3))))
+        with self.assertRaises(ValueError):
+            lut.display_lut ('hsv')
+
+    def test_save_load(self, verbose=False):
+        ''' Test that a saved table loads back as a read-only memory map. '''
+        table = lut.display_lut ('lab', 9)
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join (directory, 'lab_lut.npy')
+            table.save (filename)
+            loaded = lut.ColorLUT.load (filename)
+            if verbose:
+                print (repr (loaded))
+            self.assertFalse(loaded.table.flags.writeable)
+            self.assertTrue(numpy.array_equal (loaded.table, table.table))
+            self.assertTrue(numpy.array_equal (loaded.domain_min, table.domain_min))
+            self.assertTrue(numpy.array_equal (loaded.domain_max, table.domain_max))
+            colors = numpy.random.uniform (table.domain_min, table.domain_max, (100, 3))
+            self.assertTrue(numpy.array_equal (loaded.apply (colors), table.apply (colors)))
+            copied = lut.ColorLUT.load (filename, mmap=False)
+            self.assertTrue(copied.table.flags.writeable)
+            del loaded
+            numpy.save (filename, numpy.zeros (3))
+            with self.assertRaises(ValueError):
+                lut.ColorLUT.load (filename)
+        finally:
+            shutil.rmtree (directory)
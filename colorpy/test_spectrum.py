@@ -0,0 +1,100 @@
+'''
+test_spectrum.py - Test cases for spectrum.py
+
+License:
+
+Copyright (C) 2008 Mark Kness
+
+Author - Mark Kness - mkness@alumni.utexas.net
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import numpy
+import unittest
+
+import ciexyz
+import illuminants
+import spectrum
+
+
+class TestSpectrum(unittest.TestCase):
+    ''' Test cases for spectrum. '''
+
+    def test_wavelength_axis(self, verbose=False):
+        ''' Test that equal wavelengths share one read-only axis. '''
+        axis = spectrum.wavelength_axis()
+        self.assertTrue(numpy.array_equal (axis, ciexyz.empty_spectrum() [:,0]))
+        self.assertIs(spectrum.wavelength_axis (ciexyz.empty_spectrum() [:,0]), axis)
+        self.assertFalse(axis.flags.writeable)
+        s1 = spectrum.Spectrum()
+        s2 = spectrum.Spectrum (axis)
+        self.assertIs(s1.wavelengths, s2.wavelengths)
+        with self.assertRaises(ValueError):
+            spectrum.wavelength_axis ([[400.0, 500.0]])
+
+    def test_spectrum(self, verbose=False):
+        ''' Test the conversions of a Spectrum to and from the two-column array. '''
+        D65 = illuminants.get_illuminant_D65()
+        s = spectrum.Spectrum.from_array (D65)
+        if verbose:
+            print (repr (s))
+        self.assertEqual(len (s), len (D65))
+        self.assertTrue(s.intensities.flags.c_contiguous)
+        self.assertTrue(numpy.array_equal (s.to_array(), D65))
+        self.assertTrue(numpy.allclose (s.xyz(), ciexyz.xyz_from_spectrum (D65), rtol=1.0e-14))
+        # the spectrum does not share its intensities with the array
+        s.intensities [:] = 0.0
+        self.assertNotEqual(D65 [100][1], 0.0)
+        self.assertFalse(hasattr (s, '__dict__'))
+        with self.assertRaises(ValueError):
+            spectrum.Spectrum (intensities = numpy.zeros (10))
+        c = s.copy()
+        c.intensities [0] = 1.0
+        self.assertEqual(s.intensities [0], 0.0)
+        self.assertIs(c.wavelengths, s.wavelengths)
+
+    def test_batch(self, verbose=False):
+        ''' Test a SpectrumBatch against the individual two-column arrays. '''
+        T_list = [2000.0, 3000.0, 5778.0, 10000.0]
+        arrays = [illuminants.get_blackbody_illuminant (T) for T in T_list]
+        batch = spectrum.SpectrumBatch.from_arrays (arrays)
+        if verbose:
+            print (repr (batch))
+        self.assertEqual(len (batch), len (T_list))
+        self.assertEqual(batch.intensities.shape, (len (T_list), len (arrays [0])))
+        self.assertTrue(batch.intensities.flags.c_contiguous)
+        xyzs = batch.xyz()
+        for i in range (0, len (arrays)):
+            self.assertTrue(numpy.allclose (xyzs [i], ciexyz.xyz_from_spectrum (arrays [i]), rtol=1.0e-14))
+            self.assertTrue(numpy.array_equal (batch.to_arrays() [i], arrays [i]))
+        # items and slices are views into the batch
+        batch [1].intensities [:] = 0.0
+        self.assertTrue(numpy.all (batch.intensities [1] == 0.0))
+        part = batch [2:]
+        self.assertEqual(len (part), 2)
+        self.assertIs(part.wavelengths, batch.wavelengths)
+        self.assertEqual(len (list (batch)), len (T_list))
+        # black spectra, and mismatched wavelengths
+        self.assertEqual(spectrum.SpectrumBatch (count=3).intensities.shape, (3, len (arrays [0])))
+        short = arrays [0] [:-1]
+        with self.assertRaises(ValueError):
+            spectrum.SpectrumBatch.from_arrays ([arrays [0], short])
+
+
+if __name__ == '__main__':
+    unittest.main()